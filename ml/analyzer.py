@@ -1,6 +1,92 @@
 import pandas as pd
 import numpy as np
 import re
+import time
+from itertools import chain
+from statistics import NormalDist
+
+EMAIL_REGEX = r'^[\w\.-]+@[\w\.-]+\.\w+$'
+PHONE_REGEX = r'^\+?[1-9]\d{1,14}$' # Simple E.164
+NAT_STRINGS = {'NaT', 'nat', 'NAT', 'nan', 'NaN', 'NAN', 'now', 'today'}
+
+
+def get_date_columns(columns):
+    return [c for c in columns if 'date' in c.lower() or 'time' in c.lower() or 'dob' in c.lower()]
+
+
+def guess_date_formats(df):
+    """
+    Date format per date column, guessed from its first non-null value.
+    This is the same guess pd.to_datetime makes on a whole column, so passing
+    it explicitly keeps the date check stable when only part of the rows is seen.
+    """
+    from pandas.tseries.api import guess_datetime_format
+
+    formats = {}
+    for col in get_date_columns(df.columns):
+        for value in df[col].dropna():
+            # pandas also skips blank and NaT-like strings when it guesses
+            if isinstance(value, str) and (value == '' or value in NAT_STRINGS):
+                continue
+            if type(value) is str:
+                formats[col] = guess_datetime_format(value, dayfirst=True)
+            break
+    return formats
+
+
+def formatting_checks(columns):
+    """
+    (check, column) pairs in the order the checks run: email, phone, date.
+    """
+    # Identify columns by name heuristic
+    email_cols = [c for c in columns if 'email' in c.lower()]
+    phone_cols = [c for c in columns if 'phone' in c.lower() or 'mobile' in c.lower()]
+    date_cols = get_date_columns(columns)
+
+    return (
+        [('email', c) for c in email_cols]
+        + [('phone', c) for c in phone_cols]
+        + [('date', c) for c in date_cols]
+    )
+
+
+def formatting_issue_mask(df, check, col, date_formats=None):
+    """
+    Mask aligned to the non-null values of the column, True where the value
+    fails the check. None when the column has no values.
+    """
+    non_null = df[col].dropna()
+    if len(non_null) == 0:
+        return None
+
+    # Check Emails
+    if check == 'email':
+        return ~non_null.astype(str).str.match(EMAIL_REGEX)
+
+    # Check Phones
+    if check == 'phone':
+        return ~non_null.astype(str).str.match(PHONE_REGEX)
+
+    # Check Dates
+    fmt = (date_formats or {}).get(col)
+    if fmt:
+        converted = pd.to_datetime(non_null, errors='coerce', format=fmt)
+    else:
+        converted = pd.to_datetime(non_null, errors='coerce', dayfirst=True)
+    return converted.isna()
+
+
+def formatting_issue_masks(df, date_formats=None):
+    """
+    Yields (column, mask) pairs for every formatting check.
+    The mask is aligned to the non-null values of the column and is True
+    where the value fails the check.
+    """
+    for check, col in formatting_checks(df.columns):
+        mask = formatting_issue_mask(df, check, col, date_formats)
+        if mask is not None:
+            yield col, mask
+
 
 class DataAnalyzer:
     def __init__(self, df):
@@ -22,78 +108,362 @@ class DataAnalyzer:
         missing_report = self.df.isnull().sum().to_dict()
         self.report["missing_values"] = {k: v for k, v in missing_report.items() if v > 0}
 
-        # 2. Duplicates
-        dup_count = self.df.duplicated().sum()
-        self.report["duplicates"] = int(dup_count)
+        # 2. Duplicates (keep='first': row hashes, then hash matches compared; the mask is kept for previews)
+        from backend.preprocessing.deduplication import duplicate_mask
+
+        self.duplicate_mask = duplicate_mask(self.df)
+        self.report["duplicates"] = int(self.duplicate_mask.sum())
 
         # 3. Invalid Formatting (Inconsistencies)
         formatting_issues = {}
         total_formatting = 0
-        
-        email_regex = r'^[\w\.-]+@[\w\.-]+\.\w+$'
-        phone_regex = r'^\+?[1-9]\d{1,14}$' # Simple E.164
-        
-        # Identify columns by name heuristic
-        email_cols = [c for c in self.df.columns if 'email' in c.lower()]
-        phone_cols = [c for c in self.df.columns if 'phone' in c.lower() or 'mobile' in c.lower()]
-        date_cols = [c for c in self.df.columns if 'date' in c.lower() or 'time' in c.lower() or 'dob' in c.lower()]
-
-        # Check Emails
-        for col in email_cols:
-            non_null = self.df[col].dropna().astype(str)
-            if len(non_null) > 0:
-                errors = (~non_null.str.match(email_regex)).sum()
-                if errors > 0:
-                    formatting_issues[col] = int(errors)
-                    total_formatting += errors
-
-        # Check Phones
-        for col in phone_cols:
-            non_null = self.df[col].dropna().astype(str)
-            if len(non_null) > 0:
-                errors = (~non_null.str.match(phone_regex)).sum()
-                if errors > 0: 
-                    formatting_issues[col] = int(errors)
-                    total_formatting += errors
-
-        # Check Dates
-        for col in date_cols:
-             non_null = self.df[col].dropna()
-             if len(non_null) > 0:
-                 try:
-                     pd.to_datetime(non_null, errors='raise', dayfirst=True)
-                 except:
-                     converted = pd.to_datetime(non_null, errors='coerce', dayfirst=True)
-                     errors = converted.isna().sum()
-                     if errors > 0:
-                         formatting_issues[col] = int(errors)
-                         total_formatting += errors
+
+        for col, issue_mask in formatting_issue_masks(self.df, guess_date_formats(self.df)):
+            errors = issue_mask.sum()
+            if errors > 0:
+                formatting_issues[col] = int(errors)
+                total_formatting += errors
 
         self.report["formatting_issues"] = formatting_issues
         self.report["inconsistencies"] = int(total_formatting)
-        self.report["anomalies"] = 0 # DEPRECATED
 
-        # 4. Quality Score
+        # 4. Anomalies (rows with a numeric outlier or an impossible value)
+        from backend.preprocessing.anomalies import detect_anomalies
+        self.anomaly_flags, anomaly_columns, anomaly_rules, self.anomaly_reasons = detect_anomalies(
+            self.df, return_reasons=True
+        )
+        self.report["anomalies"] = int(self.anomaly_flags.sum())
+        self.report["anomaly_columns"] = anomaly_columns
+        self.report["anomaly_rules"] = anomaly_rules
+
+        # 5. Quality Score
         self.report["quality_score"] = self.calculate_quality_score()
         
         return self.report
 
+    def estimate(self, sample_size=2000, time_budget=1.0, confidence=0.95, seed=None):
+        """
+        Provisional report from a row sample, see estimate_quality().
+        """
+        return estimate_quality(
+            iter_frame_batches(self.df),
+            sample_size=sample_size,
+            time_budget=time_budget,
+            confidence=confidence,
+            seed=seed
+        )
+
     def calculate_quality_score(self):
-        # 1. Missing Rate (%)
-        total_missing = sum(self.report['missing_values'].values())
-        total_cells = max(1, self.df.size)
-        missing_rate = (total_missing / total_cells) * 100
-        
-        # 2. Duplicate Rate (%)
-        total_rows = max(1, len(self.df))
-        duplicate_rate = (self.report['duplicates'] / total_rows) * 100
-        
-        # 3. Formatting Issue Rate (%)
-        validity_issue_rate = (self.report['inconsistencies'] / total_cells) * 100
-        
-        # Final Score is still a "Quality Health" metric (higher is better)
-        # Calculated as 100 - Average Error Rate
-        avg_error = (missing_rate + duplicate_rate + validity_issue_rate) / 3
-        quality_health_score = max(0, 100 - avg_error)
-        
-        return round(quality_health_score, 1)
+        return quality_score(
+            total_missing=sum(self.report['missing_values'].values()),
+            duplicates=self.report['duplicates'],
+            inconsistencies=self.report['inconsistencies'],
+            total_cells=self.df.size,
+            total_rows=len(self.df)
+        )
+
+
+def quality_score(total_missing, duplicates, inconsistencies, total_cells, total_rows):
+    # 1. Missing Rate (%)
+    total_cells = max(1, total_cells)
+    missing_rate = (total_missing / total_cells) * 100
+
+    # 2. Duplicate Rate (%)
+    total_rows = max(1, total_rows)
+    duplicate_rate = (duplicates / total_rows) * 100
+
+    # 3. Formatting Issue Rate (%)
+    validity_issue_rate = (inconsistencies / total_cells) * 100
+
+    # Final Score is still a "Quality Health" metric (higher is better)
+    # Calculated as 100 - Average Error Rate
+    avg_error = (missing_rate + duplicate_rate + validity_issue_rate) / 3
+    quality_health_score = max(0, 100 - avg_error)
+
+    return round(quality_health_score, 1)
+
+
+# =========================
+# Mergeable (per-partition) report
+# =========================
+class QualityReportAccumulator:
+    """
+    Counts behind DataAnalyzer.analyze(), built one partition at a time.
+
+    Missing and formatting counts are plain sums. Duplicates are rows minus
+    distinct row hashes, so partitions share their hashes through a
+    RowHashSet (which spills to disk past max_in_memory hashes); a hash
+    collision would hide a row, so callers holding an exact count (an
+    ExternalDuplicateFinder fed the same rows) pass it to report().
+    merge() is associative: any split of the rows, merged in any grouping,
+    gives the same report() and quality score as analyzing the whole frame.
+
+    Anomalies need whole-column medians. With anomalies=True an
+    AnomalyAccumulator counts them in a second pass over compact spilled
+    batches (medians from bounded samples, see backend/preprocessing/
+    anomalies.py); without, they are left out (None).
+
+    All partitions must use the same date_formats (see guess_date_formats),
+    otherwise a date column could be judged differently per chunk.
+    """
+
+    def __init__(self, columns, date_formats=None, max_in_memory=10_000_000, spill_dir=None, anomalies=False):
+        from backend.preprocessing.anomalies import AnomalyAccumulator
+        from backend.preprocessing.deduplication import RowHashSet
+
+        self.columns = list(columns)
+        self.date_formats = dict(date_formats or {})
+        self.rows = 0
+        self.missing = {c: 0 for c in self.columns}
+        self.formatting = {key: 0 for key in formatting_checks(self.columns)}
+        self.row_hashes = RowHashSet(max_in_memory=max_in_memory, spill_dir=spill_dir)
+        self.anomalies = AnomalyAccumulator(spill_dir=spill_dir) if anomalies else None
+
+    @classmethod
+    def from_frame(cls, df, date_formats=None, **kwargs):
+        if date_formats is None:
+            date_formats = guess_date_formats(df)
+        return cls(df.columns, date_formats, **kwargs).update(df)
+
+    def update(self, df):
+        """
+        Adds one partition. Its columns must match the accumulator's.
+        """
+        from backend.preprocessing.deduplication import hash_rows
+
+        if list(df.columns) != self.columns:
+            raise ValueError("Partition columns do not match the report columns")
+
+        self.rows += len(df)
+        for col, count in df.isnull().sum().items():
+            self.missing[col] += int(count)
+        for check, col in formatting_checks(self.columns):
+            issue_mask = formatting_issue_mask(df, check, col, self.date_formats)
+            if issue_mask is not None:
+                self.formatting[(check, col)] += int(issue_mask.sum())
+        if len(df):
+            self.row_hashes.add(hash_rows(df))
+            if self.anomalies is not None:
+                self.anomalies.update(df)
+        return self
+
+    def merge(self, other):
+        """
+        Folds another partition's counts into this one.
+        """
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge reports over different columns")
+        if other.date_formats != self.date_formats:
+            raise ValueError("Cannot merge reports built with different date formats")
+        if (other.anomalies is None) != (self.anomalies is None):
+            raise ValueError("Cannot merge reports with and without anomaly counts")
+
+        self.rows += other.rows
+        for col, count in other.missing.items():
+            self.missing[col] += count
+        for key, count in other.formatting.items():
+            self.formatting[key] += count
+        self.row_hashes.merge(other.row_hashes)
+        if self.anomalies is not None:
+            self.anomalies.merge(other.anomalies)
+        return self
+
+    @property
+    def duplicates(self):
+        return self.rows - len(self.row_hashes)
+
+    def report(self, duplicates=None):
+        """
+        Same shape as DataAnalyzer.analyze() (anomaly fields only when
+        counted). duplicates, when given, replaces the row-hash count.
+        """
+        missing_values = {k: v for k, v in self.missing.items() if v > 0}
+        # A column matching two checks reports its last failing one, as in analyze()
+        formatting_issues = {}
+        for (_, col), count in self.formatting.items():
+            if count > 0:
+                formatting_issues[col] = count
+        inconsistencies = sum(self.formatting.values())
+        if duplicates is None:
+            duplicates = self.duplicates
+
+        report = {
+            "initial_rows": self.rows,
+            "missing_values": missing_values,
+            "duplicates": duplicates,
+            # Outliers are judged against whole-column medians, see detect_anomalies()
+            "anomalies": None,
+            "inconsistencies": inconsistencies,
+            "formatting_issues": formatting_issues,
+            "quality_score": quality_score(
+                total_missing=sum(missing_values.values()),
+                duplicates=duplicates,
+                inconsistencies=inconsistencies,
+                total_cells=self.rows * len(self.columns),
+                total_rows=self.rows
+            )
+        }
+        if self.anomalies is not None:
+            flagged, columns, rules = self.anomalies.result()
+            report.update(anomalies=flagged, anomaly_columns=columns, anomaly_rules=rules)
+        return report
+
+
+# =========================
+# Provisional (sample-based) estimate
+# =========================
+def reservoir_sample(batches, sample_size=2000, time_budget=1.0, seed=None):
+    """
+    Keeps a uniform random sample of rows from an iterable of DataFrame batches.
+
+    Every row gets a random key and the rows with the smallest keys are kept,
+    which is a reservoir sample that can be updated one batch at a time.
+    Each sampled row also carries a duplicate flag: True when an identical
+    row was seen earlier in the stream (the same keep='first' rule as
+    DataFrame.duplicated). Reading stops once time_budget seconds are spent.
+
+    Returns:
+    (sample: DataFrame, duplicate_flags: ndarray, rows_scanned: int, complete_scan: bool)
+    """
+    from backend.preprocessing.deduplication import hash_rows
+
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+
+    sample = None
+    keys = np.empty(0)
+    flags = np.empty(0, dtype=bool)
+    seen = set()
+    rows_scanned = 0
+    complete_scan = True
+
+    for batch in batches:
+        # Same filter as the /process endpoint
+        batch = batch.dropna(how='all')
+        if len(batch) == 0:
+            continue
+
+        hashes = hash_rows(batch)
+        batch_flags = pd.Series(hashes).duplicated(keep='first').to_numpy().copy()
+        if seen:
+            batch_flags |= np.fromiter((h in seen for h in hashes.tolist()), dtype=bool, count=len(hashes))
+        seen.update(hashes.tolist())
+
+        batch_keys = rng.random(len(batch))
+        batch = batch.reset_index(drop=True)
+        if sample is None:
+            sample, keys, flags = batch, batch_keys, batch_flags
+        else:
+            # Only rows that beat the current k-th smallest key can enter
+            if len(keys) >= sample_size:
+                threshold = keys.max()
+                keep = batch_keys < threshold
+                batch, batch_keys, batch_flags = batch[keep], batch_keys[keep], batch_flags[keep]
+            sample = pd.concat([sample, batch], ignore_index=True)
+            keys = np.concatenate([keys, batch_keys])
+            flags = np.concatenate([flags, batch_flags])
+
+        if len(keys) > sample_size:
+            top = np.argpartition(keys, sample_size - 1)[:sample_size]
+            sample = sample.iloc[top].reset_index(drop=True)
+            keys, flags = keys[top], flags[top]
+
+        rows_scanned += len(hashes)
+        if time.perf_counter() - started > time_budget:
+            complete_scan = False
+            break
+
+    if sample is None:
+        sample = pd.DataFrame()
+    return sample, flags, rows_scanned, complete_scan
+
+
+def _mean_interval(values, population, z):
+    """
+    Normal-approximation interval for a sample mean, with finite population correction.
+    """
+    n = len(values)
+    mean = float(values.mean()) if n else 0.0
+    if n < 2 or population <= n:
+        return mean, mean, mean
+    fpc = np.sqrt((population - n) / (population - 1))
+    half_width = z * float(values.std(ddof=1)) / np.sqrt(n) * fpc
+    return mean, mean - half_width, mean + half_width
+
+
+def _rate_summary(mean, lower, upper):
+    return {
+        "estimate": round(float(mean), 2),
+        "lower": round(float(max(0.0, lower)), 2),
+        "upper": round(float(min(100.0, upper)), 2)
+    }
+
+
+def estimate_quality(batches, sample_size=2000, time_budget=1.0, confidence=0.95, seed=None):
+    """
+    Fast, provisional version of DataAnalyzer.analyze().
+
+    Works on a reservoir sample of rows and returns the missing, duplicate and
+    formatting-issue rates (%) plus the quality score, each with a confidence
+    interval. The score is 100 minus the mean of per-row error contributions,
+    so its interval comes straight from the sample variance of those rows.
+    """
+    started = time.perf_counter()
+
+    # Pin date formats on the first batch, as a full-file parse would
+    batches = iter(batches)
+    first_batch = next(batches, None)
+    if first_batch is None:
+        first_batch = pd.DataFrame()
+    date_formats = guess_date_formats(first_batch)
+
+    sample, dup_flags, rows_scanned, complete_scan = reservoir_sample(
+        chain([first_batch], batches), sample_size=sample_size, time_budget=time_budget, seed=seed
+    )
+
+    n = len(sample)
+    n_cols = max(1, sample.shape[1])
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    # Per-row error contributions (fraction of cells / row flag)
+    missing_per_row = sample.isnull().sum(axis=1).to_numpy() / n_cols
+    format_counts = pd.Series(0, index=sample.index)
+    formatting_issues = {}
+    for col, issue_mask in formatting_issue_masks(sample, date_formats):
+        issue_mask = issue_mask.reindex(sample.index, fill_value=False).astype(int)
+        format_counts = format_counts + issue_mask
+        if n and issue_mask.any():
+            formatting_issues[col] = int(round(issue_mask.mean() * rows_scanned))
+    format_per_row = format_counts.to_numpy() / n_cols
+    dup_per_row = dup_flags.astype(float)
+
+    missing = _mean_interval(missing_per_row * 100, rows_scanned, z)
+    duplicate = _mean_interval(dup_per_row * 100, rows_scanned, z)
+    formatting = _mean_interval(format_per_row * 100, rows_scanned, z)
+    error = _mean_interval((missing_per_row + dup_per_row + format_per_row) * 100 / 3, rows_scanned, z)
+
+    return {
+        "provisional": True,
+        "sample_size": n,
+        "rows_scanned": rows_scanned,
+        "complete_scan": complete_scan,
+        "confidence_level": confidence,
+        "quality_score": {
+            "estimate": round(float(max(0, 100 - error[0])), 1),
+            "lower": round(float(max(0, 100 - error[2])), 1),
+            "upper": round(float(min(100, 100 - error[1])), 1)
+        },
+        "missing_rate": _rate_summary(*missing),
+        "duplicate_rate": _rate_summary(*duplicate),
+        "formatting_issue_rate": _rate_summary(*formatting),
+        "formatting_issues": formatting_issues,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
+def iter_frame_batches(df, batch_size=50_000):
+    """
+    Splits an in-memory frame into batches for estimate_quality().
+    """
+    for start in range(0, len(df), batch_size):
+        yield df.iloc[start:start + batch_size]
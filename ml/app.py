@@ -1,27 +1,460 @@
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, request, jsonify
-import pandas as pd
-import numpy as np
+from functools import partial
 import os
+import re
 import sys
+import time
+
+import pandas as pd
 
 # Ensure current directory is in path to allow imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import the new pipeline from the copied backend folder
-from backend.pipeline.data_quality_pipeline import run_data_quality_pipeline
+from backend.pipeline.data_quality_pipeline import revenue_pool_rows, run_data_quality_pipeline, stage_selection
+from backend.preprocessing.compaction import compact_dtypes, with_placeholders
+from backend.preprocessing.anomalies import add_anomaly_columns
+from backend.preprocessing.deduplication import ExternalDuplicateFinder
+
+from backend.io.json_response import json_response
+from backend.io.partitioned_writer import PartitionedWriter, check_format as check_split_format
+from backend.io.pipelined import run_pipelined
+from backend.io.readers import (
+    DEFAULT_BATCH_SIZE,
+    SUPPORTED_EXTENSIONS,
+    column_kinds,
+    csv_dtypes,
+    iter_csv_batches,
+    iter_file_batches,
+    process_workbook_sheets,
+    read_file
+)
 
 # Import the analyzer for reporting
-from analyzer import DataAnalyzer
+from analyzer import DataAnalyzer, QualityReportAccumulator, estimate_quality, guess_date_formats
+
+from backend.admission import MB, AdmissionRejected, get_admission_controller, plan_job
+from backend.pipeline.changelog import ChangeLog, DEFAULT_PAGE_SIZE, browse_changes, change_log_path, load_change_log
+from backend.pipeline.checkpoint import open_checkpoint
+from backend.pipeline.cost_model import get_cost_model
+from backend.pipeline.dag import PipelinePlan
+from backend.preload import is_ready, preload, preload_timings
+from backend.reporting.accounts import AccountRollup, accounts_path_for
+from backend.reporting.qa_report import (
+    build_qa_summary,
+    combine_qa_summaries,
+    get_rollup_store,
+    issue_histograms,
+    merge_histograms
+)
+
+# Duplicate rows returned in the preview of a chunked job
+CHUNKED_DUPLICATE_PREVIEW = 100
+
+# Known revenues pooled across one /process_batch request (sampled above this)
+BATCH_POOL_MAX_ROWS = 200_000
 
 app = Flask(__name__)
 
+@app.route('/healthz', methods=['GET'])
+def health():
+    """
+    Liveness: the process is up and serving requests.
+    """
+    return jsonify({"status": "ok", "pid": os.getpid()})
+
+@app.route('/readyz', methods=['GET'])
+def ready():
+    """
+    Readiness: heavy modules and reference tables are loaded.
+    """
+    if not is_ready():
+        return jsonify({"status": "loading"}), 503
+    return jsonify({"status": "ready", "preloaded": preload_timings()})
+
+def clean_frame(df, processed_path, job_id=None, split_format=None, deadline=None, revenue_pool=None,
+                account_rollup=False, include=None, outputs=None):
+    """
+    Analyze + clean one dataset and write the cleaned CSV.
+    Returns the response body (previews as DataFrames).
+
+    With a job_id, finished pipeline stages are checkpointed, and a retry
+    with the same id resumes after the last one (backend/pipeline/checkpoint.py).
+    With a split_format ('csv' or 'parquet'), the cleaned rows are also split
+    into valid / review-by-issue / duplicate files (backend/io/partitioned_writer.py).
+    With a deadline (time.perf_counter() value), the pipeline gets what is left
+    of it after analysis and the predicted CSV write, and the cost model
+    degrades expensive stages to fit (backend/pipeline/cost_model.py).
+    revenue_pool: known revenues of the other files in a batch, see /process_batch.
+    With account_rollup, one row per company is also written to
+    clean_<name>.accounts.csv (backend/reporting/accounts.py).
+    include / outputs select pipeline stages as in run_data_quality_pipeline().
+    """
+    # FILTERING: Drop rows that are completely empty
+    initial_count = len(df)
+    df.dropna(how='all', inplace=True)
+    print(f"Dropped {initial_count - len(df)} empty rows.")
+
+    # 2. Analyze (Generate Report on Raw Data)
+    analyzer = DataAnalyzer(df)
+    report = analyzer.analyze()
+    print("Report generated:", report)
+
+    # Generate Original Preview (first 10 rows)
+    # Previews stay DataFrames; json_response() writes them straight to JSON
+    preview_original = df.head(10)
+
+    # CAPTURE DUPLICATES
+    # Identify duplicates (keep='first' marks 2nd occurrence onwards as True)
+    duplicates_mask = analyzer.duplicate_mask
+    duplicates_df = df[duplicates_mask]
+    preview_duplicates = duplicates_df
+
+    # 3. Clean (Run Infynd Pipeline)
+    latency_budget = None
+    if deadline is not None:
+        write_seconds = get_cost_model().predict_write(len(df), len(df.columns))
+        latency_budget = max(0.0, deadline - time.perf_counter() - write_seconds)
+    checkpoint = open_checkpoint(job_id)
+    change_log = ChangeLog()
+    cleaned_df, plan = run_data_quality_pipeline(
+        df.reset_index(drop=True), return_plan=True, checkpoint=checkpoint, change_log=change_log,
+        latency_budget=latency_budget, revenue_pool=revenue_pool, include=include, outputs=outputs
+    )
+    if plan.degraded:
+        print(f"Latency budget {latency_budget:.2f}s: degraded {plan.degraded}")
+    if plan.resumed:
+        print(f"Resumed {len(plan.resumed)} stages from checkpoint {job_id}")
+    # Per-row anomaly flag and reasons from the analysis of the raw rows
+    cleaned_df = add_anomaly_columns(cleaned_df, analyzer.anomaly_flags, analyzer.anomaly_reasons)
+
+    # Categoricals / nullable numerics before preview and write
+    cleaned_df, compaction = compact_dtypes(cleaned_df)
+    print("Compaction:", compaction)
+    # Placeholder labels ('Unknown' ages) are written back only in the outputs
+    output_df = with_placeholders(cleaned_df, compaction["placeholders"])
+
+    # Generate Cleaned Preview (first 10 rows)
+    preview_cleaned = output_df.head(10)
+
+    # 4. Save Cleaned File
+    output_df.to_csv(processed_path, index=False)
+    if checkpoint is not None:
+        checkpoint.clear()
+
+    # Changed cells, browsable through POST /changes
+    change_summary = save_change_log(change_log, processed_path)
+
+    outputs = None
+    if split_format:
+        with PartitionedWriter(split_dir_for(processed_path), split_format) as writer:
+            writer.write_batch(output_df, duplicates_mask)
+        outputs = writer.manifest
+
+    accounts = None
+    if account_rollup:
+        rollup = AccountRollup()
+        rollup.update(cleaned_df)
+        accounts = save_accounts(rollup, processed_path)
+
+    # Compact per-dataset QA summary (issue histograms, stage timings, row counts)
+    qa_summary = build_qa_summary(report, cleaned_df, initial_count, plan)
+
+    return {
+        "message": "Processing complete",
+        "report": report,
+        "cleaned_path": processed_path,
+        "preview_original": preview_original,
+        "preview_cleaned": preview_cleaned,
+        "preview_duplicates": preview_duplicates,
+        "compaction": compaction,
+        "changes": change_summary,
+        "outputs": outputs,
+        "accounts": accounts,
+        "latency": None if deadline is None else {
+            "pipeline_budget_seconds": round(latency_budget, 3),
+            "predicted_seconds": round(sum(plan.predicted.values()), 3),
+            "pipeline_seconds": round(sum(plan.timings.values()), 3),
+            "degraded": plan.degraded,
+        },
+        "qa_summary": qa_summary
+    }
+
+
+class ChunkedCleaner:
+    """
+    Per-batch cleaning of a chunked job, with the state kept across batches:
+    the report accumulator (date formats pinned from the first batch), stage
+    timings, issue histograms, previews from the first batch, whole-file
+    duplicate hashes and the change log. Pass clean() as the transform of
+    run_pipelined(); it must see the batches in file order. With an
+    AccountRollup, cleaned batches are also folded into the account table.
+    """
+
+    def __init__(self, duplicates=None, change_log=None, accounts=None, include=None, outputs=None):
+        self.accumulator = None
+        self.totals = PipelinePlan()
+        self.issues = {}
+        self.rows_uploaded = self.rows_cleaned = 0
+        self.preview_original = self.preview_cleaned = None
+        self.duplicates = duplicates
+        self.batch_sizes = []
+        self.change_log = change_log
+        self.accounts = accounts
+        # Stage selection, as in run_data_quality_pipeline()
+        self.include = include
+        self.outputs = outputs
+        # Column types of the cleaned batches, to read the cleaned CSV back alike
+        self.kinds = {}
+        # Dtypes picked by compaction on the first batch, reused for the rest
+        self.compaction_plan = None
+
+    def clean(self, batch):
+        self.rows_uploaded += len(batch)
+        batch = batch.dropna(how='all')
+        if self.accumulator is None:
+            # Date formats are pinned from the first batch for every later one
+            self.accumulator = QualityReportAccumulator(batch.columns, guess_date_formats(batch), anomalies=True)
+        self.accumulator.update(batch)
+        # Flags against the statistics of the batches so far; the report rescores the whole file
+        is_anomaly, reasons = self.accumulator.anomalies.latest()
+
+        if self.preview_original is None:
+            self.preview_original = batch.head(10)
+        if self.duplicates is not None:
+            self.duplicates.add_frame(batch)
+        self.batch_sizes.append(len(batch))
+
+        if self.change_log is not None:
+            # Change log rows are positions in the whole cleaned file
+            self.change_log.row_offset = self.rows_cleaned
+        cleaned, plan = run_data_quality_pipeline(batch.reset_index(drop=True), return_plan=True,
+                                                  change_log=self.change_log, include=self.include,
+                                                  outputs=self.outputs)
+        if len(cleaned):
+            cleaned = add_anomaly_columns(cleaned, is_anomaly, reasons)
+        cleaned, compaction = compact_dtypes(cleaned, plan=self.compaction_plan)
+        self.compaction_plan = compaction["plan"]
+        # Batches go out as written, with their placeholder labels
+        cleaned = with_placeholders(cleaned, compaction["placeholders"])
+        if self.preview_cleaned is None:
+            self.preview_cleaned = cleaned.head(10)
+            # Stage counters of the first batch
+            self.totals.stats = plan.stats
+        for name, seconds in plan.timings.items():
+            self.totals.timings[name] = self.totals.timings.get(name, 0.0) + seconds
+
+        self.rows_cleaned += len(cleaned)
+        column_kinds(self.kinds, cleaned)
+        merge_histograms(self.issues, issue_histograms(cleaned))
+        if self.accounts is not None:
+            self.accounts.update(cleaned)
+        return cleaned
+
+    def report(self):
+        """
+        Raises ValueError when no batch had rows.
+        """
+        if self.accumulator is None:
+            raise ValueError("File has no rows")
+        # The finder's count is exact (hash matches are compared as rows)
+        return self.accumulator.report(self.duplicates.duplicates if self.duplicates is not None else None)
+
+    def qa_summary(self, report):
+        return build_qa_summary(report, None, self.rows_uploaded, self.totals,
+                                issues_by_column=self.issues, rows_cleaned=self.rows_cleaned)
+
+
+def clean_file_chunked(filepath, processed_path, sheet_name=None, batch_size=DEFAULT_BATCH_SIZE, split_format=None,
+                       account_rollup=False, include=None, outputs=None):
+    """
+    Low-memory version of clean_frame for uploads too large to hold at once:
+    the file is read, analyzed, cleaned and written one batch at a time.
+
+    - The report comes from QualityReportAccumulator (same counts and score;
+      anomalies are scored in a second pass over compact spilled batches,
+      with medians from bounded samples per peer group).
+    - Revenue medians and other column statistics are per batch.
+    - Previews come from the first batch. Duplicates are found across the
+      whole file (ExternalDuplicateFinder spills row hashes to disk), and the
+      first CHUNKED_DUPLICATE_PREVIEW of them are read back for the preview.
+    - Split outputs are routed once the duplicates are known, streaming the
+      cleaned CSV back in batches.
+    - Reading, cleaning and writing overlap (backend/io/pipelined.py);
+      "pipelining" in the response says how much time that hid.
+    """
+    cleaner = ChunkedCleaner(ExternalDuplicateFinder(), ChangeLog(), AccountRollup() if account_rollup else None,
+                             include=include, outputs=outputs)
+    header = True
+
+    def write(cleaned):
+        nonlocal header
+        cleaned.to_csv(processed_path, mode='w' if header else 'a', header=header, index=False)
+        header = False
+
+    # Batch k+1 is parsed and batch k-1 written while batch k is cleaned
+    pipelining = run_pipelined(
+        iter_file_batches(filepath, sheet_name=sheet_name, batch_size=batch_size), cleaner.clean, write
+    )
+    print("Pipelining:", pipelining)
+
+    report = cleaner.report()
+    print("Report generated (chunked):", report)
+    outputs = None
+    duplicates = cleaner.duplicates
+    with duplicates:
+        preview_duplicates = duplicate_preview(filepath, sheet_name, batch_size, duplicates, cleaner.batch_sizes)
+        if split_format:
+            with PartitionedWriter(split_dir_for(processed_path), split_format) as writer:
+                start = 0
+                # Types fixed from the cleaned batches, not guessed per chunk
+                for batch in iter_csv_batches(processed_path, batch_size, csv_dtypes(cleaner.kinds)):
+                    writer.write_batch(batch, duplicates.mask_range(start, len(batch)))
+                    start += len(batch)
+            outputs = writer.manifest
+
+    return {
+        "message": "Processing complete",
+        "mode": "chunked",
+        "report": report,
+        "cleaned_path": processed_path,
+        "preview_original": cleaner.preview_original,
+        "preview_cleaned": cleaner.preview_cleaned,
+        "preview_duplicates": preview_duplicates,
+        "changes": save_change_log(cleaner.change_log, processed_path),
+        "outputs": outputs,
+        "accounts": save_accounts(cleaner.accounts, processed_path) if account_rollup else None,
+        "pipelining": pipelining,
+        "qa_summary": cleaner.qa_summary(report)
+    }
+
+
+def duplicate_preview(filepath, sheet_name, batch_size, duplicates, batch_sizes):
+    """
+    The first CHUNKED_DUPLICATE_PREVIEW duplicate rows of a chunked job,
+    re-reading the file only up to the batch that holds the last of them.
+    """
+    wanted = duplicates.duplicate_rows()[:CHUNKED_DUPLICATE_PREVIEW]
+    if len(wanted) == 0:
+        return pd.DataFrame()
+    previews = []
+    masks = duplicates.iter_masks(batch_sizes)
+    start = 0
+    for batch in iter_file_batches(filepath, sheet_name=sheet_name, batch_size=batch_size):
+        batch = batch.dropna(how='all')
+        previews.append(batch[next(masks)])
+        start += len(batch)
+        if start > wanted[-1]:
+            break
+    return pd.concat(previews).head(CHUNKED_DUPLICATE_PREVIEW)
+
+
+def save_change_log(change_log, processed_path):
+    """
+    Writes the change log next to the cleaned CSV.
+    Returns { "path", "total", "by_column" } for the response.
+    """
+    path = change_log.save(change_log_path(processed_path))
+    return {"path": path, "total": len(change_log), "by_column": change_log.counts()}
+
+
+def save_accounts(rollup, processed_path):
+    """
+    Writes the account table next to the cleaned CSV.
+    Returns { "path", "accounts", "contacts", "unassigned_contacts", "preview" } for the response.
+    """
+    table = rollup.result()
+    path = accounts_path_for(processed_path)
+    table.to_csv(path, index=False)
+    return {
+        "path": path,
+        "accounts": len(table),
+        "contacts": rollup.rows - rollup.unassigned,
+        "unassigned_contacts": rollup.unassigned,
+        "preview": table.head(10)
+    }
+
+
+def record_rollup(data, dataset_id, result):
+    """
+    Adds a processed dataset to the user's dashboard rollup when the caller
+    identified it. A rollup failure never fails the processing request.
+    """
+    if not data.get('user_id') or not dataset_id:
+        return
+    try:
+        get_rollup_store().record(
+            str(data['user_id']), str(dataset_id), result['qa_summary'], data.get('uploaded_at')
+        )
+    except Exception as e:
+        print(f"Error updating QA rollup: {e}")
+
+
+def split_dir_for(processed_path):
+    """
+    Directory of the split outputs: clean_<name>_split/ next to the cleaned CSV.
+    """
+    return os.path.splitext(processed_path)[0] + "_split"
+
+
+def cleaned_path_for(filepath, suffix=None):
+    directory, filename = os.path.split(filepath)
+    # Strip original extension and force .csv
+    base_name = os.path.splitext(filename)[0]
+    if suffix:
+        base_name = f"{base_name}_{re.sub(r'[^A-Za-z0-9_-]+', '_', suffix)}"
+    return os.path.join(directory, f"clean_{base_name}.csv")
+
+
+def process_sheet(filepath, sheet_name, chunked_sheets=(), job_id=None, split_format=None, deadline=None,
+                  account_rollup=False, include=None, outputs=None):
+    """
+    Worker for all-sheets mode: each sheet is its own dataset.
+    """
+    processed_path = cleaned_path_for(filepath, sheet_name)
+    if sheet_name in chunked_sheets:
+        return clean_file_chunked(filepath, processed_path, sheet_name, split_format=split_format,
+                                  account_rollup=account_rollup, include=include, outputs=outputs)
+    df = read_file(filepath, sheet_name=sheet_name)
+    return clean_frame(df, processed_path, f"{job_id}:{sheet_name}" if job_id else None, split_format, deadline,
+                       account_rollup=account_rollup, include=include, outputs=outputs)
+
+
+def rejected_response(error):
+    """
+    503 with a Retry-After hint when admission control has no memory free.
+    """
+    response = jsonify({"error": str(error), "retry_after": error.retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
 @app.route('/process', methods=['POST'])
 def process_file():
     """
     Microservice Endpoint:
     Expects JSON: { "filepath": "/absolute/path/to/uploaded/file.csv" }
-    Returns JSON: { "report": {...}, "cleaned_path": "/path/to/clean_file.csv" }
+    Optional for .xlsx: "sheet_name": "...", or "all_sheets": true to clean every sheet
+    Optional "user_id", "dataset_id" (and "uploaded_at") add the result to the
+    user's dashboard rollup, see GET /rollup/<user_id>
+    Optional "job_id" checkpoints pipeline stages; a retry with the same id resumes
+    Optional "split_outputs": "csv" | "parquet" also writes valid / review_<ISSUE> /
+    duplicates files; "outputs" in the response is their manifest (paths, row counts)
+    Optional "latency_budget": seconds for the whole request; expensive stages run
+    approximate or are skipped to fit, listed in "latency" / qa_summary.degraded_stages
+    (in-memory jobs only: chunked jobs always run the full plan)
+    Optional "account_rollup": true also writes clean_<name>.accounts.csv, one row per
+    company (domain or normalized company name) with contact counts, best contact,
+    revenue consensus and role mix; "accounts" in the response has its path, counts and preview
+    Optional "include": opt-in stages to add (e.g. ["map_role_function", "infer_country",
+    "spelling_corrections", "normalize_location_type", "lead_confidence"]); "outputs":
+    only compute these columns and the stages they need (e.g. ["email_status", "phone_status"])
+    Returns JSON: { "report": {...}, "cleaned_path": "/path/to/clean_file.csv", "qa_summary": {...} }
+    In all-sheets mode: { "sheets": { "<sheet>": { "report": ..., ... } } }
     """
+    started = time.perf_counter()
     data = request.get_json()
     if not data or 'filepath' not in data:
         return jsonify({"error": "No filepath provided"}), 400
@@ -31,64 +464,293 @@ def process_file():
     if not os.path.exists(filepath):
         return jsonify({"error": "File not found at path"}), 404
 
+    if not filepath.endswith(SUPPORTED_EXTENSIONS):
+        return jsonify({"error": "Unsupported file format"}), 400
+
     try:
-        # 1. Load Data
-        if filepath.endswith('.csv'):
-            df = pd.read_csv(filepath)
-        elif filepath.endswith('.xlsx'):
-            df = pd.read_excel(filepath)
-        else:
-            return jsonify({"error": "Unsupported file format"}), 400
+        # Admission control: reserve the job's estimated peak memory, and run
+        # large uploads chunked instead of refusing them
+        all_sheets = filepath.endswith('.xlsx') and bool(data.get('all_sheets'))
+        split_format = data.get('split_outputs')
+        if split_format:
+            try:
+                check_split_format(split_format)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+        account_rollup = bool(data.get('account_rollup'))
+        try:
+            include, outputs = stage_selection(data.get('include'), data.get('outputs'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        deadline = None
+        if data.get('latency_budget') is not None:
+            try:
+                deadline = started + float(data['latency_budget'])
+            except (TypeError, ValueError):
+                return jsonify({"error": "latency_budget must be a number of seconds"}), 400
+        controller = get_admission_controller()
+        job = plan_job(filepath, data.get('sheet_name'), all_sheets, budget=controller.budget)
+        print(f"Admission: {job['mode']} mode, ~{job['estimate'] >> 20} MB in memory, reserving {job['reserve'] >> 20} MB")
+
+        with controller.admit(job['reserve']):
+            if all_sheets:
+                chunked_sheets = tuple(s for s, mode in job['sheets'].items() if mode == 'chunked')
+                sheets = process_workbook_sheets(
+                    filepath, partial(process_sheet, chunked_sheets=chunked_sheets, job_id=data.get('job_id'),
+                            split_format=split_format, deadline=deadline, account_rollup=account_rollup,
+                            include=include, outputs=outputs),
+                    max_workers=1 if job['mode'] == 'sequential' else data.get('max_workers')
+                )
+                for sheet_name, result in sheets.items():
+                    if 'qa_summary' in result:
+                        record_rollup(data, f"{data.get('dataset_id')}:{sheet_name}" if data.get('dataset_id') else None, result)
+                return json_response(
+                    {"message": "Processing complete", "sheets": sheets},
+                    accept_encoding=request.headers.get('Accept-Encoding')
+                )
+
+            if job['mode'] == 'chunked':
+                result = clean_file_chunked(filepath, cleaned_path_for(filepath), data.get('sheet_name'),
+                                            split_format=split_format, account_rollup=account_rollup,
+                                            include=include, outputs=outputs)
+            else:
+                # 1. Load Data (streamed in batches for both CSV and XLSX)
+                df = read_file(filepath, sheet_name=data.get('sheet_name'))
+                result = clean_frame(df, cleaned_path_for(filepath), data.get('job_id'), split_format, deadline,
+                                     account_rollup=account_rollup, include=include, outputs=outputs)
+            result["admission"] = {"mode": job['mode'], "estimate_mb": round(job['estimate'] / MB, 1)}
+            record_rollup(data, data.get('dataset_id'), result)
+
+        # 5. Return Response
+        return json_response(result, accept_encoding=request.headers.get('Accept-Encoding'))
+
+    except AdmissionRejected as e:
+        print(f"Rejected job: {e}")
+        return rejected_response(e)
+    except Exception as e:
+        print(f"Error processing file: {e}")
+        return jsonify({"error": str(e)}), 500
 
+def build_batch_revenue_pool(filepaths, jobs):
+    """
+    Known revenues of every in-memory file of a batch, for pooled imputation.
+    Files are read here once more rather than all held until cleaning.
+    """
+    parts = [
+        revenue_pool_rows(read_file(path).dropna(how='all'))
+        for path in filepaths if jobs[path]['mode'] == 'memory'
+    ]
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        return None
+    pool = pd.concat(parts, ignore_index=True)
+    if len(pool) > BATCH_POOL_MAX_ROWS:
+        pool = pool.sample(BATCH_POOL_MAX_ROWS, random_state=0).reset_index(drop=True)
+    return pool
 
 
-        # FILTERING: Drop rows that are completely empty
-        initial_count = len(df)
-        df.dropna(how='all', inplace=True)
-        print(f"Dropped {initial_count - len(df)} empty rows.")
+def process_batch_file(filepath, job, revenue_pool=None, split_format=None, include=None, outputs=None):
+    """
+    Worker for /process_batch: one file, timed.
+    """
+    started = time.perf_counter()
+    if job['mode'] == 'chunked':
+        result = clean_file_chunked(filepath, cleaned_path_for(filepath), split_format=split_format,
+                                    include=include, outputs=outputs)
+    else:
+        result = clean_frame(read_file(filepath), cleaned_path_for(filepath), split_format=split_format,
+                             revenue_pool=revenue_pool, include=include, outputs=outputs)
+    result["admission"] = {"mode": job['mode'], "estimate_mb": round(job['estimate'] / MB, 1)}
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+@app.route('/process_batch', methods=['POST'])
+def process_batch():
+    """
+    Cleans several related uploads in one request.
+    Expects JSON: { "filepaths": ["/path/a.csv", ...] }
+    Optional "pool_imputation": true fits revenue imputation on the known
+    revenues of all files together; "max_workers" (default 2) threads;
+    "split_outputs", "include" and "outputs" as in /process; "user_id" with
+    "dataset_ids" (same order as filepaths) adds each file to the user's rollup.
+    Files run on a thread pool in this worker, so reference indexes, the
+    role classifier and per-value caches warmed by one file serve the rest.
+    Returns JSON: { "files": { "<path>": { /process result } or { "error": ... } },
+                    "combined": {...}, "throughput": {...} }
+    """
+    started = time.perf_counter()
+    data = request.get_json()
+    filepaths = (data or {}).get('filepaths')
+    if not filepaths or not isinstance(filepaths, list):
+        return jsonify({"error": "No filepaths provided"}), 400
+    filepaths = list(dict.fromkeys(filepaths))
 
-        # 2. Analyze (Generate Report on Raw Data)
-        analyzer = DataAnalyzer(df)
-        report = analyzer.analyze()
-        print("Report generated:", report)
+    missing = [path for path in filepaths if not os.path.exists(path)]
+    if missing:
+        return jsonify({"error": "Files not found", "missing": missing}), 404
+    unsupported = [path for path in filepaths if not path.endswith(SUPPORTED_EXTENSIONS)]
+    if unsupported:
+        return jsonify({"error": "Unsupported file format", "unsupported": unsupported}), 400
+    split_format = data.get('split_outputs')
+    if split_format:
+        try:
+            check_split_format(split_format)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    try:
+        include, outputs = stage_selection(data.get('include'), data.get('outputs'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    dataset_ids = data.get('dataset_ids') or []
 
-        # Generate Original Preview (first 10 rows)
-        preview_original = df.head(10).replace({np.nan: None}).to_dict(orient='records')
+    try:
+        controller = get_admission_controller()
+        jobs = {path: plan_job(path, budget=controller.budget) for path in filepaths}
 
-        # CAPTURE DUPLICATES
-        # Identify duplicates (keep='first' marks 2nd occurrence onwards as True)
-        duplicates_mask = df.duplicated(keep='first')
-        duplicates_df = df[duplicates_mask]
-        preview_duplicates = duplicates_df.replace({np.nan: None}).to_dict(orient='records')
+        # As many workers as the largest concurrent reservations allow
+        reserves = sorted((job['reserve'] for job in jobs.values()), reverse=True)
+        workers = max(1, min(int(data.get('max_workers') or 2), len(filepaths)))
+        while workers > 1 and sum(reserves[:workers]) > controller.budget:
+            workers -= 1
+        print(f"Batch: {len(filepaths)} files on {workers} workers, reserving {sum(reserves[:workers]) >> 20} MB")
 
-        # 3. Clean (Run Infynd Pipeline)
-        cleaned_df = run_data_quality_pipeline(df)
-        
-        # Generate Cleaned Preview (first 10 rows)
-        preview_cleaned = cleaned_df.head(10).replace({np.nan: None}).to_dict(orient='records')
+        with controller.admit(sum(reserves[:workers])):
+            pool = build_batch_revenue_pool(filepaths, jobs) if data.get('pool_imputation') else None
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    path: executor.submit(process_batch_file, path, jobs[path], pool, split_format, include, outputs)
+                    for path in filepaths
+                }
+                files = {}
+                for path, future in futures.items():
+                    try:
+                        files[path] = future.result()
+                    except Exception as e:
+                        print(f"Error processing {path}: {e}")
+                        files[path] = {"error": str(e)}
 
-        # 4. Save Cleaned File
-        directory, filename = os.path.split(filepath)
-        # Strip original extension and force .csv
-        base_name = os.path.splitext(filename)[0]
-        processed_filename = f"clean_{base_name}.csv"
-        processed_path = os.path.join(directory, processed_filename)
-        
-        cleaned_df.to_csv(processed_path, index=False)
+        done = [result for result in files.values() if 'qa_summary' in result]
+        for path, dataset_id in zip(filepaths, dataset_ids):
+            if 'qa_summary' in files[path]:
+                record_rollup(data, dataset_id, files[path])
 
-        # 5. Return Response
-        return jsonify({
+        seconds = time.perf_counter() - started
+        rows = sum(result['qa_summary']['rows']['uploaded'] for result in done)
+        return json_response({
             "message": "Processing complete",
-            "report": report,
-            "cleaned_path": processed_path,
-            "preview_original": preview_original,
-            "preview_cleaned": preview_cleaned,
-            "preview_duplicates": preview_duplicates
-        })
+            "files": files,
+            "combined": combine_qa_summaries([result['qa_summary'] for result in done]),
+            "revenue_pool_rows": 0 if pool is None else len(pool),
+            "throughput": {
+                "files": len(done),
+                "failed": len(files) - len(done),
+                "workers": workers,
+                "rows": rows,
+                "seconds": round(seconds, 3),
+                "seconds_per_file": round(seconds / len(files), 3),
+                "rows_per_second": round(rows / seconds, 1),
+            },
+        }, accept_encoding=request.headers.get('Accept-Encoding'))
 
+    except AdmissionRejected as e:
+        print(f"Rejected batch: {e}")
+        return rejected_response(e)
     except Exception as e:
-        print(f"Error processing file: {e}")
+        print(f"Error processing batch: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/estimate', methods=['POST'])
+def estimate_file():
+    """
+    Fast provisional quality score from a row sample.
+    Expects JSON: { "filepath": "...", "sample_size": 2000, "time_budget": 1.0 }
+    Returns the estimated rates and score with confidence intervals.
+    The exact report still comes from /process.
+    """
+    data = request.get_json()
+    if not data or 'filepath' not in data:
+        return jsonify({"error": "No filepath provided"}), 400
+
+    filepath = data['filepath']
+
+    if not os.path.exists(filepath):
+        return jsonify({"error": "File not found at path"}), 404
+
+    try:
+        if not filepath.endswith(SUPPORTED_EXTENSIONS):
+            return jsonify({"error": "Unsupported file format"}), 400
+
+        batches = iter_file_batches(filepath, sheet_name=data.get('sheet_name'))
+        estimate = estimate_quality(
+            batches,
+            sample_size=int(data.get('sample_size', 2000)),
+            time_budget=float(data.get('time_budget', 1.0)),
+            confidence=float(data.get('confidence', 0.95))
+        )
+        return json_response(estimate)
+
+    except Exception as e:
+        print(f"Error estimating file: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/changes', methods=['POST'])
+def browse_change_log():
+    """
+    Pages through the cells the pipeline changed in one cleaned file.
+    Expects JSON: { "cleaned_path": "...", "column": ..., "reason": ..., "row": ...,
+                    "offset": 0, "limit": 100 } (filters optional)
+    Returns { "total", "offset", "limit", "counts": {column: n}, "changes": [{row, column, old, new, reason}] }
+    """
+    data = request.get_json()
+    if not data or 'cleaned_path' not in data:
+        return jsonify({"error": "No cleaned_path provided"}), 400
+
+    try:
+        log = load_change_log(data['cleaned_path'])
+        if log is None:
+            return jsonify({"error": "No change log for this file"}), 404
+
+        page = browse_changes(
+            log,
+            column=data.get('column'),
+            reason=data.get('reason'),
+            row=data.get('row'),
+            offset=data.get('offset', 0),
+            limit=data.get('limit', DEFAULT_PAGE_SIZE)
+        )
+        return json_response(page, accept_encoding=request.headers.get('Accept-Encoding'))
+
+    except Exception as e:
+        print(f"Error reading change log: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/rollup/<user_id>', methods=['GET'])
+def user_rollup(user_id):
+    """
+    Precomputed dashboard aggregates for one user (constant-time read).
+    Optional query: ?days=7 for the trend length.
+    """
+    try:
+        days = int(request.args.get('days', 7))
+        return jsonify(get_rollup_store().rollup(user_id, days=days))
+    except Exception as e:
+        print(f"Error reading QA rollup: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/rollup/datasets/<dataset_id>', methods=['DELETE'])
+def remove_from_rollup(dataset_id):
+    """
+    Takes a deleted dataset out of its user's rollup.
+    """
+    try:
+        removed = get_rollup_store().remove(dataset_id)
+        return jsonify({"removed": removed})
+    except Exception as e:
+        print(f"Error updating QA rollup: {e}")
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
+    # Development server; production uses gunicorn -c gunicorn.conf.py
+    preload()
     app.run(debug=True, port=5000)
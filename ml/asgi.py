@@ -0,0 +1,278 @@
+"""
+ASGI entry point for streaming ingestion, so the ML service can run on a
+node that does not share Node's uploads/ volume.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+
+POST /stream/process takes the CSV itself as the request body and answers
+with the cleaned CSV as a chunked response. The body is parsed in batches
+as it arrives and every cleaned batch is sent as soon as it is written, so
+neither the upload nor the cleaned file is ever stored on this node:
+
+    request body -> ChunkQueue -> pd.read_csv(chunksize) -> ChunkedCleaner
+                 -> CSV text -> ChunkQueue -> response body
+
+Reading, cleaning and serializing overlap as in chunked /process jobs
+(backend/io/pipelined.py), and the bounded queues give backpressure both
+ways: a slow client holds cleaning back, which stops reading the body.
+The X-Job-Id response header names the job; its report and QA summary are
+at GET /stream/reports/<job_id> once the body has been sent.
+
+Streamed jobs are always chunked (column statistics are per batch, and
+anomaly medians come from bounded samples). There is no change log or split output,
+which would have to be stored here, and no duplicate preview, which would
+need a second pass over the upload; the duplicate count is in the result.
+.xlsx uploads are refused (415), by content type or by the zip signature
+at the start of the body: the zip directory is at the end of the file.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app import ChunkedCleaner, record_rollup
+from backend.pipeline.data_quality_pipeline import stage_selection
+from backend.admission import AdmissionRejected, chunked_job_bytes, csv_head_shape, get_admission_controller
+from backend.io.pipelined import run_pipelined
+from backend.io.readers import DEFAULT_BATCH_SIZE
+from backend.io.streaming import (
+    OUTBOUND_CHUNKS,
+    ChunkQueue,
+    StreamClosed,
+    iter_stream_batches,
+    load_stream_result,
+    purge_stream_results,
+    save_stream_result
+)
+from backend.preload import is_ready, preload
+from backend.preprocessing.deduplication import ExternalDuplicateFinder
+
+# Body read before admission, to size the job from the header and first lines
+HEAD_BYTES = 64 * 1024
+
+XLSX_TYPES = ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "application/zip")
+# Local file header signature every .xlsx (a zip archive) starts with
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Not at import like wsgi.py: uvicorn workers do not fork from a preloaded master
+    timings = await run_in_threadpool(preload)
+    print(f"Preloaded: {timings}")
+    yield
+
+
+app = FastAPI(title="Quality Guardian ML (streaming)", lifespan=lifespan)
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that leaves receive() alone. Below ASGI 2.4 (uvicorn
+    sends 2.3) StreamingResponse listens for the disconnect on receive(),
+    which would swallow the request body still being read; here the body
+    feeder watches for the disconnect instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@app.get('/healthz')
+async def health():
+    return {"status": "ok"}
+
+
+@app.get('/readyz')
+async def ready():
+    if not is_ready():
+        return JSONResponse({"status": "loading"}, status_code=503)
+    return {"status": "ready"}
+
+
+def require_rows(batches):
+    """
+    Passes the batches through; a CSV with a header and no data rows parses
+    to one empty batch, which fails the job (400) before anything is sent.
+    """
+    batches = iter(batches)
+    first = next(batches, None)
+    if first is None or first.empty:
+        raise ValueError("File has no rows")
+    yield first
+    yield from batches
+
+
+def run_stream_job(job_id, inbound, outbound, batch_size, admission, params):
+    """
+    Runs in its own thread: cleans the CSV arriving on `inbound` and puts
+    the cleaned CSV on `outbound`. The result is saved (and added to the
+    rollup when params identify the dataset) before the end of the output
+    is signalled, so it is there once the client has the body.
+    """
+    started = time.perf_counter()
+    include, outputs = stage_selection(params.get('include'), params.get('outputs'))
+    cleaner = ChunkedCleaner(ExternalDuplicateFinder(), include=include, outputs=outputs)
+    header = True
+
+    def write(cleaned):
+        nonlocal header
+        outbound.put(cleaned.to_csv(index=False, header=header).encode('utf-8'))
+        header = False
+
+    try:
+        with admission, cleaner.duplicates:
+            pipelining = run_pipelined(require_rows(iter_stream_batches(inbound, batch_size)), cleaner.clean, write)
+            report = cleaner.report()
+            duplicates = cleaner.duplicates.duplicates
+        result = {
+            "status": "complete",
+            "mode": "stream",
+            "report": report,
+            "preview_original": cleaner.preview_original,
+            "preview_cleaned": cleaner.preview_cleaned,
+            "duplicates": duplicates,
+            "pipelining": pipelining,
+            "seconds": round(time.perf_counter() - started, 3),
+            "qa_summary": cleaner.qa_summary(report)
+        }
+        save_stream_result(job_id, result)
+        record_rollup(params, params.get('dataset_id'), result)
+        outbound.close()
+    except Exception as e:
+        print(f"Stream job {job_id} failed: {e}")
+        save_stream_result(job_id, {"status": "failed", "error": str(e)})
+        inbound.abort(e)
+        outbound.abort(e)
+
+
+async def feed_body(request, body, inbound, outbound):
+    """
+    Copies the rest of the request body onto `inbound`, then waits for the
+    client to go away (or the response to end) and aborts the job if the
+    output was not finished.
+    """
+    try:
+        async for chunk in body:
+            if chunk:
+                await run_in_threadpool(inbound.put, chunk)
+        await run_in_threadpool(inbound.close)
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+        outbound.abort(ConnectionError("Client disconnected"))
+    except StreamClosed:
+        # The job failed and stopped reading
+        pass
+    except Exception as e:
+        error = ConnectionError(f"Upload interrupted: {e}")
+        inbound.abort(error)
+        outbound.abort(error)
+
+
+async def drain(first, outbound, feeder):
+    """
+    Response body: the cleaned batches as they come off `outbound`. A job
+    failure after the first batch raises, so the connection is dropped
+    before the final chunk and the client sees a truncated body.
+    """
+    try:
+        yield first
+        while True:
+            chunk = await run_in_threadpool(outbound.get)
+            if chunk is None:
+                return
+            yield chunk
+    except StreamClosed as e:
+        if isinstance(e.error, ConnectionError):
+            # The client is gone; nothing left to tell it
+            return
+        raise RuntimeError(f"Stream job failed: {e.error}") from e
+    finally:
+        if not feeder.done():
+            feeder.cancel()
+
+
+@app.post('/stream/process')
+async def stream_process(request: Request, batch_size: int = Query(DEFAULT_BATCH_SIZE, gt=0)):
+    """
+    Body: the CSV upload (any content type but .xlsx), chunked or with a Content-Length.
+    Optional query "user_id", "dataset_id" (and "uploaded_at") add the result to
+    the user's dashboard rollup, as in /process. Optional "include" / "outputs":
+    comma-separated stage / column names, as the lists in /process.
+    Returns the cleaned CSV (text/csv, chunked) with an X-Job-Id header;
+    400 for a CSV that cannot be parsed, 503 with Retry-After when no memory is free.
+    """
+    try:
+        stage_selection(request.query_params.get('include'), request.query_params.get('outputs'))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    content_type = request.headers.get('content-type', '').split(';')[0].strip()
+    if content_type in XLSX_TYPES:
+        return JSONResponse({"error": "Streaming needs CSV; send .xlsx files to /process"}, status_code=415)
+
+    # 1. Header and first lines, to size the job
+    body = request.stream().__aiter__()
+    head = b""
+    async for chunk in body:
+        head += chunk
+        if len(head) >= HEAD_BYTES:
+            break
+    if not head.strip():
+        return JSONResponse({"error": "Empty upload"}, status_code=400)
+    if head.startswith(ZIP_MAGIC):
+        return JSONResponse({"error": "Streaming needs CSV; send .xlsx files to /process"}, status_code=415)
+
+    length = request.headers.get('content-length')
+    rows, columns = csv_head_shape(head, int(length) if length else None, batch_size)
+    reserve = chunked_job_bytes(rows, columns, batch_size)
+    try:
+        admission = await run_in_threadpool(get_admission_controller().admit, reserve)
+    except AdmissionRejected as e:
+        print(f"Rejected stream job: {e}")
+        return JSONResponse({"error": str(e), "retry_after": e.retry_after}, status_code=503,
+                            headers={"Retry-After": str(e.retry_after)})
+
+    # 2. Clean in a thread while the rest of the body is fed to it
+    purge_stream_results()
+    job_id = uuid.uuid4().hex
+    save_stream_result(job_id, {"status": "running"})
+    inbound, outbound = ChunkQueue(), ChunkQueue(OUTBOUND_CHUNKS)
+    inbound.put(head)
+    params = dict(request.query_params)
+    threading.Thread(target=run_stream_job, args=(job_id, inbound, outbound, batch_size, admission, params),
+                     name=f"stream-{job_id[:8]}", daemon=True).start()
+    feeder = asyncio.create_task(feed_body(request, body, inbound, outbound))
+
+    # 3. Errors up to the first cleaned batch still get a status code
+    try:
+        first = await run_in_threadpool(outbound.get)
+    except StreamClosed as e:
+        feeder.cancel()
+        status = 400 if isinstance(e.error, ValueError) else 500
+        return JSONResponse({"error": str(e.error), "job_id": job_id}, status_code=status)
+    if first is None:
+        return JSONResponse({"error": "File has no rows", "job_id": job_id}, status_code=400)
+
+    return DuplexStreamingResponse(drain(first, outbound, feeder), media_type='text/csv',
+                                   headers={"X-Job-Id": job_id})
+
+
+@app.get('/stream/reports/{job_id}')
+async def stream_report(job_id: str):
+    """
+    Result of a streamed job: 202 while it runs, then its report, previews,
+    duplicate count and QA summary (or its error).
+    """
+    result = await run_in_threadpool(load_stream_result, job_id)
+    if result is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+    status = {"running": 202, "complete": 200}.get(result["status"], 500)
+    return JSONResponse(result, status_code=status)
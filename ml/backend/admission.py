@@ -0,0 +1,307 @@
+# backend/admission.py
+"""
+Memory-budgeted admission control for cleaning jobs.
+
+Each job's peak memory is estimated from the upload (rows x columns x a
+measured bytes-per-cell factor) and reserved against a budget shared by
+every gunicorn worker. The reservations live in SQLite, as the QA rollup
+does: a short BEGIN IMMEDIATE transaction checks the running total and
+inserts the job, so two workers never admit past the budget together.
+Reservations of crashed workers are dropped by pid.
+
+- Jobs that fit run in memory.
+- Jobs whose in-memory estimate alone exceeds LARGE_JOB_SHARE of the budget
+  switch to the chunked mode, which reserves one batch instead.
+- Jobs that do not fit wait up to ML_ADMISSION_WAIT seconds, then are
+  rejected with a retry hint.
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from .io.readers import DEFAULT_BATCH_SIZE
+from .preprocessing.deduplication import DEDUP_BUFFER_ROWS, PAIR_DTYPE
+
+MB = 1024 * 1024
+
+# Peak bytes per input cell of clean_frame (analysis, pipeline copies, write).
+# benchmarks/bench_admission.py measures ~130-160 on the sample uploads at
+# 20k-100k rows; the default leaves headroom for wider text columns.
+BYTES_PER_CELL = int(os.environ.get("ML_BYTES_PER_CELL", 250))
+
+# Fixed cost of any job (previews, report, per-stage frames of small files)
+BASE_JOB_BYTES = 32 * MB
+
+# Jobs estimated above this share of the budget run chunked
+LARGE_JOB_SHARE = 0.5
+
+# How long a job may wait for memory before it is rejected
+QUEUE_WAIT_SECONDS = float(os.environ.get("ML_ADMISSION_WAIT", 30))
+POLL_SECONDS = 0.25
+
+RETRY_AFTER_SECONDS = 30
+
+DEFAULT_DB_PATH = os.environ.get(
+    "ML_ADMISSION_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "admission.sqlite3")
+)
+
+# Bytes per CSV row assumed when the file has no data rows to sample
+FALLBACK_ROW_BYTES = 200
+SAMPLE_LINES = 1_000
+
+
+class AdmissionRejected(Exception):
+    """
+    No memory for the job within the wait time.
+    """
+
+    def __init__(self, estimate: int, retry_after: int = RETRY_AFTER_SECONDS):
+        super().__init__(
+            f"Not enough memory to start this job now (needs ~{estimate // MB} MB); "
+            f"retry in {retry_after}s"
+        )
+        self.estimate = estimate
+        self.retry_after = retry_after
+
+
+# =========================
+# Estimates
+# =========================
+def default_budget() -> int:
+    """
+    ML_MEMORY_BUDGET_MB, else 60% of the container limit (cgroup v2 / v1),
+    else 60% of physical memory.
+    """
+    configured = os.environ.get("ML_MEMORY_BUDGET_MB")
+    if configured:
+        return int(float(configured) * MB)
+
+    limit = None
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            if value.isdigit() and int(value) < 1 << 60:
+                limit = int(value)
+                break
+        except OSError:
+            continue
+    if limit is None:
+        try:
+            limit = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        except (ValueError, OSError, AttributeError):
+            limit = 4096 * MB
+    return int(limit * 0.6)
+
+
+def csv_shape(path: str) -> tuple:
+    """
+    (estimated rows, columns) from the header and the mean length of the
+    first SAMPLE_LINES lines, without parsing the file.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        lines = [line for line in (f.readline() for _ in range(SAMPLE_LINES)) if line]
+    return _shape(header, lines, size)
+
+
+def csv_head_shape(head: bytes, size: int | None, batch_size: int = DEFAULT_BATCH_SIZE) -> tuple:
+    """
+    csv_shape() for a streamed upload: head is the start of the body (the
+    header and at least one full line), size its Content-Length. Without a
+    length the upload is taken as one batch.
+    """
+    header, *lines = head.split(b"\n")[:SAMPLE_LINES + 1]
+    # The last piece may be cut off mid-line
+    lines = [line + b"\n" for line in lines[:-1]]
+    if size is None:
+        return batch_size, _shape(header + b"\n", lines, 0)[1]
+    return _shape(header + b"\n", lines, size)
+
+
+def _shape(header: bytes, lines: list, size: int) -> tuple:
+    columns = header.count(b",") + 1 if header.strip() else 0
+    row_bytes = sum(len(line) for line in lines) / len(lines) if lines else FALLBACK_ROW_BYTES
+    return max(0, int((size - len(header)) / max(row_bytes, 1))), columns
+
+
+def xlsx_shapes(path: str) -> dict:
+    """
+    {sheet: (rows, columns)} from the sheet dimensions openpyxl reads in
+    read-only mode, without loading any cells.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return {
+            ws.title: (max((ws.max_row or 1) - 1, 0), ws.max_column or 0)
+            for ws in workbook.worksheets
+        }
+    finally:
+        workbook.close()
+
+
+def estimate_job_bytes(rows: int, columns: int, bytes_per_cell: int = BYTES_PER_CELL) -> int:
+    return BASE_JOB_BYTES + int(rows * columns * bytes_per_cell)
+
+
+def chunked_job_bytes(rows: int, columns: int, batch_size: int) -> int:
+    # One batch in flight, the report's row hashes (8 bytes a row) and the
+    # duplicate finder's (hash, row) buffer before it spills
+    pair_buffer = PAIR_DTYPE.itemsize * min(rows, DEDUP_BUFFER_ROWS)
+    return estimate_job_bytes(min(rows, batch_size), columns) + 8 * rows + pair_buffer
+
+
+def plan_job(path: str, sheet_name: str | None = None, all_sheets: bool = False,
+             budget: int | None = None, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """
+    Decides how a job runs and what it reserves.
+
+    A single dataset runs in memory, or chunked when its in-memory estimate
+    is above LARGE_JOB_SHARE of the budget. A workbook in all-sheets mode
+    parses its sheets in parallel when their estimates fit together, and
+    one sheet at a time otherwise (each sheet then in memory or chunked on
+    its own estimate).
+
+    Returns:
+        {"mode": "memory" | "chunked" | "sequential", "estimate": in-memory peak bytes,
+         "reserve": bytes to admit, "sheets": {sheet: "memory" | "chunked"} (all-sheets only)}
+    """
+    budget = default_budget() if budget is None else budget
+    large = LARGE_JOB_SHARE * budget
+
+    if path.endswith(".xlsx"):
+        shapes = xlsx_shapes(path)
+        if not all_sheets:
+            name = sheet_name or next(iter(shapes), None)
+            shapes = {name: shapes.get(name, (0, 0))}
+    else:
+        shapes = {None: csv_shape(path)}
+
+    estimates = {sheet: estimate_job_bytes(*shape) for sheet, shape in shapes.items()}
+    modes = {sheet: "memory" if estimates[sheet] <= large else "chunked" for sheet in shapes}
+    reserves = {
+        sheet: estimates[sheet] if modes[sheet] == "memory" else chunked_job_bytes(*shapes[sheet], batch_size)
+        for sheet in shapes
+    }
+    total = sum(estimates.values())
+
+    if not all_sheets:
+        (sheet, mode), = modes.items()
+        return {"mode": mode, "rows": shapes[sheet][0], "columns": shapes[sheet][1],
+                "estimate": total, "reserve": reserves[sheet]}
+    if total <= large:
+        return {"mode": "memory", "estimate": total, "reserve": total, "sheets": modes}
+    return {"mode": "sequential", "estimate": total, "reserve": max(reserves.values(), default=0), "sheets": modes}
+
+
+# =========================
+# Controller
+# =========================
+class AdmissionController:
+    """
+    Shared memory reservations for the jobs running on this host.
+    """
+
+    def __init__(self, budget: int | None = None, path: str = DEFAULT_DB_PATH):
+        self.budget = default_budget() if budget is None else budget
+        self.path = path
+        self._local = threading.local()
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS admitted (
+                job_id TEXT PRIMARY KEY,
+                pid INTEGER NOT NULL,
+                bytes INTEGER NOT NULL,
+                started REAL NOT NULL
+            )
+        """)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _try_admit(self, job_id: str, nbytes: int) -> bool:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Reservations of workers that died mid-job
+            for (pid,) in conn.execute("SELECT DISTINCT pid FROM admitted").fetchall():
+                if not _pid_alive(pid):
+                    conn.execute("DELETE FROM admitted WHERE pid = ?", (pid,))
+            used = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM admitted").fetchone()[0]
+            # A job that needs the whole budget still runs when nothing else does
+            admitted = used + nbytes <= self.budget or used == 0
+            if admitted:
+                conn.execute(
+                    "INSERT INTO admitted (job_id, pid, bytes, started) VALUES (?, ?, ?, ?)",
+                    (job_id, os.getpid(), nbytes, time.time())
+                )
+            conn.execute("COMMIT")
+            return admitted
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release(self, job_id: str):
+        self._connection().execute("DELETE FROM admitted WHERE job_id = ?", (job_id,))
+
+    def in_use(self) -> dict:
+        row = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM admitted"
+        ).fetchone()
+        return {"jobs": row[0], "reserved_mb": round(row[1] / MB, 1), "budget_mb": round(self.budget / MB, 1)}
+
+    def admit(self, nbytes: int, wait: float = QUEUE_WAIT_SECONDS) -> "_Admission":
+        """
+        Reserves nbytes, waiting up to `wait` seconds for running jobs to
+        release memory. Use as a context manager; raises AdmissionRejected.
+        """
+        job_id = uuid.uuid4().hex
+        deadline = time.monotonic() + wait
+        while not self._try_admit(job_id, nbytes):
+            if time.monotonic() >= deadline:
+                raise AdmissionRejected(nbytes)
+            time.sleep(POLL_SECONDS)
+        return _Admission(self, job_id)
+
+
+class _Admission:
+    def __init__(self, controller, job_id):
+        self.controller = controller
+        self.job_id = job_id
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.controller.release(self.job_id)
+        return False
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_controller = None
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
@@ -0,0 +1,146 @@
+# backend/io/json_response.py
+
+import datetime
+import gzip
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+
+# =========================
+# Encoding
+# =========================
+def frame_to_json(df: pd.DataFrame) -> bytes:
+    """
+    Records JSON straight from the column arrays.
+    pandas' C encoder walks the NumPy / Arrow buffers once and writes NaN,
+    None, NaT and ±inf as null, so no replace() / to_dict() pass is needed.
+    """
+    return df.to_json(
+        orient='records',
+        date_format='iso',
+        force_ascii=False,
+        default_handler=str
+    ).encode('utf-8')
+
+
+def to_native(value):
+    """
+    Converts NumPy / pandas scalars into JSON-safe Python values.
+    NaN and infinities become None.
+    """
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return value if math.isfinite(value) else None
+    if isinstance(value, (pd.Timestamp, datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, np.ndarray):
+        return [to_native(v) for v in value.tolist()]
+    return value
+
+
+def _encode(obj, out: list):
+    if isinstance(obj, pd.DataFrame):
+        out.append(frame_to_json(obj))
+    elif isinstance(obj, pd.Series):
+        _encode(obj.to_dict(), out)
+    elif isinstance(obj, dict):
+        out.append(b'{')
+        for i, (key, value) in enumerate(obj.items()):
+            if i:
+                out.append(b',')
+            out.append(json.dumps(str(key), ensure_ascii=False).encode('utf-8'))
+            out.append(b':')
+            _encode(value, out)
+        out.append(b'}')
+    elif isinstance(obj, (list, tuple)):
+        out.append(b'[')
+        for i, value in enumerate(obj):
+            if i:
+                out.append(b',')
+            _encode(value, out)
+        out.append(b']')
+    else:
+        out.append(json.dumps(to_native(obj), ensure_ascii=False, allow_nan=False, default=str).encode('utf-8'))
+
+
+def encode_json(obj) -> bytes:
+    """
+    Serializes a response body to JSON bytes in one pass.
+    DataFrames anywhere in the structure are written as records arrays.
+    """
+    out = []
+    _encode(obj, out)
+    return b''.join(out)
+
+
+# =========================
+# Compression
+# =========================
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """
+    Picks zstd (when the zstandard package is installed) or gzip from an
+    Accept-Encoding header. Returns None for identity.
+    """
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    if accepted.get('zstd', 0) > 0 and _zstd() is not None:
+        return 'zstd'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: str | None) -> bytes:
+    if encoding == 'zstd':
+        return _zstd().ZstdCompressor(level=3).compress(body)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=5)
+    return body
+
+
+def json_response(obj, status: int = 200, accept_encoding: str | None = None):
+    """
+    Flask response for obj, compressed when the client accepts it.
+    """
+    from flask import Response
+
+    body = encode_json(obj)
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= MIN_COMPRESS_BYTES else None
+
+    response = Response(compress(body, encoding), status=status, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
@@ -0,0 +1,223 @@
+# backend/io/partitioned_writer.py
+"""
+Splits cleaned rows into the files a CRM import wants, in one pass:
+
+- duplicates.<ext>: rows repeating an earlier row (keep='first' mask)
+- review_<ISSUE>.<ext>: rows with at least one INVALID status, grouped by
+  their dominant issue code
+- valid.<ext>: everything else
+
+Each batch is routed with one stable sort of its label codes and appended
+to the open writer of every label it holds, so the cleaned frame is never
+filtered once per output. manifest.json lists paths and row counts.
+"""
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+FORMATS = ("csv", "parquet")
+
+VALID_LABEL = "valid"
+DUPLICATE_LABEL = "duplicates"
+REVIEW_PREFIX = "review_"
+
+MANIFEST = "manifest.json"
+
+
+def check_format(fmt: str):
+    """
+    Raises ValueError when fmt is not a split format or, for Parquet,
+    pyarrow is not installed; callers check before cleaning anything.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"split_outputs must be one of {list(FORMATS)}")
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("split_outputs 'parquet' needs pyarrow, which is not installed; use 'csv'")
+
+
+# =========================
+# Routing
+# =========================
+def _issue_label(issue, status_col: str) -> str:
+    code = str(issue) if pd.notna(issue) and str(issue).strip() else f"{status_col[:-len('_status')]}_INVALID"
+    return REVIEW_PREFIX + re.sub(r"[^A-Za-z0-9]+", "_", code).strip("_").upper()
+
+
+def route_rows(df: pd.DataFrame, duplicate_mask=None) -> np.ndarray:
+    """
+    Output label per row.
+
+    The dominant issue of a row is the issue code of its first INVALID
+    status column, in the order the pipeline validates fields (company
+    name, email, phone, industry, country, ...), so a row lands in exactly
+    one review group.
+    """
+    labels = np.full(len(df), VALID_LABEL, dtype=object)
+    status_cols = [c for c in df.columns if str(c).endswith("_status")]
+
+    decided = np.zeros(len(df), dtype=bool)
+    if duplicate_mask is not None:
+        decided = np.asarray(duplicate_mask, dtype=bool).copy()
+        labels[decided] = DUPLICATE_LABEL
+
+    for col in status_cols:
+        invalid = (df[col].astype(object).to_numpy() == "INVALID") & ~decided
+        if not invalid.any():
+            continue
+        issue_col = f"{col[:-len('_status')]}_issue"
+        issues = df[issue_col].to_numpy(dtype=object)[invalid] if issue_col in df.columns else np.full(invalid.sum(), None)
+        # One label per distinct issue code; factorize marks nulls with -1
+        codes, uniques = pd.factorize(pd.Series(issues, dtype=object))
+        names = np.array([_issue_label(u, col) for u in uniques] + [_issue_label(None, col)], dtype=object)
+        labels[invalid] = names[codes]
+        decided |= invalid
+    return labels
+
+
+def split_by_label(df: pd.DataFrame, labels: np.ndarray):
+    """
+    Yields (label, rows) in first-seen label order; rows keep their order.
+    One stable argsort and one gather for the whole batch.
+    """
+    codes, uniques = pd.factorize(pd.Series(labels, dtype=object))
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    gathered = df.iloc[order]
+    for i, label in enumerate(uniques):
+        yield label, gathered.iloc[bounds[i]:bounds[i + 1]]
+
+
+# =========================
+# Writers
+# =========================
+def _arrow_ready(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Categoricals as plain values and mixed object columns as text, so every
+    batch maps to the same Parquet schema.
+    """
+    converted = {}
+    for col in frame.columns:
+        dtype = frame[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype) or dtype == object:
+            converted[col] = frame[col].astype(object).where(frame[col].notna(), None).astype("string")
+    return frame.assign(**converted) if converted else frame
+
+
+class PartitionedWriter:
+    """
+    Streaming writers, one per output label, opened on first use.
+    Use as a context manager, or call close() to get the manifest.
+    """
+
+    def __init__(self, directory: str, fmt: str = "csv"):
+        check_format(fmt)
+        self.directory = directory
+        self.fmt = fmt
+        self.rows = {}
+        self._parquet = {}
+        os.makedirs(directory, exist_ok=True)
+        # Outputs from an earlier run of the same dataset
+        for name in os.listdir(directory):
+            if name.endswith((".csv", ".parquet")) or name == MANIFEST:
+                os.remove(os.path.join(directory, name))
+
+    def path(self, label: str) -> str:
+        return os.path.join(self.directory, f"{label}.{self.fmt}")
+
+    def write(self, label: str, frame: pd.DataFrame):
+        first = label not in self.rows
+        self.rows[label] = self.rows.get(label, 0) + len(frame)
+        if self.fmt == "csv":
+            frame.to_csv(self.path(label), mode="w" if first else "a", header=first, index=False)
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(_arrow_ready(frame), preserve_index=False)
+        writer = self._parquet.get(label)
+        if writer is None:
+            writer = self._parquet[label] = pq.ParquetWriter(self.path(label), table.schema)
+        else:
+            try:
+                # Columns all-null in one batch or parsed as ints in another
+                table = table.cast(writer.schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+                writer, table = self._widen(label, table)
+        writer.write_table(table)
+
+    def _widen(self, label: str, table):
+        """
+        Reopens a Parquet output whose columns cannot hold the next batch
+        ('SW1A 1AA' after numeric zips): mismatched columns become float64
+        (int vs float) or text, and the rows written so far are rewritten
+        with the wider schema. Returns (writer, table in that schema).
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._parquet.pop(label).close()
+        written = pq.read_table(self.path(label))
+        fields = []
+        for field in written.schema:
+            incoming = table.schema.field(field.name).type
+            if field.type == incoming or pa.types.is_null(incoming):
+                fields.append(field)
+            elif pa.types.is_null(field.type):
+                fields.append(pa.field(field.name, incoming))
+            elif all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in (field.type, incoming)):
+                fields.append(pa.field(field.name, pa.float64()))
+            else:
+                fields.append(pa.field(field.name, pa.string()))
+        schema = pa.schema(fields)
+        writer = self._parquet[label] = pq.ParquetWriter(self.path(label), schema)
+        writer.write_table(written.cast(schema))
+        return writer, table.cast(schema)
+
+    def write_batch(self, df: pd.DataFrame, duplicate_mask=None):
+        """
+        Routes one batch of cleaned rows and appends each part to its output.
+        """
+        for label, rows in split_by_label(df, route_rows(df, duplicate_mask)):
+            self.write(label, rows)
+
+    def close(self) -> dict:
+        """
+        Closes the writers and writes the manifest.
+
+        Returns:
+            {"format", "directory", "rows", "outputs": {label: {"path", "rows"}}}
+        """
+        for writer in self._parquet.values():
+            writer.close()
+        self._parquet = {}
+
+        manifest = {
+            "format": self.fmt,
+            "directory": self.directory,
+            "rows": int(sum(self.rows.values())),
+            "outputs": {
+                label: {"path": self.path(label), "rows": int(n)}
+                for label, n in sorted(self.rows.items())
+            },
+        }
+        with open(os.path.join(self.directory, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.manifest = self.close()
+        else:
+            for writer in self._parquet.values():
+                writer.close()
+        return False
@@ -0,0 +1,177 @@
+# backend/io/pipelined.py
+"""
+Three-stage pipelined batch executor: a reader thread parses batch k+1
+while the calling thread transforms batch k and a writer thread
+serializes batch k-1.
+
+Bounded queues of `depth` batches sit between the stages, so a slow
+writer holds the transform back (and the transform holds the reader
+back) instead of batches piling up in memory. Transform always runs in
+the calling thread, one batch at a time and in order, so it may keep
+state across batches; write is only ever called from the writer thread.
+
+Pandas parsing and CSV writing release the GIL for part of their work,
+so overlap is partial: run_pipelined() reports how much of the serial
+time (read + transform + write) the overlap hid.
+"""
+import os
+import queue
+import threading
+import time
+from typing import Callable, Iterable
+
+# Batches buffered between two stages; 0 runs everything in the calling thread
+DEFAULT_DEPTH = int(os.environ.get("ML_PIPELINE_DEPTH", 2))
+
+_DONE = object()
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """
+    Blocking put that gives up once another stage has failed.
+    """
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    """
+    Blocking get that returns _DONE once another stage has failed.
+    """
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def _stats(batches: int, read: float, transform: float, write: float, wall: float, depth: int) -> dict:
+    serial = read + transform + write
+    hidden = max(0.0, serial - wall)
+    return {
+        "depth": depth,
+        "batches": batches,
+        "read_seconds": round(read, 3),
+        "transform_seconds": round(transform, 3),
+        "write_seconds": round(write, 3),
+        "serial_seconds": round(serial, 3),
+        "wall_seconds": round(wall, 3),
+        "hidden_seconds": round(hidden, 3),
+        "hidden_pct": round(100.0 * hidden / serial, 1) if serial else 0.0,
+    }
+
+
+def run_serial(batches: Iterable, transform: Callable, write: Callable) -> dict:
+    """
+    Same contract as run_pipelined(), one stage after another.
+    """
+    started = time.perf_counter()
+    read = transformed = written = 0.0
+    count = 0
+    iterator = iter(batches)
+    while True:
+        t0 = time.perf_counter()
+        batch = next(iterator, _DONE)
+        t1 = time.perf_counter()
+        read += t1 - t0
+        if batch is _DONE:
+            break
+        out = transform(batch)
+        t2 = time.perf_counter()
+        write(out)
+        transformed += t2 - t1
+        written += time.perf_counter() - t2
+        count += 1
+    return _stats(count, read, transformed, written, time.perf_counter() - started, 0)
+
+
+def run_pipelined(batches: Iterable, transform: Callable, write: Callable, depth: int = DEFAULT_DEPTH) -> dict:
+    """
+    Runs read -> transform -> write over every batch with the three stages
+    overlapped. An exception in any stage stops the others and is raised
+    here once both threads have exited.
+
+    Args:
+        batches: iterable of input batches, consumed by the reader thread
+        transform: batch -> output, called in this thread, in batch order
+        write: output -> None, called in the writer thread, in batch order
+        depth: queue bound between stages (0: run_serial)
+
+    Returns:
+        Per-stage busy seconds, wall seconds and the time hidden by overlap
+    """
+    if depth <= 0:
+        return run_serial(batches, transform, write)
+
+    started = time.perf_counter()
+    inbox = queue.Queue(maxsize=depth)
+    outbox = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    busy = {"read": 0.0, "write": 0.0}
+
+    def reader():
+        try:
+            iterator = iter(batches)
+            while True:
+                t0 = time.perf_counter()
+                batch = next(iterator, _DONE)
+                if batch is not _DONE:
+                    busy["read"] += time.perf_counter() - t0
+                if not _put(inbox, batch, stop) or batch is _DONE:
+                    return
+        except BaseException as e:
+            failures.append(e)
+            stop.set()
+
+    def writer():
+        try:
+            while True:
+                out = _get(outbox, stop)
+                if out is _DONE:
+                    return
+                t0 = time.perf_counter()
+                write(out)
+                busy["write"] += time.perf_counter() - t0
+        except BaseException as e:
+            failures.append(e)
+            stop.set()
+
+    failures = []
+    threads = [
+        threading.Thread(target=reader, name="pipeline-reader", daemon=True),
+        threading.Thread(target=writer, name="pipeline-writer", daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    transformed = 0.0
+    count = 0
+    try:
+        while True:
+            batch = _get(inbox, stop)
+            if batch is _DONE:
+                break
+            t0 = time.perf_counter()
+            out = transform(batch)
+            transformed += time.perf_counter() - t0
+            count += 1
+            if not _put(outbox, out, stop):
+                break
+        # The writer drains what is queued, then exits on _DONE
+        _put(outbox, _DONE, stop)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+
+    if failures:
+        raise failures[0]
+    return _stats(count, busy["read"], transformed, busy["write"], time.perf_counter() - started, depth)
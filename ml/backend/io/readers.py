@@ -0,0 +1,206 @@
+# backend/io/readers.py
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BATCH_SIZE = 50_000
+
+# Sheet workers start from a clean interpreter, not a fork of the calling
+# gunicorn gthread worker (a fork copies locks held by its other threads)
+SHEET_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+# =========================
+# CSV
+# =========================
+def iter_csv_batches(path: str, batch_size: int = DEFAULT_BATCH_SIZE, dtype: dict | None = None) -> Iterator[pd.DataFrame]:
+    """
+    Yields the CSV as DataFrames of at most batch_size rows.
+    Without dtype, column types are guessed per batch.
+    """
+    yield from pd.read_csv(path, chunksize=batch_size, dtype=dtype)
+
+
+def column_kinds(kinds: dict, df: pd.DataFrame) -> dict:
+    """
+    Folds a batch's column types into kinds ({column: {'int', 'float',
+    'bool', 'text'}}), for csv_dtypes() once every batch is written.
+    """
+    for col, dtype in df.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            kind = "bool"
+        elif pd.api.types.is_integer_dtype(dtype):
+            kind = "int"
+        elif pd.api.types.is_float_dtype(dtype):
+            kind = "float"
+        else:
+            kind = "text"
+        kinds.setdefault(col, set()).add(kind)
+    return kinds
+
+
+def csv_dtypes(kinds: dict) -> dict:
+    """
+    One read_csv dtype per column for a CSV written in batches: numbers
+    only where every batch had numbers, text otherwise, so reading it back
+    in chunks gives every chunk the same types.
+    """
+    dtypes = {}
+    for col, seen in kinds.items():
+        if seen == {"int"}:
+            dtypes[col] = "Int64"
+        elif seen <= {"int", "float"}:
+            dtypes[col] = "float64"
+        elif seen == {"bool"}:
+            dtypes[col] = "boolean"
+        else:
+            dtypes[col] = "str"
+    return dtypes
+
+
+# =========================
+# XLSX (streaming)
+# =========================
+# Strings pd.read_excel treats as missing by default
+EXCEL_NA_VALUES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null"
+}
+
+def list_sheets(path: str) -> list:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def _header_names(header_row) -> list:
+    # Same placeholder names pandas gives blank header cells
+    return [
+        str(value) if value is not None else f"Unnamed: {i}"
+        for i, value in enumerate(header_row)
+    ]
+
+
+def _rows_to_frame(rows: list, columns: list, start: int) -> pd.DataFrame:
+    width = len(columns)
+    rows = [
+        tuple(row[:width]) + (None,) * (width - len(row)) if len(row) != width else row
+        for row in rows
+    ]
+    frame = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    frame.index = pd.RangeIndex(start, start + len(frame))
+    # Empty cells come back as None; pd.read_excel gives NaN
+    frame = frame.astype(object)
+    frame = frame.where(frame.notna() & ~frame.isin(EXCEL_NA_VALUES), np.nan)
+    return frame.infer_objects()
+
+
+def iter_xlsx_batches(
+    path: str,
+    sheet_name: str | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Streams one worksheet in batches using openpyxl read-only mode.
+    Rows are parsed from the sheet XML as they are read, so memory stays
+    bounded by batch_size instead of the whole workbook object model.
+
+    Args:
+        path: .xlsx file
+        sheet_name: Worksheet to read (default: the first one, like pd.read_excel)
+        batch_size: Rows per yielded DataFrame
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _header_names(header)
+
+        batch, start = [], 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield _rows_to_frame(batch, columns, start)
+                start += len(batch)
+                batch = []
+        if batch:
+            yield _rows_to_frame(batch, columns, start)
+    finally:
+        workbook.close()
+
+
+# =========================
+# Dispatch
+# =========================
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx')
+
+
+def iter_file_batches(
+    path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    sheet_name: str | None = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Chunked reader for any supported upload.
+    Raises ValueError for unsupported formats.
+    """
+    if path.endswith('.csv'):
+        return iter_csv_batches(path, batch_size)
+    if path.endswith('.xlsx'):
+        return iter_xlsx_batches(path, sheet_name, batch_size)
+    raise ValueError("Unsupported file format")
+
+
+def read_file(path: str, sheet_name: str | None = None, batch_size: int = DEFAULT_BATCH_SIZE) -> pd.DataFrame:
+    """
+    Reads a whole upload through the chunked readers.
+    """
+    batches = list(iter_file_batches(path, batch_size, sheet_name))
+    if not batches:
+        return pd.DataFrame()
+    if len(batches) == 1:
+        return batches[0]
+    return pd.concat(batches)
+
+
+def process_workbook_sheets(
+    path: str,
+    func: Callable[[str, str], dict],
+    max_workers: int | None = None
+) -> dict:
+    """
+    Runs func(path, sheet_name) for every worksheet on a process pool.
+    Each worker streams its own sheet, so sheets are parsed in parallel.
+    Workers use SHEET_START_METHOD, so func must be importable by name
+    (a module-level function or a partial of one).
+
+    Returns:
+        {sheet_name: func result}
+    """
+    sheets = list_sheets(path)
+    if max_workers is None:
+        max_workers = min(len(sheets), os.cpu_count() or 1)
+
+    if max_workers <= 1 or len(sheets) == 1:
+        return {sheet: func(path, sheet) for sheet in sheets}
+
+    context = multiprocessing.get_context(SHEET_START_METHOD)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+        futures = {sheet: pool.submit(func, path, sheet) for sheet in sheets}
+        return {sheet: future.result() for sheet, future in futures.items()}
@@ -0,0 +1,189 @@
+# backend/io/streaming.py
+"""
+Byte streams between an ASGI request / response and the threads that
+parse, clean and serialize it (asgi.py).
+
+ChunkQueue is a bounded queue of byte chunks with an end marker and an
+abort path; the event loop only touches it through run_in_threadpool, so
+a full or empty queue never blocks the loop. QueueReader turns the inbound
+queue into a binary file for pd.read_csv(chunksize=...): the upload is
+parsed as it arrives and is never held whole, in memory or on disk.
+
+Results of streamed jobs (report, QA summary) cannot travel in the body,
+which is the cleaned CSV, so they are kept as <ML_STREAM_DIR>/<job_id>.json
+and dropped by TTL.
+"""
+import io
+import json
+import os
+import queue
+import re
+import threading
+import time
+from typing import Iterator
+
+import pandas as pd
+
+from .json_response import encode_json
+from .readers import DEFAULT_BATCH_SIZE
+
+# Request body chunks buffered ahead of the parser (uvicorn reads ~64 KB at a time)
+INBOUND_CHUNKS = int(os.environ.get("ML_STREAM_CHUNKS", 64))
+
+# Cleaned batches buffered ahead of the response (one CSV text per batch)
+OUTBOUND_CHUNKS = 2
+
+RESULTS_ROOT = os.environ.get(
+    "ML_STREAM_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "stream_jobs")
+)
+
+# Results nobody fetched are dropped after this long
+RESULTS_TTL_SECONDS = float(os.environ.get("ML_STREAM_TTL_HOURS", 24)) * 3600
+
+JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+# =========================
+# Chunk queues
+# =========================
+class StreamClosed(Exception):
+    """
+    The other end of a ChunkQueue gave up; `error` is its reason.
+    """
+
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+
+class ChunkQueue:
+    """
+    Bounded, thread-safe queue of byte chunks. None marks the end of the
+    stream; abort() wakes both ends with StreamClosed.
+    """
+
+    def __init__(self, maxsize: int = INBOUND_CHUNKS):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._aborted = threading.Event()
+        self.error = None
+
+    def put(self, chunk: bytes | None):
+        """
+        Blocks while the queue is full; raises StreamClosed once aborted.
+        """
+        while not self._aborted.is_set():
+            try:
+                self._queue.put(chunk, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise StreamClosed(self.error)
+
+    def close(self):
+        self.put(None)
+
+    def get(self) -> bytes | None:
+        """
+        Next chunk, None at the end; raises StreamClosed once aborted.
+        """
+        while not self._aborted.is_set():
+            try:
+                return self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        raise StreamClosed(self.error)
+
+    def abort(self, error):
+        if not self._aborted.is_set():
+            self.error = error
+            self._aborted.set()
+
+
+class QueueReader(io.RawIOBase):
+    """
+    Read-only binary file over the chunks of a ChunkQueue.
+    """
+
+    def __init__(self, chunks: ChunkQueue):
+        self._chunks = chunks
+        self._buffer = memoryview(b"")
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer and not self._eof:
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer = memoryview(chunk)
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+def iter_stream_batches(chunks: ChunkQueue, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    iter_csv_batches() for a CSV arriving through a ChunkQueue.
+    """
+    with io.BufferedReader(QueueReader(chunks), buffer_size=1 << 16) as f:
+        yield from pd.read_csv(f, chunksize=batch_size)
+
+
+# =========================
+# Results
+# =========================
+def _result_path(job_id: str, root: str) -> str:
+    if not JOB_ID.match(job_id):
+        raise ValueError("Invalid job id")
+    return os.path.join(root, f"{job_id}.json")
+
+
+def save_stream_result(job_id: str, result: dict, root: str = RESULTS_ROOT) -> str:
+    """
+    Writes the result atomically (readers never see half a file).
+    """
+    os.makedirs(root, exist_ok=True)
+    path = _result_path(job_id, root)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(encode_json(result))
+    os.replace(tmp, path)
+    return path
+
+
+def load_stream_result(job_id: str, root: str = RESULTS_ROOT) -> dict | None:
+    """
+    None when the job is unknown (or its result expired).
+    """
+    try:
+        with open(_result_path(job_id, root)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def purge_stream_results(root: str = RESULTS_ROOT, ttl: float = RESULTS_TTL_SECONDS) -> int:
+    """
+    Removes results not updated within ttl seconds.
+
+    Returns:
+        Number of results removed
+    """
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - ttl
+    removed = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
@@ -0,0 +1,224 @@
+# backend/pipeline/changelog.py
+"""
+Cell-level change log: which cells the pipeline changed, from what, to
+what, and which stage did it.
+
+Records are collected while the plan runs, per stage and per rewritten
+column, never by diffing whole frames afterwards:
+
+- a stage that knows its mask reports it with report_changes() (fillers
+  know which cells were missing, normalize_industry which distinct values
+  moved), so only those rows are read;
+- for any other stage that rewrites an existing column, execute_plan
+  compares that one column before and after the stage.
+
+New columns (status, issue, e164, ...) are outputs, not changes, and are
+not logged. Levels resumed from a checkpoint replay the records saved
+with them instead of being compared again. Values are stored as text. The log is written next to the
+cleaned CSV as a Feather file (compressed CSV without pyarrow).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+CHANGES_ATTR = "changed_cells"
+
+# Page size bounds for browsing
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1_000
+
+LOG_COLUMNS = ["row", "column", "old", "new", "reason"]
+
+
+def report_changes(df: pd.DataFrame, col: str, mask=None, reason=None):
+    """
+    Called by a stage on the frame it returns.
+
+    Args:
+        mask: rows the stage changed in col (bool array); None to let
+              execute_plan compare the column
+        reason: change reason, one string or one per row (default: stage name)
+    """
+    changes = df.attrs.setdefault(CHANGES_ATTR, {})
+    changes[col] = (
+        None if mask is None else np.asarray(mask, dtype=bool),
+        reason if reason is None or isinstance(reason, str) else np.asarray(reason, dtype=object),
+    )
+
+
+def changed_mask(old: pd.Series, new: pd.Series) -> np.ndarray:
+    """
+    Rows where new differs from old; two missing values count as equal.
+    """
+    old = old.astype(object).to_numpy()
+    new = new.astype(object).to_numpy()
+    old_na, new_na = pd.isna(old), pd.isna(new)
+    both = ~old_na & ~new_na
+    differs = old_na != new_na
+    differs[both] = old[both] != new[both]
+    return differs
+
+
+def _as_text(values: pd.Series) -> np.ndarray:
+    values = values.astype(object)
+    return np.where(pd.isna(values), None, values.astype(str)).astype(object)
+
+
+def text_changed_mask(old: pd.Series, new: pd.Series) -> np.ndarray:
+    """
+    changed_mask on the logged text: 37.0 and '37.0' are the same cell.
+    """
+    return changed_mask(pd.Series(_as_text(old)), pd.Series(_as_text(new)))
+
+
+class ChangeLog:
+    """
+    Sparse (row, column, old, new, reason) records, kept as one block of
+    arrays per stage and column until to_frame().
+    """
+
+    def __init__(self):
+        self._blocks = []
+        self.row_offset = 0
+
+    def record(self, col: str, rows: np.ndarray, old: pd.Series, new: pd.Series, reason):
+        """
+        rows: positions in the frame; old / new: values at those rows.
+        """
+        if len(rows) == 0:
+            return
+        if isinstance(reason, str):
+            reason = np.full(len(rows), reason, dtype=object)
+        self._blocks.append((rows + self.row_offset, col, _as_text(old), _as_text(new), reason))
+
+    def record_stage(self, stage_name: str, col: str, before: pd.Series, after: pd.Series, reported=None):
+        """
+        Logs one rewritten column of one stage, from the stage's reported
+        mask when it has one, otherwise by comparing the column.
+        """
+        mask, reason = reported if reported is not None else (None, None)
+        if mask is None:
+            mask = changed_mask(before, after)
+        rows = np.flatnonzero(mask)
+        if reason is None:
+            reason = stage_name
+        elif not isinstance(reason, str):
+            reason = reason[rows]
+        self.record(col, rows, before.iloc[rows], after.iloc[rows], reason)
+
+    def mark(self) -> int:
+        """
+        Position to pass to since(), e.g. before a pipeline level runs.
+        """
+        return len(self._blocks)
+
+    def since(self, mark: int) -> pd.DataFrame:
+        """
+        Records added after mark, rows relative to row_offset, in the order
+        they were logged (for StageCheckpoint.save).
+        """
+        frame = self._frame(self._blocks[mark:])
+        frame["row"] -= self.row_offset
+        return frame
+
+    def replay(self, frame: pd.DataFrame):
+        """
+        Logs records saved by since() again, e.g. for a resumed level.
+        """
+        for col, part in frame.groupby("column", sort=False):
+            self.record(col, part["row"].to_numpy(dtype=np.int64), part["old"], part["new"],
+                        part["reason"].to_numpy(dtype=object))
+
+    def extend(self, other: "ChangeLog"):
+        self._blocks.extend(other._blocks)
+        return self
+
+    def __len__(self) -> int:
+        return sum(len(block[0]) for block in self._blocks)
+
+    def counts(self) -> dict:
+        """
+        {column: changed cells}, a cell changed by two stages counted once.
+        """
+        rows = {}
+        for block_rows, col, *_ in self._blocks:
+            rows.setdefault(col, []).append(block_rows)
+        return {col: int(len(np.unique(np.concatenate(parts)))) for col, parts in rows.items()}
+
+    @staticmethod
+    def _frame(blocks: list) -> pd.DataFrame:
+        if not blocks:
+            return pd.DataFrame({c: pd.Series(dtype=object) for c in LOG_COLUMNS}).astype({"row": "int64"})
+        return pd.DataFrame({
+            "row": np.concatenate([b[0] for b in blocks]).astype(np.int64),
+            "column": np.concatenate([np.full(len(b[0]), b[1], dtype=object) for b in blocks]),
+            "old": np.concatenate([b[2] for b in blocks]),
+            "new": np.concatenate([b[3] for b in blocks]),
+            "reason": np.concatenate([b[4] for b in blocks]),
+        })
+
+    def to_frame(self) -> pd.DataFrame:
+        frame = self._frame(self._blocks)
+        if frame.empty:
+            return frame
+        # Stable: a cell's changes stay in stage order
+        return frame.sort_values(["row", "column"], kind="stable", ignore_index=True)
+
+    def save(self, path: str) -> str:
+        """
+        Writes the log; returns the path actually written.
+        """
+        frame = self.to_frame()
+        for col in ("column", "reason"):
+            frame[col] = frame[col].astype("category")
+        try:
+            frame.to_feather(path)
+            return path
+        except ImportError:
+            path = os.path.splitext(path)[0] + ".csv.gz"
+            frame.to_csv(path, index=False)
+            return path
+
+
+# ----------------------------------
+# Side file
+# ----------------------------------
+def change_log_path(cleaned_path: str) -> str:
+    return os.path.splitext(cleaned_path)[0] + ".changes.feather"
+
+
+def load_change_log(cleaned_path: str) -> pd.DataFrame | None:
+    path = change_log_path(cleaned_path)
+    if os.path.exists(path):
+        return pd.read_feather(path)
+    fallback = os.path.splitext(path)[0] + ".csv.gz"
+    if os.path.exists(fallback):
+        return pd.read_csv(fallback, dtype={"old": object, "new": object})
+    return None
+
+
+def browse_changes(log: pd.DataFrame, column=None, reason=None, row=None,
+                   offset: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> dict:
+    """
+    One page of the change log, with per-column counts over the filtered log.
+    """
+    selected = log
+    if column is not None:
+        selected = selected[selected["column"] == column]
+    if reason is not None:
+        selected = selected[selected["reason"] == reason]
+    if row is not None:
+        selected = selected[selected["row"] == int(row)]
+
+    offset = max(0, int(offset))
+    limit = min(max(1, int(limit)), MAX_PAGE_SIZE)
+    page = selected.iloc[offset:offset + limit]
+
+    return {
+        "total": int(len(selected)),
+        "offset": offset,
+        "limit": limit,
+        "counts": {str(k): int(v) for k, v in selected["column"].value_counts(sort=False).items() if v},
+        "changes": page,
+    }
@@ -0,0 +1,212 @@
+# backend/pipeline/checkpoint.py
+"""
+Stage checkpoints for long pipeline jobs.
+
+After each level of the plan, the columns its stages wrote are spilled to
+<ML_CHECKPOINT_DIR>/<job_id>/level_NNN.feather and the manifest records the
+level's stage names; the change log records of the level go to
+level_NNN.changes.feather. A retry with the same job id and the same input rows
+loads the completed levels back instead of running them again, then
+continues with the first missing level. Checkpoints are removed when the
+job finishes, and by TTL when it never does.
+
+Feather needs pyarrow; without it checkpointing is off (the pipeline runs
+as usual). Object columns (phones parsed as numbers next to text, 'Unknown'
+next to sizes) are stored as pyarrow strings and come back as object text.
+"""
+import json
+import os
+import re
+import shutil
+import time
+
+import pandas as pd
+
+DEFAULT_ROOT = os.environ.get(
+    "ML_CHECKPOINT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "checkpoints")
+)
+
+# Checkpoints of jobs that were never retried are dropped after this long
+TTL_SECONDS = float(os.environ.get("ML_CHECKPOINT_TTL_HOURS", 24)) * 3600
+
+MANIFEST = "manifest.json"
+
+# Rows hashed for the input fingerprint
+FINGERPRINT_ROWS = 10_000
+
+
+def _feather_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Shape, columns and a hash of up to FINGERPRINT_ROWS evenly spaced rows:
+    a retry on a different file or sheet does not pick up old columns.
+    """
+    step = max(1, len(df) // FINGERPRINT_ROWS)
+    sample = df.iloc[::step].astype(str)
+    columns = pd.util.hash_pandas_object(pd.Series(list(map(str, df.columns))), index=False)
+    rows = pd.util.hash_pandas_object(sample, index=False)
+    # uint64 sums wrap around, which is fine for a fingerprint
+    return f"{len(df)}x{len(df.columns)}:{int(columns.sum()):016x}:{int(rows.sum()):016x}"
+
+
+def purge_expired(root: str = DEFAULT_ROOT, ttl: float = TTL_SECONDS) -> int:
+    """
+    Removes job directories not updated within ttl seconds.
+
+    Returns:
+        Number of jobs removed
+    """
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - ttl
+    removed = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        manifest = os.path.join(path, MANIFEST)
+        try:
+            updated = os.path.getmtime(manifest if os.path.exists(manifest) else path)
+        except OSError:
+            continue
+        if os.path.isdir(path) and updated < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def _feather_ready(frame: pd.DataFrame) -> tuple:
+    """
+    Object columns as pyarrow strings (missing stays missing), the way the
+    partitioned writer prepares Parquet batches: pyarrow cannot store
+    columns mixing numbers and text.
+
+    Returns:
+        (frame to write, names of the converted columns)
+    """
+    converted = {}
+    for col in frame.columns:
+        if frame[col].dtype == object:
+            values = frame[col]
+            converted[col] = values.astype(str).where(values.notna(), None).astype("string[pyarrow]")
+    return (frame.assign(**converted) if converted else frame), list(converted)
+
+
+class StageCheckpoint:
+    """
+    Checkpoint directory of one job.
+
+    levels in the manifest: [{"stages": [...], "file": ..., "stats": {...}}]
+    in plan order; only a prefix matching the current plan is reused.
+    """
+
+    def __init__(self, job_id: str, root: str = DEFAULT_ROOT):
+        self.job_id = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(job_id))
+        self.path = os.path.join(root, self.job_id)
+        self.manifest = {"fingerprint": None, "levels": []}
+        manifest_path = os.path.join(self.path, MANIFEST)
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path) as f:
+                    self.manifest = json.load(f)
+            except (OSError, ValueError):
+                # A manifest cut short by a crash: start over
+                pass
+
+    def bind(self, df: pd.DataFrame):
+        """
+        Ties the checkpoint to the input rows; drops levels saved for other rows.
+        """
+        fingerprint = frame_fingerprint(df)
+        if self.manifest.get("fingerprint") != fingerprint:
+            self.clear()
+            self.manifest = {"fingerprint": fingerprint, "levels": []}
+        return self
+
+    def completed(self, index: int, stage_names: list) -> bool:
+        levels = self.manifest["levels"]
+        # Pickle levels from older checkpoints are rerun
+        return (index < len(levels) and levels[index]["stages"] == list(stage_names)
+                and levels[index]["file"].endswith(".feather"))
+
+    def load(self, index: int, df_index) -> tuple:
+        """
+        Returns:
+            (columns written by the level: DataFrame, stage stats: dict)
+        """
+        entry = self.manifest["levels"][index]
+        path = os.path.join(self.path, entry["file"])
+        frame = pd.read_feather(path)
+        for col in entry.get("text_columns", []):
+            frame[col] = frame[col].astype(object).where(frame[col].notna(), None)
+        frame.index = df_index
+        return frame, entry.get("stats", {})
+
+    def load_changes(self, index: int) -> pd.DataFrame | None:
+        """
+        Change log records saved with the level (ChangeLog.since()), or None
+        when it was saved without a change log.
+        """
+        file_name = self.manifest["levels"][index].get("changes")
+        if file_name is None:
+            return None
+        changes = pd.read_feather(os.path.join(self.path, file_name))
+        for col in ("old", "new"):
+            changes[col] = changes[col].astype(object).where(changes[col].notna(), None)
+        return changes
+
+    def save(self, index: int, stage_names: list, frame: pd.DataFrame, stats: dict,
+             changes: pd.DataFrame | None = None):
+        """
+        Spills one level's output columns (and its change log records), then
+        records it in the manifest. Levels after index (from an older plan)
+        are forgotten.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        frame, text_columns = _feather_ready(frame.reset_index(drop=True))
+        file_name = f"level_{index:03d}.feather"
+        tmp = os.path.join(self.path, file_name + ".tmp")
+        frame.to_feather(tmp)
+        os.replace(tmp, os.path.join(self.path, file_name))
+
+        changes_name = None
+        if changes is not None:
+            changes_name = f"level_{index:03d}.changes.feather"
+            tmp = os.path.join(self.path, changes_name + ".tmp")
+            _feather_ready(changes)[0].to_feather(tmp)
+            os.replace(tmp, os.path.join(self.path, changes_name))
+
+        levels = self.manifest["levels"][:index]
+        levels.append({"stages": list(stage_names), "file": file_name, "stats": stats,
+                       "text_columns": text_columns, "changes": changes_name})
+        self.manifest["levels"] = levels
+        self._write_manifest()
+
+    def _write_manifest(self):
+        tmp = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, default=str)
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def open_checkpoint(job_id: str | None, root: str = DEFAULT_ROOT) -> StageCheckpoint | None:
+    """
+    Checkpoint for job_id, after purging expired jobs. None when job_id is
+    empty or pyarrow is not installed.
+    """
+    if not job_id:
+        return None
+    if not _feather_available():
+        print("pyarrow is not installed; pipeline checkpoints are off")
+        return None
+    purge_expired(root)
+    return StageCheckpoint(job_id, root)
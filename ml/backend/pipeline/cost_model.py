@@ -0,0 +1,247 @@
+# backend/pipeline/cost_model.py
+"""
+Per-stage cost model, and the latency-budget planner built on it.
+
+Each stage's time is predicted as
+
+    seconds = intercept + per_row * rows + per_unique * uniques
+
+where uniques is the estimated number of distinct values summed over the
+columns the stage reads (most stages work once per distinct value). The
+coefficients are fitted by benchmarks/calibrate_costs.py and stored in
+backend/models/stage_costs.json, keyed by stage name, "<stage>:fast" for
+the approximate variant, and "write_csv" for writing the cleaned file
+(rows there are cells). Stages missing from the file use DEFAULT_COSTS.
+
+fit_plan_to_budget() degrades a plan until the prediction fits, taking
+the biggest predicted saving each time: a stage switches to its fast
+variant (Stage.fast) or, if it is skippable, is skipped (its outputs passed through).
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+COSTS_PATH = os.environ.get(
+    "ML_STAGE_COSTS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models", "stage_costs.json")
+)
+
+# Rows sampled for distinct-value estimates
+SAMPLE_ROWS = 5_000
+
+# Uncalibrated stages: cheap vectorized work
+DEFAULT_COSTS = {"intercept": 0.002, "per_row": 1e-6, "per_unique": 1e-5}
+
+FEATURES = ("intercept", "per_row", "per_unique")
+
+WRITE_KEY = "write_csv"
+
+
+# =========================
+# Features
+# =========================
+def estimate_distinct(values: pd.Series, rows: int) -> float:
+    """
+    Distinct values in a column of `rows` rows from a sample of it (the GEE
+    estimator: values seen once in the sample are scaled by sqrt(rows / n)).
+    """
+    n = len(values)
+    if n == 0:
+        return 0.0
+    counts = values.value_counts(dropna=True).to_numpy()
+    if n >= rows:
+        return float(len(counts))
+    singletons = int((counts == 1).sum())
+    return float(np.sqrt(rows / n) * singletons + (len(counts) - singletons))
+
+
+class FrameProfile:
+    """
+    Row count and per-column distinct estimates of one frame, computed
+    once per column from an evenly spaced sample.
+    """
+
+    def __init__(self, df: pd.DataFrame, sample_rows: int = SAMPLE_ROWS):
+        self.rows = len(df)
+        self.columns = len(df.columns)
+        step = max(1, self.rows // sample_rows)
+        self._sample = df.iloc[::step]
+        self._distinct = {}
+
+    def distinct(self, col) -> float:
+        if col not in self._distinct:
+            if col in self._sample.columns:
+                self._distinct[col] = estimate_distinct(self._sample[col], self.rows)
+            else:
+                # Written by an earlier stage: at most one value per row
+                self._distinct[col] = float(self.rows)
+        return self._distinct[col]
+
+    def uniques(self, columns) -> float:
+        return float(sum(self.distinct(c) for c in columns))
+
+
+# =========================
+# Model
+# =========================
+class CostModel:
+    """
+    Linear stage cost coefficients: {key: {"intercept", "per_row", "per_unique"}}.
+    """
+
+    def __init__(self, coefficients: dict | None = None, meta: dict | None = None):
+        self.coefficients = coefficients or {}
+        self.meta = meta or {}
+
+    @classmethod
+    def load(cls, path: str = COSTS_PATH) -> "CostModel":
+        if not os.path.exists(path):
+            print(f"No stage cost file at {path}; using default costs")
+            return cls()
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data.get("stages", {}), {k: v for k, v in data.items() if k != "stages"})
+
+    def save(self, path: str = COSTS_PATH):
+        data = dict(self.meta, stages=self.coefficients)
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+
+    def predict(self, key: str, rows: float, uniques: float) -> float:
+        coef = self.coefficients.get(key)
+        if coef is None and ":" in key:
+            # Uncalibrated fast variant: no cheaper than the full stage
+            coef = self.coefficients.get(key.split(":")[0])
+        coef = coef or DEFAULT_COSTS
+        return coef["intercept"] + coef["per_row"] * rows + coef["per_unique"] * uniques
+
+    def predict_stage(self, planned, profile: FrameProfile, mode: str | None = None) -> float:
+        mode = mode or planned.mode
+        key = planned.stage.name if mode == "full" else f"{planned.stage.name}:{mode}"
+        return self.predict(key, profile.rows, profile.uniques(planned.reads))
+
+    def predict_write(self, rows: int, columns: int) -> float:
+        return self.predict(WRITE_KEY, rows * columns, 0)
+
+    # ----------------------------------
+    # Fitting
+    # ----------------------------------
+    @staticmethod
+    def fit_coefficients(rows, uniques, seconds) -> dict:
+        """
+        Least squares with non-negative coefficients: negative terms are
+        dropped and the rest refitted (columns scaled for conditioning).
+        """
+        X = np.column_stack([np.ones(len(rows)), rows, uniques]).astype(float)
+        y = np.asarray(seconds, dtype=float)
+        scale = np.abs(X).max(axis=0)
+        scale[scale == 0] = 1.0
+        X = X / scale
+
+        active = list(range(X.shape[1]))
+        coef = np.zeros(X.shape[1])
+        while active:
+            solution = np.linalg.lstsq(X[:, active], y, rcond=None)[0]
+            if (solution >= 0).all():
+                coef[active] = solution
+                break
+            active = [a for a, c in zip(active, solution) if c > 0]
+        coef = coef / scale
+        return {name: float(value) for name, value in zip(FEATURES, coef)}
+
+    @classmethod
+    def fit(cls, samples, meta: dict | None = None) -> "CostModel":
+        """
+        samples: iterable of (key, rows, uniques, seconds).
+        """
+        grouped = {}
+        for key, rows, uniques, seconds in samples:
+            grouped.setdefault(key, []).append((rows, uniques, seconds))
+        coefficients = {
+            key: cls.fit_coefficients(*zip(*points))
+            for key, points in sorted(grouped.items())
+        }
+        return cls(coefficients, meta)
+
+
+_cost_model = None
+
+
+def get_cost_model() -> CostModel:
+    global _cost_model
+    if _cost_model is None:
+        _cost_model = CostModel.load()
+    return _cost_model
+
+
+# =========================
+# Latency budget
+# =========================
+def predict_plan(plan, df: pd.DataFrame, model: CostModel | None = None, profile: FrameProfile | None = None) -> dict:
+    """
+    Predicted seconds per planned stage, in its current mode.
+    Stages in a level are summed as if run one after another.
+    """
+    model = model or get_cost_model()
+    profile = profile or FrameProfile(df)
+    return {p.stage.name: model.predict_stage(p, profile) for p in plan.stages}
+
+
+def _degradations(planned, model: CostModel, profile: FrameProfile, current: float) -> list:
+    """
+    (saving, action, cost after) for the ways one stage can still be degraded.
+    """
+    options = []
+    if planned.stage.fast is not None and planned.mode == "full":
+        fast = model.predict_stage(planned, profile, "fast")
+        options.append((current - fast, "fast", fast))
+    if planned.stage.skippable:
+        options.append((current, "skipped", 0.0))
+    return options
+
+
+def fit_plan_to_budget(plan, df: pd.DataFrame, budget: float, model: CostModel | None = None):
+    """
+    Degrades plan in place until its predicted time fits budget seconds,
+    one stage at a time, biggest predicted saving first; on a tie the fast
+    variant wins over skipping. When even the fully degraded plan is over
+    budget it runs anyway: the budget says how much checking to drop, it is
+    not a deadline.
+
+    A skipped stage stays in the plan in "skipped" mode: it writes its output
+    columns with the values passed through (see Stage.passthrough).
+
+    Records plan.degraded ({stage: "fast" | "skipped"}) and plan.predicted.
+
+    Returns:
+        plan
+    """
+    model = model or get_cost_model()
+    profile = FrameProfile(df)
+    predicted = predict_plan(plan, df, model, profile)
+    by_name = {p.stage.name: p for p in plan.stages}
+
+    while sum(predicted.values()) > budget:
+        options = [
+            (saving, action == "fast", name, action, cost)
+            for name in predicted
+            for saving, action, cost in _degradations(by_name[name], model, profile, predicted[name])
+            if saving > 0
+        ]
+        if not options:
+            break
+        _, _, name, action, cost = max(options)
+        planned = by_name[name]
+        plan.degraded[name] = action
+        if action == "fast":
+            planned.mode = "fast"
+            predicted[name] = cost
+        else:
+            planned.mode = "skipped"
+            del predicted[name]
+            plan.skipped[name] = "latency budget"
+
+    plan.predicted = predicted
+    return plan
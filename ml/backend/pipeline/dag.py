@@ -0,0 +1,284 @@
+# backend/pipeline/dag.py
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Sequence
+
+import pandas as pd
+
+from .changelog import CHANGES_ATTR, text_changed_mask
+
+
+# =========================
+# Stage declaration
+# =========================
+@dataclass
+class Stage:
+    """
+    One pipeline step and the columns it touches.
+
+    - inputs / outputs: column names, or a callable(columns) -> list when they
+      depend on the frame (e.g. the detected revenue column)
+    - requires: columns that must all be present, or a callable(columns) -> bool
+    - default: False for opt-in stages that only run when named explicitly
+    - fast: cheaper approximation of func with the same outputs, used when a
+      latency budget degrades the stage (backend/pipeline/cost_model.py)
+    - skippable: the stage may be skipped to meet a latency budget; a skipped
+      stage still writes its outputs, passing its inputs through unchanged
+      and leaving new output columns missing
+    - passthrough: what a skipped stage runs instead, for new outputs that
+      have a cheap stand-in (full_address from the raw address parts)
+
+    func receives a frame holding only the stage's inputs and returns a frame
+    containing its outputs.
+    """
+    name: str
+    func: Callable[[pd.DataFrame], pd.DataFrame]
+    inputs: Sequence[str] | Callable = ()
+    outputs: Sequence[str] | Callable = ()
+    requires: Sequence[str] | Callable = ()
+    default: bool = True
+    fast: Callable[[pd.DataFrame], pd.DataFrame] | None = None
+    skippable: bool = False
+    passthrough: Callable[[pd.DataFrame], pd.DataFrame] | None = None
+
+    def reads(self, columns) -> list:
+        return list(self.inputs(columns)) if callable(self.inputs) else list(self.inputs)
+
+    def writes(self, columns) -> list:
+        return list(self.outputs(columns)) if callable(self.outputs) else list(self.outputs)
+
+    def applies(self, columns) -> bool:
+        if callable(self.requires):
+            return bool(self.requires(columns))
+        return all(c in columns for c in self.requires)
+
+
+@dataclass
+class PlannedStage:
+    stage: Stage
+    reads: list
+    writes: list
+    level: int = 0
+    # "full", "fast" to run stage.fast, or "skipped" to pass values through
+    mode: str = "full"
+    # Extra keyword arguments for this run of the stage function
+    params: dict = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        """
+        Stage name plus mode, as used by checkpoints and the cost model.
+        """
+        return self.stage.name if self.mode == "full" else f"{self.stage.name}:{self.mode}"
+
+
+@dataclass
+class PipelinePlan:
+    """
+    The stages chosen for one frame, grouped into levels.
+    Stages in the same level touch disjoint columns and may run concurrently.
+    """
+    stages: list = field(default_factory=list)
+    skipped: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)
+    # Counters a stage reports through result.attrs['stage_stats']
+    stats: dict = field(default_factory=dict)
+    # Stages loaded from a checkpoint instead of run
+    resumed: list = field(default_factory=list)
+    # Latency budget: {stage: "fast" | "skipped"} and predicted seconds per stage
+    degraded: dict = field(default_factory=dict)
+    predicted: dict = field(default_factory=dict)
+
+    @property
+    def levels(self) -> list:
+        grouped = {}
+        for planned in self.stages:
+            grouped.setdefault(planned.level, []).append(planned)
+        return [grouped[level] for level in sorted(grouped)]
+
+    def describe(self) -> dict:
+        return {
+            "levels": [[p.stage.name for p in level] for level in self.levels],
+            "stages": [
+                {
+                    "name": p.stage.name,
+                    "level": p.level,
+                    "reads": p.reads,
+                    "writes": p.writes,
+                    "mode": p.mode,
+                    "seconds": round(self.timings.get(p.stage.name, 0.0), 4)
+                }
+                for p in self.stages
+            ],
+            "skipped": self.skipped,
+            "stats": self.stats,
+            "resumed": self.resumed,
+            "degraded": self.degraded,
+            "predicted_seconds": {k: round(v, 4) for k, v in self.predicted.items()}
+        }
+
+
+# =========================
+# Planning
+# =========================
+def build_plan(stages: list, columns, outputs=None, include=None) -> PipelinePlan:
+    """
+    Chooses the stages to run for the given input columns.
+
+    1️⃣ Walk stages in declaration order, tracking which columns exist, and
+       drop stages whose required columns are absent.
+    2️⃣ If outputs are requested, walk backwards and keep only stages that
+       write a requested column or an input of a kept stage.
+    3️⃣ Assign levels from read/write conflicts with earlier kept stages.
+
+    include names opt-in stages (default=False) to add to the plan.
+    """
+    include = set(include or [])
+    plan = PipelinePlan()
+
+    available = set(columns)
+    candidates = []
+    for stage in stages:
+        if not stage.default and stage.name not in include:
+            plan.skipped[stage.name] = "opt-in stage not requested"
+            continue
+        if not stage.applies(available):
+            plan.skipped[stage.name] = "required columns missing"
+            continue
+        planned = PlannedStage(stage, stage.reads(available), stage.writes(available))
+        available.update(planned.writes)
+        candidates.append(planned)
+
+    if outputs is not None:
+        needed = set(outputs)
+        kept = []
+        for planned in reversed(candidates):
+            if planned.stage.name in include or needed.intersection(planned.writes):
+                kept.append(planned)
+                needed.update(planned.reads)
+            else:
+                plan.skipped[planned.stage.name] = "outputs not requested"
+        candidates = list(reversed(kept))
+
+    for i, planned in enumerate(candidates):
+        reads, writes = set(planned.reads), set(planned.writes)
+        for earlier in candidates[:i]:
+            conflict = (
+                writes.intersection(earlier.reads)
+                or writes.intersection(earlier.writes)
+                or reads.intersection(earlier.writes)
+            )
+            if conflict:
+                planned.level = max(planned.level, earlier.level + 1)
+
+    plan.stages = candidates
+    return plan
+
+
+# =========================
+# Execution
+# =========================
+def _pass_through(frame: pd.DataFrame, writes: list) -> pd.DataFrame:
+    """
+    Output of a skipped stage: columns it would rewrite keep their values,
+    columns it would add are written empty, so the output schema does not
+    depend on the latency budget.
+    """
+    return frame.assign(**{col: None for col in writes if col not in frame.columns})
+
+
+def _run_stage(planned: PlannedStage, frame: pd.DataFrame):
+    started = time.perf_counter()
+    if planned.mode == "skipped":
+        if planned.stage.passthrough is not None:
+            frame = planned.stage.passthrough(frame)
+        result = _pass_through(frame, planned.writes)
+        return result, time.perf_counter() - started
+    func = planned.stage.fast if planned.mode == "fast" else planned.stage.func
+    result = func(frame, **planned.params)
+    return result, time.perf_counter() - started
+
+
+def execute_plan(df: pd.DataFrame, plan: PipelinePlan, max_workers: int | None = None,
+                 checkpoint=None, change_log=None) -> pd.DataFrame:
+    """
+    Runs the plan level by level.
+    Each stage gets its own frame of input columns, so stages in a level never
+    see each other's writes; outputs are merged back once the level is done.
+    Column order matches running the stages one after another.
+
+    With a StageCheckpoint (backend/pipeline/checkpoint.py), each finished
+    level's output columns are saved, and levels already saved for the same
+    input rows are loaded instead of run.
+
+    With a ChangeLog (backend/pipeline/changelog.py), every existing column a
+    stage rewrites is logged cell by cell as it is merged back.
+    """
+    if max_workers is None:
+        max_workers = min(4, os.cpu_count() or 1)
+    if checkpoint is not None:
+        checkpoint.bind(df)
+
+    order = list(df.columns)
+    resuming = checkpoint is not None
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        for index, level in enumerate(plan.levels):
+            names = [p.key for p in level]
+            # Only a prefix of saved levels is reused; later ones saw other inputs
+            resuming = resuming and checkpoint.completed(index, names)
+            if resuming:
+                saved, stats = checkpoint.load(index, df.index)
+                changes = checkpoint.load_changes(index) if change_log is not None else None
+                if changes is not None:
+                    # The saved records, not a diff against values read back as text
+                    change_log.replay(changes)
+                for planned in level:
+                    for col in planned.writes:
+                        if col not in saved.columns:
+                            continue
+                        if changes is None and change_log is not None and col in df.columns:
+                            before, after = df[col], saved[col]
+                            change_log.record_stage(planned.stage.name, col, before, after,
+                                                    (text_changed_mask(before, after), None))
+                        df[col] = saved[col]
+                plan.stats.update(stats)
+                plan.resumed.extend(p.stage.name for p in level)
+                continue
+
+            inputs = [df[[c for c in p.reads if c in df.columns]] for p in level]
+            logged = change_log.mark() if change_log is not None else None
+
+            if len(level) == 1 or max_workers <= 1:
+                results = [_run_stage(p, frame) for p, frame in zip(level, inputs)]
+            else:
+                futures = [pool.submit(_run_stage, p, frame) for p, frame in zip(level, inputs)]
+                results = [f.result() for f in futures]
+
+            for planned, (result, seconds) in zip(level, results):
+                plan.timings[planned.stage.name] = seconds
+                if "stage_stats" in result.attrs:
+                    plan.stats[planned.stage.name] = result.attrs.pop("stage_stats")
+                reported = result.attrs.pop(CHANGES_ATTR, {})
+                for col in planned.writes:
+                    if col in result.columns:
+                        if change_log is not None and col in df.columns:
+                            change_log.record_stage(
+                                planned.stage.name, col, df[col], result[col].reindex(df.index), reported.get(col)
+                            )
+                        df[col] = result[col]
+
+            if checkpoint is not None:
+                written = [c for p in level for c in p.writes if c in df.columns]
+                checkpoint.save(index, names, df[list(dict.fromkeys(written))],
+                                {p.stage.name: plan.stats[p.stage.name] for p in level if p.stage.name in plan.stats},
+                                None if change_log is None else change_log.since(logged))
+
+    for planned in plan.stages:
+        for col in planned.writes:
+            if col in df.columns and col not in order:
+                order.append(col)
+
+    return df[order]
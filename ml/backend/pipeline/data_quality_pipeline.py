@@ -2,8 +2,6 @@
 
 import pandas as pd
 import numpy as np
-import tldextract
-import pycountry
 import re
 
 from ..preprocessing.missing_values import (
@@ -13,21 +11,26 @@ from ..preprocessing.missing_values import (
     fill_company_name,
     fill_website,
     fill_head_office_country,
-    fill_company_age
+    fill_company_age,
+    REVENUE_POOL_COLUMNS
 )
 
 from ..preprocessing.normalization import (
     normalize_revenue_column,
     normalize_address,
+    join_address,
     normalize_founded_date,
     normalize_location_type
 )
 from ..preprocessing.validation import (
     validate_company_name,
     validate_email,
+    validate_email_series,
     validate_phone,
+    validate_phone_series,
     validate_industry,
     validate_country,
+    validate_country_series,
     validate_company_age,
     validate_domain,
     validate_first_name,
@@ -36,50 +39,84 @@ from ..preprocessing.validation import (
     validate_job_title
 )
 
+from ..preprocessing.phone import region_from_country_series, get_country_name_from_region
+from ..preprocessing.countries import get_country_index
+from ..preprocessing.industry import normalize_industry_series
 from ..preprocessing.role_mapping import map_role_function
+from ..preprocessing.confidence import add_lead_confidence, SCORE_COLUMN
 from ..preprocessing.text_processing import (
     apply_spelling_corrections,
 )
+from .changelog import report_changes, changed_mask
+from .cost_model import fit_plan_to_budget
+from .dag import Stage, PipelinePlan, build_plan, execute_plan
+
+_tld_extractor = None
+
+def get_tld_extractor():
+    """
+    tldextract extractor built from the bundled public suffix snapshot,
+    so workers never fetch the list over the network.
+    """
+    global _tld_extractor
+    if _tld_extractor is None:
+        import tldextract
+        _tld_extractor = tldextract.TLDExtract(suffix_list_urls=())
+    return _tld_extractor
 
 def extract_domain_from_website_series(websites: pd.Series) -> pd.Series:
+    extract = get_tld_extractor()
     domains = []
     for ws in websites:
         if pd.isna(ws) or str(ws).strip().lower() in ['', 'not provided', 'unknown']:
             domains.append(None)
             continue
         try:
-            ext = tldextract.extract(str(ws))
+            ext = extract(str(ws))
             domain = f"{ext.domain}.{ext.suffix}" if ext.suffix else ext.domain
             domains.append(domain)
         except:
             domains.append(None)
     return pd.Series(domains, index=websites.index)
 
-def get_country_from_phone_series(phones: pd.Series) -> pd.Series:
-    # Basic logic for country inference from phone (can be expanded)
-    return pd.Series([None] * len(phones), index=phones.index)
+def get_country_from_phone_series(phones: pd.Series, region_hints: pd.Series | None = None) -> pd.Series:
+    """
+    Country name per phone number: calling-code trie for international
+    numbers, parsed region for numbers valid under the region hint.
+    """
+    regions = validate_phone_series(phones, region_hints)["region"]
+    return get_country_name_from_region(regions)
 
 def get_country_from_website_series(websites: pd.Series) -> pd.Series:
+    """
+    Country name from a two-letter top-level domain (example.de -> Germany),
+    extracted and looked up once per unique website.
+    """
+    extract = get_tld_extractor()
+    index = get_country_index()
+
+    codes, uniques = pd.factorize(websites)
     countries = []
-    for website in websites:
-        if pd.isna(website) or str(website).strip().lower() in ['', 'not provided', 'unknown']:
+    for website in uniques:
+        if str(website).strip().lower() in ['', 'not provided', 'unknown']:
             countries.append(None)
             continue
         try:
-            extracted = tldextract.extract(str(website))
+            extracted = extract(str(website))
             tld = extracted.suffix.split('.')[-1] if extracted.suffix else ''
-            if len(tld) == 2:
-                country = pycountry.countries.get(alpha_2=tld.upper())
-                countries.append(country.name if country else None)
-            else:
-                countries.append(None)
-        except:
+            countries.append(index.name(tld.upper()) if len(tld) == 2 else None)
+        except Exception:
             countries.append(None)
-    return pd.Series(countries, index=websites.index)
+    countries = np.array(countries + [None], dtype=object)
+    return pd.Series(countries[codes], index=websites.index)
 
 def infer_country_vectorized(df: pd.DataFrame) -> pd.Series:
+    region_hints = None
+    if 'head_office_country' in df.columns:
+        region_hints = region_from_country_series(df['head_office_country'])
     country_from_phone = get_country_from_phone_series(
-        df.get('company_phone', pd.Series([None] * len(df)))
+        df.get('company_phone', pd.Series([None] * len(df), index=df.index)),
+        region_hints
     )
     website_field = (
         df['domain'] if 'domain' in df.columns
@@ -92,37 +129,118 @@ def infer_country_vectorized(df: pd.DataFrame) -> pd.Series:
         .fillna('Unknown Country')
     )
 
-def run_data_quality_pipeline(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+# =========================
+# Stage functions
+# =========================
+def _revenue_inputs(columns):
+    revenue_col = get_revenue_column(pd.DataFrame(columns=sorted(columns)))
+    return [revenue_col, "company_size", "industry", "country"]
+
+
+def _revenue_outputs(columns):
+    revenue_col = get_revenue_column(pd.DataFrame(columns=sorted(columns)))
+    return [revenue_col, f"{revenue_col}_source", f"{revenue_col}_confidence"]
+
+
+def _has_revenue_column(columns):
+    return get_revenue_column(pd.DataFrame(columns=sorted(columns))) is not None
+
+
+# Revenue text already written as a plain number ("1350000", "2.5")
+PLAIN_NUMBER = r"-?\d+(?:\.\d+)?"
 
-    # 1️⃣ Revenue handling
+
+def _same_number(before: pd.Series, after: pd.Series) -> np.ndarray:
+    """
+    Rows whose original was plain numeric text (or a number) with the same
+    value as the parsed one: "1350000" -> 1350000.0 is not a change, while
+    "980k" or "2,100,000" are.
+    """
+    text = before.astype(object).where(before.notna(), None).astype("string")
+    plain = text.str.fullmatch(PLAIN_NUMBER).fillna(False).to_numpy(dtype=bool)
+    old = pd.to_numeric(text, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    new = pd.to_numeric(after, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return plain & (old == new)
+
+
+def handle_revenue(df: pd.DataFrame, use_model: bool = True, pool: pd.DataFrame | None = None) -> pd.DataFrame:
     revenue_col = get_revenue_column(df)
+    before = df[revenue_col].copy() if revenue_col else None
     if revenue_col:
         df = normalize_revenue_column(df, revenue_col)
-    df = impute_annual_revenue(df)
+    df = impute_annual_revenue(df, use_model=use_model, pool=pool)
+    source_col = f"{revenue_col}_source"
+    if source_col in df.columns:
+        # Imputed cells are logged with their method; the rest only when
+        # parsing changed the value ("$1.2M" -> 1200000), not its format
+        source = df[source_col].to_numpy(dtype=object)
+        after = df[revenue_col]
+        mask = changed_mask(before, after) & ~((source == "original") & _same_number(before, after))
+        report_changes(df, revenue_col, mask, reason=np.where(source == "original", "normalize_revenue", source))
+    return df
 
-    # 2️⃣ Missing values
-    df = fill_company_name(df)
-    df = fill_contact_fields(df)
-    df = fill_website(df)
-    df = fill_company_age(df)
 
-    if 'industry' in df.columns:
-        df['industry'] = df['industry'].fillna('Unknown Industry')
+def handle_revenue_fast(df: pd.DataFrame, pool: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Group medians only, no regression model.
+    """
+    return handle_revenue(df, use_model=False, pool=pool)
+
+
+def revenue_pool_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One file's known revenues, parsed and with industries normalized the way
+    the pipeline prepares them before the revenue stage, as
+    REVENUE_POOL_COLUMNS rows for impute_annual_revenue(pool=...).
+    """
+    revenue_col = get_revenue_column(df)
+    if revenue_col is None:
+        return pd.DataFrame(columns=REVENUE_POOL_COLUMNS)
+    rows = df[[c for c in REVENUE_POOL_COLUMNS[1:] if c in df.columns]].copy()
+    rows['revenue'] = pd.to_numeric(
+        normalize_revenue_column(df[[revenue_col]].copy(), revenue_col)[revenue_col], errors='coerce'
+    )
+    if 'industry' in rows.columns:
+        rows['industry'] = normalize_industry_series(rows['industry'])[0]
+    return rows[rows['revenue'].notna()].reindex(columns=REVENUE_POOL_COLUMNS)
 
-    if 'head_office_country' in df.columns:
-        df['head_office_country'] = (
-            df['head_office_country']
-            .replace(['', '-', 'nan', 'NaN'], pd.NA)
-            .fillna('Not Specified')
-        )
-    else:
-        df = fill_head_office_country(df)
 
-    # 3️⃣ Domain handling
+def normalize_industry(df: pd.DataFrame, fuzzy: bool = True) -> pd.DataFrame:
+    """
+    Folds free-text industries onto the taxonomy so revenue group medians
+    see one key per industry. Unique counts and throughput go to the plan.
+    """
+    df['industry'], stats, changed = normalize_industry_series(df['industry'], return_changed=True, fuzzy=fuzzy)
+    df.attrs['stage_stats'] = stats
+    report_changes(df, 'industry', changed)
+    return df
+
+
+def normalize_industry_fast(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Exact variants only, no fuzzy match.
+    """
+    return normalize_industry(df, fuzzy=False)
+
+
+def fill_industry(df: pd.DataFrame) -> pd.DataFrame:
+    missing = df['industry'].isna()
+    df['industry'] = df['industry'].fillna('Unknown Industry')
+    report_changes(df, 'industry', missing)
+    return df
+
+
+def clean_head_office_country(df: pd.DataFrame) -> pd.DataFrame:
+    cleared = df['head_office_country'].replace(['', '-', 'nan', 'NaN'], pd.NA)
+    df['head_office_country'] = cleared.fillna('Not Specified')
+    report_changes(df, 'head_office_country', cleared.isna())
+    return df
+
+
+def handle_domain(df: pd.DataFrame) -> pd.DataFrame:
     if 'domain' not in df.columns:
         df['domain'] = extract_domain_from_website_series(
-            df.get('website', pd.Series([None] * len(df)))
+            df.get('website', pd.Series([None] * len(df), index=df.index))
         )
     else:
         mask = df['domain'].isna()
@@ -131,50 +249,302 @@ def run_data_quality_pipeline(df: pd.DataFrame) -> pd.DataFrame:
                 df.loc[mask, 'website']
             )
         df['domain'] = df['domain'].fillna('Unknown Domain')
+    return df
+
+
+def add_inferred_country(df: pd.DataFrame) -> pd.DataFrame:
+    df['inferred_country'] = infer_country_vectorized(df)
+    return df
+
+
+def fill_default(col: str, default: str):
+    def fill(df: pd.DataFrame) -> pd.DataFrame:
+        missing = df[col].isna()
+        df[col] = df[col].fillna(default)
+        report_changes(df, col, missing)
+        return df
+    return fill
+
+
+def normalize_addresses(df: pd.DataFrame) -> pd.DataFrame:
+    address_cols = [c for c in ADDRESS_COLUMNS if c in df.columns]
+    return normalize_address(df, address_cols)
+
+
+def join_addresses(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    normalize_address skipped for a latency budget: full_address is still
+    written, from the parts as uploaded.
+    """
+    address_cols = [c for c in ADDRESS_COLUMNS if c in df.columns]
+    return join_address(df, address_cols)
+
+
+def validate_column(col: str, val_func):
+    def validate(df: pd.DataFrame) -> pd.DataFrame:
+        # Apply validation and store results
+        # Result is a tuple (is_valid, issue_string)
+        results = df[col].apply(lambda x: val_func(x))
+        df[f"{col}_status"] = results.apply(lambda x: "VALID" if x[0] else "INVALID")
+        df[f"{col}_issue"] = results.apply(lambda x: x[1])
+        return df
+    return validate
+
+
+def validate_email_column(col: str):
+    def validate(df: pd.DataFrame) -> pd.DataFrame:
+        results = validate_email_series(df[col])
+        df[f"{col}_status"] = results["is_valid"].map({True: "VALID", False: "INVALID"})
+        df[f"{col}_issue"] = results["issue"]
+        df[f"{col}_suggested"] = results["suggested"]
+        return df
+    return validate
+
+
+def validate_country_column(col: str, fuzzy: bool = True):
+    def validate(df: pd.DataFrame) -> pd.DataFrame:
+        results = validate_country_series(df[col], fuzzy)
+        df[f"{col}_status"] = results["is_valid"].map({True: "VALID", False: "INVALID"})
+        df[f"{col}_issue"] = results["issue"]
+        df[f"{col}_iso"] = results["iso"]
+        return df
+    return validate
+
+
+def map_role_function_fast(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rules only, no classifier.
+    """
+    return map_role_function(df, use_classifier=False)
+
+
+def validate_phone_column(col: str):
+    def validate(df: pd.DataFrame) -> pd.DataFrame:
+        region_hints = None
+        if 'head_office_country' in df.columns:
+            region_hints = region_from_country_series(df['head_office_country'])
+        results = validate_phone_series(df[col], region_hints)
+        df[f"{col}_status"] = results["is_valid"].map({True: "VALID", False: "INVALID"})
+        df[f"{col}_issue"] = results["issue"]
+        df[f"{col}_e164"] = results["e164"]
+        return df
+    return validate
+
+
+ADDRESS_COLUMNS = ['address_1', 'address_2', 'address_3']
+CONTACT_COLUMNS = ['email', 'phone', 'phone_number', 'company_email']
+SPELLING_COLUMNS = ['country', 'industry', 'title', 'role_function']
+
+DEFAULT_FILLS = [
+    ('jobtitle', 'Unknown'),
+    ('title', 'Not Provided'),
+    ('person_name', 'Unknown Person'),
+    ('company_size', 'Unknown')
+]
+
+VALIDATION_MAP = [
+    ('company_name', validate_company_name),
+    ('email', validate_email),
+    ('company_phone', validate_phone),
+    ('industry', validate_industry),
+    ('head_office_country', validate_country),
+    ('country', validate_country),
+    ('company_age', validate_company_age),
+    ('domain', validate_domain),
+    ('first_name', validate_first_name),
+    ('middle_name', validate_middle_name),
+    ('last_name', validate_last_name),
+    ('jobtitle', validate_job_title)
+]
+
+
+def _present(candidates):
+    return lambda columns: [c for c in candidates if c in columns]
+
+
+def _any_present(candidates):
+    return lambda columns: any(c in columns for c in candidates)
+
+
+def build_pipeline_stages() -> list:
+    """
+    Declares every cleaning step with the columns it reads and writes.
+    Order matters: it is the order the steps would run in sequentially.
+
+    Stages with a fast variant, or marked skippable, are the ones a latency
+    budget may degrade (backend/pipeline/cost_model.py).
+    """
+    stages = [
+        # 0️⃣ Industry taxonomy (before revenue imputation groups by it)
+        Stage('normalize_industry', normalize_industry, ['industry'], ['industry'], ['industry'],
+              fast=normalize_industry_fast),
+
+        # 1️⃣ Revenue handling
+        Stage('revenue', handle_revenue, _revenue_inputs, _revenue_outputs, _has_revenue_column,
+              fast=handle_revenue_fast),
+
+        # 2️⃣ Missing values
+        Stage('fill_company_name', fill_company_name, ['company_name'], ['company_name'], ['company_name']),
+        Stage('fill_contact_fields', fill_contact_fields,
+              _present(CONTACT_COLUMNS), _present(CONTACT_COLUMNS), _any_present(CONTACT_COLUMNS)),
+        Stage('fill_website', fill_website, ['website'], ['website'], ['website']),
+        Stage('fill_company_age', fill_company_age,
+              _present(['founded_date', 'company_age']), _present(['founded_date', 'company_age']),
+              _any_present(['founded_date', 'company_age'])),
+        Stage('fill_industry', fill_industry, ['industry'], ['industry'], ['industry']),
+        Stage('fill_head_office_country', clean_head_office_country,
+              ['head_office_country'], ['head_office_country'], ['head_office_country']),
+
+        # 3️⃣ Domain handling
+        Stage('domain', handle_domain, _present(['domain', 'website']), ['domain']),
+        Stage('infer_country', add_inferred_country,
+              _present(['company_phone', 'domain', 'website', 'head_office_country']), ['inferred_country'],
+              default=False),
+    ]
 
     # 4️⃣ Defaults
-    for col, default in [
-        ('jobtitle', 'Unknown'),
-        ('title', 'Not Provided'),
-        ('person_name', 'Unknown Person'),
-        ('company_size', 'Unknown')
-    ]:
-        if col in df.columns:
-            df[col] = df[col].fillna(default)
-
-    # 5️⃣ Address normalization
-    address_cols = [c for c in ['address_1', 'address_2', 'address_3'] if c in df.columns]
-    if address_cols:
-        df = normalize_address(df, address_cols)
-
-    # 6️⃣ Founded date normalization
-    if 'founded_date' in df.columns:
-        df = normalize_founded_date(df)
+    for col, default in DEFAULT_FILLS:
+        stages.append(Stage(f'fill_{col}', fill_default(col, default), [col], [col], [col]))
 
-    # 7️⃣ Validation and Status Columns
-    validation_map = [
-        ('company_name', validate_company_name),
-        ('email', validate_email),
-        ('company_phone', validate_phone),
-        ('industry', validate_industry),
-        ('head_office_country', validate_country),
-        ('company_age', validate_company_age),
-        ('domain', validate_domain),
-        ('first_name', validate_first_name),
-        ('middle_name', validate_middle_name),
-        ('last_name', validate_last_name),
-        ('jobtitle', validate_job_title)
+    stages += [
+        Stage('map_role_function', map_role_function, ['jobtitle'],
+              ['role_description', 'role_description_confidence'], ['jobtitle'], default=False,
+              fast=map_role_function_fast),
+        Stage('spelling_corrections', apply_spelling_corrections,
+              _present(SPELLING_COLUMNS), _present(SPELLING_COLUMNS), _any_present(SPELLING_COLUMNS), default=False,
+              skippable=True),
+
+        # 5️⃣ Address normalization
+        Stage('normalize_address', normalize_addresses,
+              _present(ADDRESS_COLUMNS), lambda columns: _present(ADDRESS_COLUMNS)(columns) + ['full_address'],
+              _any_present(ADDRESS_COLUMNS), skippable=True, passthrough=join_addresses),
+        Stage('normalize_location_type', normalize_location_type,
+              ['location_type'], ['location_type'], ['location_type'], default=False),
+
+        # 6️⃣ Founded date normalization
+        Stage('normalize_founded_date', normalize_founded_date, ['founded_date'], ['founded_date'], ['founded_date'],
+              skippable=True),
     ]
 
-    for col, val_func in validation_map:
-        if col in df.columns:
-            status_col = f"{col}_status"
-            issue_col = f"{col}_issue"
-            
-            # Apply validation and store results
-            # Result is a tuple (is_valid, issue_string)
-            results = df[col].apply(lambda x: val_func(x))
-            df[status_col] = results.apply(lambda x: "VALID" if x[0] else "INVALID")
-            df[issue_col] = results.apply(lambda x: x[1])
+    # 7️⃣ Validation and Status Columns
+    for col, val_func in VALIDATION_MAP:
+        if val_func is validate_phone:
+            # Batch parsing, with head_office_country as the region hint
+            stages.append(Stage(
+                f'validate_{col}', validate_phone_column(col),
+                _present([col, 'head_office_country']),
+                [f"{col}_status", f"{col}_issue", f"{col}_e164"], [col]
+            ))
+            continue
+        if val_func is validate_email:
+            # Batch check, with one domain-typo lookup per distinct domain
+            stages.append(Stage(
+                f'validate_{col}', validate_email_column(col),
+                [col], [f"{col}_status", f"{col}_issue", f"{col}_suggested"], [col]
+            ))
+            continue
+        if val_func is validate_country:
+            # Index lookup per distinct value, plus the ISO code as a categorical
+            stages.append(Stage(
+                f'validate_{col}', validate_country_column(col),
+                [col], [f"{col}_status", f"{col}_issue", f"{col}_iso"], [col],
+                fast=validate_country_column(col, fuzzy=False)
+            ))
+            continue
+        stages.append(Stage(
+            f'validate_{col}', validate_column(col, val_func),
+            [col], [f"{col}_status", f"{col}_issue"], [col]
+        ))
+
+    # 8️⃣ Lead confidence (reads every field and status column, so it runs last)
+    stages.append(Stage(
+        'lead_confidence', add_lead_confidence,
+        lambda columns: sorted(columns, key=str), [SCORE_COLUMN], default=False
+    ))
+
+    return stages
+
+
+PIPELINE_STAGES = build_pipeline_stages()
+
+
+def stage_selection(include=None, outputs=None) -> tuple:
+    """
+    include / outputs as a request sends them: a list of names, one
+    comma-separated string, or nothing. include must name pipeline stages.
+
+    Returns:
+        (include, outputs), each a list or None
+    Raises ValueError naming the problem, for a 400.
+    """
+    def as_list(value, field):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = [name.strip() for name in value.split(",") if name.strip()]
+        if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+            raise ValueError(f"{field} must be a list of names")
+        return value or None
+
+    include, outputs = as_list(include, "include"), as_list(outputs, "outputs")
+    if include:
+        known = [stage.name for stage in PIPELINE_STAGES]
+        unknown = [name for name in include if name not in known]
+        if unknown:
+            raise ValueError(f"Unknown stages in include: {unknown}; stages are {known}")
+    return include, outputs
+
+
+def plan_data_quality_pipeline(df: pd.DataFrame, outputs=None, include=None) -> PipelinePlan:
+    """
+    Builds the stage plan for df without running it.
+    """
+    return build_plan(PIPELINE_STAGES, df.columns, outputs=outputs, include=include)
+
+
+def run_data_quality_pipeline(
+    df: pd.DataFrame,
+    outputs: list | None = None,
+    include: list | None = None,
+    max_workers: int | None = None,
+    return_plan: bool = False,
+    checkpoint=None,
+    change_log=None,
+    latency_budget: float | None = None,
+    revenue_pool: pd.DataFrame | None = None
+):
+    """
+    Runs the cleaning stages needed for df.
+
+    Args:
+        df: Input DataFrame
+        outputs: Only compute these columns, e.g. ['email_status', 'company_phone_status']
+                 (default: every applicable stage)
+        include: Opt-in stages to add, e.g. ['map_role_function', 'infer_country']
+        max_workers: Threads for running independent stages together
+        return_plan: Also return the executed PipelinePlan
+        checkpoint: StageCheckpoint to save finished levels to and resume from
+        change_log: ChangeLog to record every changed cell in
+        latency_budget: Target seconds for the stages; the cost model switches
+                        expensive stages to fast variants or skips them until
+                        the prediction fits (see plan.degraded)
+        revenue_pool: Known revenues of related files (revenue_pool_rows()) that
+                      revenue imputation fits its statistics on together with df
+
+    Returns:
+        Cleaned DataFrame, or (DataFrame, PipelinePlan) if return_plan
+    """
+    df = df.copy()
+
+    plan = plan_data_quality_pipeline(df, outputs=outputs, include=include)
+    if latency_budget is not None:
+        fit_plan_to_budget(plan, df, latency_budget)
+    if revenue_pool is not None:
+        for planned in plan.stages:
+            if planned.stage.name == 'revenue':
+                planned.params['pool'] = revenue_pool
+    df = execute_plan(df, plan, max_workers=max_workers, checkpoint=checkpoint, change_log=change_log)
 
+    if return_plan:
+        return df, plan
     return df
@@ -0,0 +1,102 @@
+# backend/preload.py
+"""
+Loads heavy dependencies and reference tables ahead of the first request.
+
+Preprocessing modules import their heavy dependencies lazily, so importing
+the pipeline stays cheap for the CLI, Streamlit and tests. A server instead
+calls preload() once in the master process before forking workers, so the
+loaded modules and tables are shared copy-on-write.
+"""
+import time
+
+_PRELOADERS = []
+_state = {"ready": False, "timings": {}}
+
+
+def preloader(name):
+    """
+    Registers a function to run in preload().
+    """
+    def register(func):
+        _PRELOADERS.append((name, func))
+        return func
+    return register
+
+
+@preloader("scikit-learn")
+def _load_sklearn():
+    import sklearn.compose
+    import sklearn.linear_model
+    import sklearn.pipeline
+    import sklearn.preprocessing
+
+
+@preloader("public suffix list")
+def _load_suffix_list():
+    from .pipeline.data_quality_pipeline import get_tld_extractor
+    get_tld_extractor()("www.example.co.uk")
+
+
+@preloader("country index")
+def _load_countries():
+    from .preprocessing.countries import get_country_index
+    get_country_index()
+
+
+@preloader("industry index")
+def _load_industry_index():
+    from .preprocessing.industry import get_industry_index
+    get_industry_index()
+
+
+@preloader("phone metadata")
+def _load_phone_metadata():
+    import phonenumbers
+    from phonenumbers.phonemetadata import PhoneMetadata
+    from .preprocessing.phone import get_calling_code_trie
+
+    get_calling_code_trie()
+    for region in phonenumbers.SUPPORTED_REGIONS:
+        PhoneMetadata.metadata_for_region(region)
+
+
+@preloader("role maps")
+def _load_role_maps():
+    from .preprocessing import role_mapping
+    from .preprocessing import text_processing
+    from .preprocessing.role_classifier import get_role_classifier
+    get_role_classifier()
+
+
+@preloader("spell checker")
+def _load_spell_checker():
+    from .preprocessing.text_processing import get_spell_checker
+    get_spell_checker()
+
+
+def preload(skip=()) -> dict:
+    """
+    Runs every registered preloader.
+
+    Args:
+        skip: names of preloaders to leave lazy (e.g. {"spell checker"})
+
+    Returns:
+        {name: seconds}
+    """
+    for name, func in _PRELOADERS:
+        if name in skip:
+            continue
+        started = time.perf_counter()
+        func()
+        _state["timings"][name] = round(time.perf_counter() - started, 3)
+    _state["ready"] = True
+    return dict(_state["timings"])
+
+
+def is_ready() -> bool:
+    return _state["ready"]
+
+
+def preload_timings() -> dict:
+    return dict(_state["timings"])
@@ -0,0 +1,677 @@
+# backend/preprocessing/anomalies.py
+import os
+import shutil
+import tempfile
+import weakref
+
+import pandas as pd
+import numpy as np
+
+from .missing_values import get_revenue_column
+
+# Modified z-score cut-off (Iglewicz & Hoaglin)
+ROBUST_Z_THRESHOLD = 3.5
+
+# Peer groups smaller than this are scored against the whole column
+MIN_GROUP_SIZE = 10
+
+# Columns that define peer groups, matched on the lower-cased name
+GROUP_COLUMNS = ("industry", "company_size")
+
+# Numeric-looking columns that are identifiers, not measurements
+IDENTIFIER_KEYWORDS = ("phone", "mobile", "fax", "zip", "post_code", "postcode")
+
+# Metadata the pipeline writes next to imputed columns
+DERIVED_SUFFIXES = ("_confidence",)
+
+# Consistency slack between company_age and founded_date (years)
+AGE_TOLERANCE_YEARS = 1
+
+# Share of rows whose age and founded_date must agree on one reference year
+# before AGE_MISMATCH is checked at all
+AGE_REFERENCE_MIN_SHARE = 0.5
+
+# Values sampled per peer group and column (and per whole column) for the
+# medians of chunked jobs; smaller groups are kept whole, so exact
+GROUP_SAMPLE_SIZE = 2_000
+COLUMN_SAMPLE_SIZE = 100_000
+
+# Per-row output columns: flag, and "<column>:<RULE>" reasons (OUTLIER for
+# a robust z-score over the threshold), comma separated
+FLAG_COLUMN = "is_anomaly"
+REASON_COLUMN = "anomaly_reason"
+OUTLIER = "OUTLIER"
+
+# Scale factors behind MAD and mean absolute deviation for normal data
+MAD_SCALE = 0.6745
+MEAN_AD_SCALE = 1.253314
+
+
+# -----------------------------
+# Column selection
+# -----------------------------
+def _is_identifier(col) -> bool:
+    name = str(col)
+    lower = name.lower()
+    return (
+        lower == "id"
+        or lower.endswith("_id")
+        or name.endswith(("ID", "Id"))
+        or lower.endswith(DERIVED_SUFFIXES)
+        or any(k in lower for k in IDENTIFIER_KEYWORDS)
+    )
+
+
+def _parse_numbers(text: pd.Series) -> pd.Series:
+    text = text.astype("string").str.strip().str.lower().str.replace(",", "", regex=False)
+    suffix = text.str[-1]
+    scale = suffix.map({"k": 1_000, "m": 1_000_000}).astype("float64").fillna(1.0)
+    number = text.where(~suffix.isin(["k", "m"]), text.str[:-1])
+    return (pd.to_numeric(number, errors="coerce") * scale).astype("float64")
+
+
+def _to_number(series: pd.Series, min_numeric_ratio: float = 0.0, probe: int = 200) -> pd.Series | None:
+    """
+    Vectorized numeric parse: commas, and k / m suffixes (980k, 1.2M).
+    Anything else becomes NaN. Text is parsed once per distinct value.
+
+    Returns None when fewer than min_numeric_ratio of the values parse; the
+    first probe distinct values are checked before the rest are touched, so
+    name / email columns are rejected cheaply.
+    """
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return None if min_numeric_ratio > 0 else pd.Series(np.nan, index=series.index)
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.astype("float64")
+
+    codes, uniques = pd.factorize(series)
+    if min_numeric_ratio > 0 and len(uniques) > probe:
+        if _parse_numbers(pd.Series(uniques[:probe])).notna().mean() < min_numeric_ratio:
+            return None
+
+    parsed = np.append(_parse_numbers(pd.Series(uniques)).to_numpy(), np.nan)
+    values = pd.Series(parsed[codes], index=series.index)
+    non_null = (codes >= 0).sum()
+    if min_numeric_ratio > 0 and values.notna().sum() < min_numeric_ratio * non_null:
+        return None
+    return values
+
+
+def get_group_columns(df: pd.DataFrame) -> list:
+    return [c for c in df.columns if str(c).lower() in GROUP_COLUMNS]
+
+
+def numeric_anomaly_columns(df: pd.DataFrame, min_numeric_ratio: float = 0.8) -> dict:
+    """
+    Columns to score, parsed to float64.
+    A text column qualifies when most of its non-null values parse as numbers
+    (fill labels such as 'Unknown' become NaN).
+
+    Returns:
+    {column: float64 Series}
+    """
+    group_cols = set(get_group_columns(df))
+    numeric = {}
+    for col in df.columns:
+        if col in group_cols or _is_identifier(col) or df[col].notna().sum() == 0:
+            continue
+        parsed = _to_number(df[col], min_numeric_ratio)
+        if parsed is not None:
+            numeric[col] = parsed
+    return numeric
+
+
+# -----------------------------
+# Robust z-scores
+# -----------------------------
+def _group_keys(df: pd.DataFrame, group_cols: list) -> tuple:
+    """
+    (codes, distinct keys) of the peer groups; keys are tuples of the
+    stripped, lower-cased group values.
+    """
+    keys = [df[c].astype("string").str.strip().str.lower().fillna("") for c in group_cols]
+    return pd.MultiIndex.from_arrays(keys).factorize()
+
+
+def _group_codes(df: pd.DataFrame, group_cols: list) -> np.ndarray:
+    if not group_cols:
+        return np.zeros(len(df), dtype=np.intp)
+    return _group_keys(df, group_cols)[0]
+
+
+def _spread(abs_dev: pd.DataFrame, codes) -> tuple:
+    """
+    Per-group median and mean of absolute deviations, one grouped pass.
+    """
+    stats = abs_dev.groupby(codes, sort=False).agg(["median", "mean"])
+    return stats.xs("median", axis=1, level=1), stats.xs("mean", axis=1, level=1)
+
+
+def robust_z_scores(values: pd.DataFrame, codes: np.ndarray, min_group_size: int = MIN_GROUP_SIZE) -> pd.DataFrame:
+    """
+    Modified z-score of every cell against its peer group:
+
+        z = 0.6745 * (x - median) / MAD
+
+    When the MAD is 0 (more than half the group shares one value) the mean
+    absolute deviation stands in. Groups with fewer than min_group_size
+    values use the whole-column median and spread. Work per row is constant,
+    so the cost stays linear in the number of rows.
+    """
+    codes = np.asarray(codes)
+
+    # 1️⃣ Median and count per group and column in one pass
+    stats = values.groupby(codes, sort=False).agg(["median", "count"])
+    group_median = stats.xs("median", axis=1, level=1)
+    group_count = stats.xs("count", axis=1, level=1)
+
+    # Broadcast back to rows by position (groups were numbered 0..k-1)
+    row_groups = group_median.index.get_indexer(codes)
+    median = pd.DataFrame(group_median.to_numpy()[row_groups], index=values.index, columns=values.columns)
+    count = pd.DataFrame(group_count.to_numpy()[row_groups], index=values.index, columns=values.columns)
+
+    # 2️⃣ Spread of the deviations, per group and over the whole column
+    abs_dev = (values - median).abs()
+    group_mad, group_mean_ad = _spread(abs_dev, codes)
+    mad = pd.DataFrame(group_mad.to_numpy()[row_groups], index=values.index, columns=values.columns)
+    mean_ad = pd.DataFrame(group_mean_ad.to_numpy()[row_groups], index=values.index, columns=values.columns)
+
+    # 3️⃣ Small groups fall back to the whole column
+    small = count < min_group_size
+    if small.to_numpy().any():
+        global_median = values.median()
+        global_dev = (values - global_median).abs()
+        median = median.where(~small, global_median, axis=1)
+        mad = mad.where(~small, global_dev.median(), axis=1)
+        mean_ad = mean_ad.where(~small, global_dev.mean(), axis=1)
+
+    deviation = values - median
+    z = MAD_SCALE * deviation / mad.where(mad > 0)
+    z_mean_ad = deviation / (MEAN_AD_SCALE * mean_ad.where(mean_ad > 0))
+    return z.where(mad > 0, z_mean_ad)
+
+
+# -----------------------------
+# Consistency rules
+# -----------------------------
+def _parse_dates(series: pd.Series) -> pd.Series:
+    """
+    Day-first parse that tolerates mixed formats (26-07-1980, 06/19/2025).
+    Each distinct value is parsed once.
+    """
+    codes, uniques = pd.factorize(series)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), errors="coerce", format="mixed", dayfirst=True)
+    values = np.append(parsed.to_numpy(dtype="datetime64[ns]"), np.datetime64("NaT", "ns"))
+    return pd.Series(values[codes], index=series.index)
+
+
+def age_offsets(df: pd.DataFrame, numeric: dict | None = None, today=None, founded=None) -> pd.Series | None:
+    """
+    company_age + founded year per row: the year the ages were computed in.
+    NaN where either is missing or founded_date is in the future; None when
+    the frame lacks one of the columns.
+    """
+    if "company_age" not in df.columns or "founded_date" not in df.columns:
+        return None
+    today = pd.Timestamp.now().normalize() if today is None else pd.Timestamp(today)
+    age = (numeric or {}).get("company_age")
+    if age is None:
+        age = _to_number(df["company_age"])
+    if founded is None:
+        founded = _parse_dates(df["founded_date"])
+    return (age + founded.dt.year).where(founded <= today)
+
+
+def offset_counts(offsets: pd.Series) -> pd.Series:
+    """
+    Rows per whole age offset; sums of these merge across batches.
+    """
+    return offsets.dropna().round().value_counts()
+
+
+def reference_year(counts: pd.Series) -> float | None:
+    """
+    The year a file's ages were computed in, from offset_counts(): the year
+    with the most offsets within AGE_TOLERANCE_YEARS of it. A file exported
+    in 2017 says 37 for a company founded in 1980, so its ages are checked
+    against 2017, not today. None when fewer than AGE_REFERENCE_MIN_SHARE
+    of the rows agree: ages and founding dates are then unrelated, and
+    there is no usual offset to differ from.
+    """
+    total = counts.sum()
+    if total == 0:
+        return None
+    years = counts.index.to_numpy(dtype="float64")
+    values = counts.to_numpy()
+    support = np.array([values[np.abs(years - year) <= AGE_TOLERANCE_YEARS].sum() for year in years])
+    best = int(np.argmax(support))
+    return float(years[best]) if support[best] >= AGE_REFERENCE_MIN_SHARE * total else None
+
+
+def rule_violations(df: pd.DataFrame, numeric: dict, today=None, age_reference=None, return_offsets=False):
+    """
+    Row masks for values that are impossible rather than unusual.
+
+    - FUTURE_FOUNDED_DATE: founded_date after today
+    - NEGATIVE_AGE: company_age below zero
+    - AGE_MISMATCH: company_age off by more than a year from founded_date
+      and the file's reference year (age_reference, by default
+      reference_year() of this frame; not checked without one)
+    - NEGATIVE_REVENUE: revenue below zero
+
+    Returns:
+    {column: {rule: boolean Series}}, and the age offsets (or None) with
+    return_offsets=True
+    """
+    today = pd.Timestamp.now().normalize() if today is None else pd.Timestamp(today)
+    violations = {}
+    founded = offsets = None
+
+    if "founded_date" in df.columns:
+        founded = _parse_dates(df["founded_date"])
+        violations.setdefault("founded_date", {})["FUTURE_FOUNDED_DATE"] = founded > today
+
+    if "company_age" in df.columns:
+        age = numeric.get("company_age")
+        if age is None:
+            age = _to_number(df["company_age"])
+        rules = violations.setdefault("company_age", {})
+        rules["NEGATIVE_AGE"] = age < 0
+        offsets = age_offsets(df, numeric, today, founded)
+        if offsets is not None:
+            if age_reference is None:
+                age_reference = reference_year(offset_counts(offsets))
+            if age_reference is None:
+                rules["AGE_MISMATCH"] = pd.Series(False, index=df.index)
+            else:
+                rules["AGE_MISMATCH"] = (offsets - age_reference).abs() > AGE_TOLERANCE_YEARS
+
+    revenue_col = get_revenue_column(df)
+    if revenue_col:
+        revenue = numeric.get(revenue_col)
+        if revenue is None:
+            revenue = _to_number(df[revenue_col])
+        violations.setdefault(revenue_col, {})["NEGATIVE_REVENUE"] = revenue < 0
+
+    return (violations, offsets) if return_offsets else violations
+
+
+# -----------------------------
+# Engine
+# -----------------------------
+def anomaly_reasons(labels: list, masks: np.ndarray) -> np.ndarray:
+    """
+    Per row, the labels ("<column>:<RULE>") of its flagged cells joined by
+    ", ", or None for clean rows. Only flagged rows are joined.
+    """
+    reasons = np.full(len(masks), None, dtype=object)
+    if masks.shape[1]:
+        rows = np.flatnonzero(masks.any(axis=1))
+        reasons[rows] = [", ".join(labels[j] for j in np.flatnonzero(row)) for row in masks[rows]]
+    return reasons
+
+
+def add_anomaly_columns(df: pd.DataFrame, is_anomaly, reasons) -> pd.DataFrame:
+    """
+    The cleaned frame with FLAG_COLUMN and REASON_COLUMN, row for row.
+    """
+    return df.assign(**{
+        FLAG_COLUMN: np.asarray(is_anomaly, dtype=bool),
+        REASON_COLUMN: np.asarray(reasons, dtype=object),
+    })
+
+
+def detect_anomalies(
+    df: pd.DataFrame,
+    threshold: float = ROBUST_Z_THRESHOLD,
+    min_group_size: int = MIN_GROUP_SIZE,
+    today=None,
+    return_reasons: bool = False
+):
+    """
+    Flags rows holding a statistical outlier or an impossible value.
+
+    1️⃣ Parse numeric columns (revenue, company_age, counts...) to float64
+    2️⃣ Robust z-score within industry / company_size peer groups
+    3️⃣ Consistency rules on founded_date, company_age and revenue
+
+    Returns:
+    (is_anomaly: boolean Series, counts: {column: flagged cells},
+     rules: {rule: flagged rows}), plus the per-row reasons (object
+    Series, see anomaly_reasons()) with return_reasons=True
+    """
+    flagged = pd.DataFrame(index=df.index)
+    numeric = numeric_anomaly_columns(df)
+    labels, masks = [], []
+
+    if numeric and len(df):
+        values = pd.DataFrame(numeric, index=df.index)
+        codes = _group_codes(df, get_group_columns(df))
+        z = robust_z_scores(values, codes, min_group_size)
+        flagged = (z.abs() > threshold).fillna(False)
+        labels += [f"{col}:{OUTLIER}" for col in flagged.columns]
+        masks += [flagged[col].to_numpy(dtype=bool) for col in flagged.columns]
+
+    rule_counts = {}
+    for col, rules in rule_violations(df, numeric, today).items():
+        col_mask = pd.Series(False, index=df.index)
+        for rule, mask in rules.items():
+            mask = mask.fillna(False).astype(bool)
+            rule_counts[rule] = int(mask.sum())
+            col_mask |= mask
+            labels.append(f"{col}:{rule}")
+            masks.append(mask.to_numpy(dtype=bool))
+        flagged[col] = flagged[col] | col_mask if col in flagged.columns else col_mask
+
+    counts = {col: int(n) for col, n in flagged.sum().items() if n > 0}
+    is_anomaly = flagged.any(axis=1) if flagged.shape[1] else pd.Series(False, index=df.index)
+    if not return_reasons:
+        return is_anomaly.astype(bool), counts, rule_counts
+    stacked = np.column_stack(masks) if masks else np.zeros((len(df), 0), dtype=bool)
+    reasons = pd.Series(anomaly_reasons(labels, stacked), index=df.index, dtype=object)
+    return is_anomaly.astype(bool), counts, rule_counts, reasons
+
+
+# -----------------------------
+# Batches (chunked / streamed jobs)
+# -----------------------------
+def _keep_smallest_keys(group: np.ndarray, key: np.ndarray, size: int) -> np.ndarray:
+    """
+    Positions of the `size` smallest keys of every group: a uniform sample
+    per group that can be topped up batch by batch.
+    """
+    order = np.lexsort((key, group))
+    sorted_groups = group[order]
+    rank = np.arange(len(order)) - np.searchsorted(sorted_groups, sorted_groups, side="left")
+    return order[rank < size]
+
+
+class _Sample:
+    """
+    Seeded uniform sample of one column's values per peer group.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.group = np.empty(0, dtype=np.int64)
+        self.key = np.empty(0)
+        self.value = np.empty(0)
+
+    def add(self, group: np.ndarray, key: np.ndarray, value: np.ndarray):
+        self.group = np.concatenate([self.group, group])
+        self.key = np.concatenate([self.key, key])
+        self.value = np.concatenate([self.value, value])
+        keep = _keep_smallest_keys(self.group, self.key, self.size)
+        if len(keep) < len(self.group):
+            self.group, self.key, self.value = self.group[keep], self.key[keep], self.value[keep]
+
+    def remapped(self, remap: np.ndarray) -> "_Sample":
+        sample = _Sample(self.size)
+        sample.group, sample.key, sample.value = remap[self.group], self.key, self.value
+        return sample
+
+
+class AnomalyAccumulator:
+    """
+    detect_anomalies() counts for a file seen one batch at a time (chunked
+    and streamed jobs), in two passes:
+
+    1️⃣ update() parses the numeric columns (chosen on the first batch),
+       gives rows a file-wide peer-group id and evaluates the rules, and
+       spills that per batch (8 bytes per numeric cell). Non-null counts
+       per group and age offsets are counted exactly; medians and spreads
+       come from a seeded sample of GROUP_SAMPLE_SIZE values per group and
+       column (COLUMN_SAMPLE_SIZE over the whole column), exact for groups
+       that fit in it.
+    2️⃣ result() scores the spilled batches, one at a time, against the
+       final statistics and the file's age reference year, then removes
+       them; no batch can be added after it.
+
+    latest() flags the rows of the batch just added against the statistics
+    seen so far, so chunked and streamed outputs get per-row flags as their
+    batches are written. Early batches are judged on less data, so those
+    flags can differ from the counts result() reports.
+
+    Memory is the samples plus one batch. merge() folds in the accumulator
+    of another part of the same file.
+    """
+
+    def __init__(self, threshold: float = ROBUST_Z_THRESHOLD, min_group_size: int = MIN_GROUP_SIZE,
+                 today=None, spill_dir: str | None = None, seed: int = 0):
+        self.threshold = threshold
+        self.min_group_size = min_group_size
+        self.today = pd.Timestamp.now().normalize() if today is None else pd.Timestamp(today)
+        self.rows = 0
+        self.columns = None
+        self.group_columns = None
+        self.rules = None
+        self._spill_dir = spill_dir
+        # Spill directory -> finalizer removing it (also if result() is never called)
+        self._dirs = {}
+        self._group_ids = {}
+        self._counts = None
+        self._group_samples = None
+        self._column_samples = None
+        self._offsets = pd.Series(dtype="float64")
+        self._batches = []
+        self._rng = np.random.default_rng(seed)
+        self._result = None
+        self._last = None
+
+    def _start(self, df: pd.DataFrame):
+        self.columns = list(numeric_anomaly_columns(df))
+        self.group_columns = get_group_columns(df)
+        self.rules = [(col, rule) for col, rules in rule_violations(df, {}, self.today).items() for rule in rules]
+        self._counts = np.zeros((0, len(self.columns)), dtype=np.int64)
+        self._group_samples = [_Sample(GROUP_SAMPLE_SIZE) for _ in self.columns]
+        self._column_samples = [_Sample(COLUMN_SAMPLE_SIZE) for _ in self.columns]
+
+    def _group_id(self, key) -> int:
+        group = self._group_ids.setdefault(key, len(self._group_ids))
+        if group >= len(self._counts):
+            self._counts = np.vstack([self._counts, np.zeros((group + 1 - len(self._counts), len(self.columns)),
+                                                             dtype=np.int64)])
+        return group
+
+    def _groups(self, df: pd.DataFrame) -> np.ndarray:
+        if not self.group_columns:
+            return np.full(len(df), self._group_id(()), dtype=np.int64)
+        codes, keys = _group_keys(df, self.group_columns)
+        ids = np.array([self._group_id(key) for key in keys], dtype=np.int64)
+        return ids[codes]
+
+    def _own(self, directory: str):
+        self._dirs[directory] = weakref.finalize(self, shutil.rmtree, directory, True)
+
+    def _batch_path(self) -> str:
+        if not self._dirs:
+            self._own(tempfile.mkdtemp(prefix="anomalies_", dir=self._spill_dir))
+        return os.path.join(next(iter(self._dirs)), f"batch_{len(self._batches):06d}.npz")
+
+    def update(self, df: pd.DataFrame):
+        """
+        Adds the next batch. Its columns must match the first batch's.
+        """
+        if self._result is not None:
+            raise ValueError("Cannot add batches after result()")
+        self._last = None
+        if not len(df):
+            return self
+        if self.columns is None:
+            self._start(df)
+        self.rows += len(df)
+
+        numeric = {col: _to_number(df[col]) for col in self.columns}
+        values = np.column_stack([numeric[col].to_numpy(dtype="float64") for col in self.columns]) \
+            if self.columns else np.empty((len(df), 0))
+        groups = self._groups(df)
+        for j in range(len(self.columns)):
+            known = ~np.isnan(values[:, j])
+            group, value = groups[known], values[known, j]
+            self._counts[:, j] += np.bincount(group, minlength=len(self._counts))
+            key = self._rng.random(len(value))
+            self._group_samples[j].add(group, key, value)
+            self._column_samples[j].add(np.zeros(len(value), dtype=np.int64), key, value)
+
+        violations, offsets = rule_violations(df, numeric, self.today, return_offsets=True)
+        rules = np.column_stack([
+            violations[col][rule].fillna(False).to_numpy(dtype=bool) for col, rule in self.rules
+        ]) if self.rules else np.empty((len(df), 0), dtype=bool)
+        if offsets is None:
+            offsets = pd.Series(np.nan, index=df.index)
+        self._offsets = self._offsets.add(offset_counts(offsets), fill_value=0)
+
+        path = self._batch_path()
+        offsets = offsets.to_numpy(dtype="float64")
+        np.savez(path, values=values, groups=groups, rules=rules, offsets=offsets)
+        self._batches.append((path, None))
+        self._last = (values, groups, rules, offsets)
+        return self
+
+    @property
+    def labels(self) -> list:
+        """
+        Reason labels, one per column of the masks _score() returns.
+        """
+        return [f"{col}:{OUTLIER}" for col in self.columns] + [f"{col}:{rule}" for col, rule in self.rules]
+
+    def _score(self, values, groups, rules, offsets, statistics, reference) -> np.ndarray:
+        """
+        rows x labels mask of one spilled batch: z-score outliers, then rules
+        (AGE_MISMATCH against reference).
+        """
+        median, mad, mean_ad = statistics
+        rules = rules.copy()
+        for i, (col, rule) in enumerate(self.rules):
+            if rule == "AGE_MISMATCH":
+                rules[:, i] = np.abs(offsets - reference) > AGE_TOLERANCE_YEARS if reference is not None else False
+
+        outliers = np.zeros((len(groups), len(self.columns)), dtype=bool)
+        if self.columns:
+            deviation = values - median[groups]
+            group_mad, group_mean_ad = mad[groups], mean_ad[groups]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                z = np.where(group_mad > 0, MAD_SCALE * deviation / group_mad,
+                             deviation / (MEAN_AD_SCALE * np.where(group_mean_ad > 0, group_mean_ad, np.nan)))
+            outliers = np.abs(z) > self.threshold
+        return np.hstack([outliers, rules])
+
+    def latest(self) -> tuple:
+        """
+        (is_anomaly, reasons) arrays for the batch last passed to update(),
+        scored against the statistics of every batch added so far.
+        """
+        if self._last is None:
+            return np.zeros(0, dtype=bool), np.full(0, None, dtype=object)
+        masks = self._score(*self._last, self._statistics(), reference_year(self._offsets))
+        return masks.any(axis=1), anomaly_reasons(self.labels, masks)
+
+    def merge(self, other: "AnomalyAccumulator"):
+        """
+        Folds in another accumulator, which hands over its spilled batches.
+        """
+        if self._result is not None or other._result is not None:
+            raise ValueError("Cannot merge anomaly counts after result()")
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self._start_like(other)
+        if other.columns != self.columns or other.rules != self.rules:
+            raise ValueError("Cannot merge anomaly counts over different columns")
+        self.rows += other.rows
+        remap = np.array([self._group_id(key) for key in other._group_ids], dtype=np.int64)
+        np.add.at(self._counts, remap, other._counts)
+        for mine, theirs in zip(self._group_samples, other._group_samples):
+            moved = theirs.remapped(remap)
+            mine.add(moved.group, moved.key, moved.value)
+        for mine, theirs in zip(self._column_samples, other._column_samples):
+            mine.add(theirs.group, theirs.key, theirs.value)
+        self._offsets = self._offsets.add(other._offsets, fill_value=0)
+        self._batches += [(path, remap if local is None else remap[local]) for path, local in other._batches]
+        for directory, finalizer in other._dirs.items():
+            finalizer.detach()
+            self._own(directory)
+        other._batches, other._dirs = [], {}
+        return self
+
+    def _start_like(self, other: "AnomalyAccumulator"):
+        self.columns, self.group_columns, self.rules = other.columns, other.group_columns, other.rules
+        self._counts = np.zeros((0, len(self.columns)), dtype=np.int64)
+        self._group_samples = [_Sample(GROUP_SAMPLE_SIZE) for _ in self.columns]
+        self._column_samples = [_Sample(COLUMN_SAMPLE_SIZE) for _ in self.columns]
+
+    def _statistics(self) -> tuple:
+        """
+        Per group and column (groups x columns): median, MAD and mean
+        absolute deviation, with small groups on the whole-column figures.
+        """
+        shape = self._counts.shape
+        median, mad, mean_ad = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+        for j in range(len(self.columns)):
+            sample = self._group_samples[j]
+            if len(sample.value):
+                by_group = pd.Series(sample.value).groupby(sample.group)
+                group_median = by_group.median()
+                median[group_median.index, j] = group_median.to_numpy()
+                deviation = pd.Series(np.abs(sample.value - median[sample.group, j])).groupby(sample.group)
+                spread = deviation.agg(["median", "mean"])
+                mad[spread.index, j] = spread["median"].to_numpy()
+                mean_ad[spread.index, j] = spread["mean"].to_numpy()
+
+            column = self._column_samples[j].value
+            small = self._counts[:, j] < self.min_group_size
+            if small.any() and len(column):
+                column_median = np.median(column)
+                column_deviation = np.abs(column - column_median)
+                median[small, j] = column_median
+                mad[small, j] = np.median(column_deviation)
+                mean_ad[small, j] = column_deviation.mean()
+        return median, mad, mean_ad
+
+    def result(self) -> tuple:
+        """
+        (flagged rows, {column: flagged cells}, {rule: flagged rows}), as
+        detect_anomalies() returns them for the whole file.
+        """
+        if self._result is not None:
+            return self._result
+        if self.columns is None:
+            return 0, {}, {}
+
+        statistics = self._statistics()
+        reference = reference_year(self._offsets)
+        flagged_columns = list(dict.fromkeys(list(self.columns) + [col for col, _ in self.rules]))
+        cells = np.zeros(len(flagged_columns), dtype=np.int64)
+        rule_counts = np.zeros(len(self.rules), dtype=np.int64)
+        rows = 0
+
+        for path, remap in self._batches:
+            with np.load(path) as batch:
+                values, groups, rules, offsets = batch["values"], batch["groups"], batch["rules"], batch["offsets"]
+            if remap is not None:
+                groups = remap[groups]
+            masks = self._score(values, groups, rules, offsets, statistics, reference)
+            rules = masks[:, len(self.columns):]
+
+            flagged = np.zeros((len(groups), len(flagged_columns)), dtype=bool)
+            flagged[:, :len(self.columns)] = masks[:, :len(self.columns)]
+            for i, (col, _) in enumerate(self.rules):
+                flagged[:, flagged_columns.index(col)] |= rules[:, i]
+
+            cells += flagged.sum(axis=0)
+            rule_counts += rules.sum(axis=0)
+            rows += int(flagged.any(axis=1).sum())
+
+        self.cleanup()
+        self._result = (
+            rows,
+            {col: int(n) for col, n in zip(flagged_columns, cells) if n > 0},
+            {rule: int(n) for (_, rule), n in zip(self.rules, rule_counts)},
+        )
+        return self._result
+
+    def cleanup(self):
+        for finalizer in self._dirs.values():
+            finalizer()
+        self._dirs, self._batches = {}, []
+        self._last = None
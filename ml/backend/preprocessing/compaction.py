@@ -0,0 +1,169 @@
+# backend/preprocessing/compaction.py
+import pandas as pd
+
+# Labels the fillers write into otherwise numeric columns
+# (fill_company_age, the company_size default)
+NUMERIC_PLACEHOLDERS = {
+    "Unknown", "Not Provided", "Not Available", "Not Specified", "N/A", "NA", "-"
+}
+
+# Identifier-like columns that look numeric but must stay text
+# (leading zeros, '+' prefixes), matched on the lower-cased name
+TEXT_ONLY_KEYWORDS = ("phone", "mobile", "fax", "zip", "post_code", "postcode", "code")
+
+# -----------------------------
+# Column helpers
+# -----------------------------
+def _is_text(series: pd.Series) -> bool:
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+
+def _is_identifier(col) -> bool:
+    name = str(col)
+    lower = name.lower()
+    return (
+        lower == "id"
+        or lower.endswith("_id")
+        or name.endswith(("ID", "Id"))
+        or any(k in lower for k in TEXT_ONLY_KEYWORDS)
+    )
+
+
+def _restore_numeric(series: pd.Series) -> tuple:
+    """
+    Converts a text column of numbers into a nullable numeric column, only
+    when every distinct value prints back exactly as written ('00123',
+    '1.50' or '+44' keep the column as text).
+
+    One placeholder label ('Unknown') may fill the rest of the column: it
+    goes to the mask (missing) and is written back by with_placeholders(),
+    so the cleaned CSV is unchanged. A column holding both real missing
+    values and a label, or two labels, stays text.
+
+    Returns:
+    (converted: Series | None when the column stays text, label: str | None)
+    """
+    uniques = pd.Series(series.dropna().unique(), dtype=object)
+    text = uniques.astype(str)
+    labels = text[text.isin(NUMERIC_PLACEHOLDERS)]
+    if len(labels) > 1 or (len(labels) and series.isna().any()):
+        return None, None
+    text = text[~text.isin(NUMERIC_PLACEHOLDERS)]
+    if len(text) == 0:
+        return None, None
+    numbers = pd.to_numeric(text, errors="coerce", dtype_backend="numpy_nullable")
+    if numbers.isna().any() or not (numbers.astype(str) == text).all():
+        return None, None
+
+    values = series.astype(object)
+    label = labels.iloc[0] if len(labels) else None
+    if label is not None:
+        values = values.where(values.astype(str) != label)
+    converted = pd.to_numeric(values, errors="coerce", dtype_backend="numpy_nullable")
+    return _downcast_numeric(converted), label
+
+
+def _downcast_numeric(series: pd.Series) -> pd.Series:
+    """
+    Smallest lossless integer dtype. Floats stay as they are, even whole
+    ones: 2.0 would otherwise be written as 2, and a later batch holding
+    2.5 would write 2.0 again.
+    """
+    if pd.api.types.is_bool_dtype(series.dtype) or not pd.api.types.is_integer_dtype(series.dtype):
+        return series
+    values = series.dropna()
+    if len(values) and values.min() >= 0:
+        return pd.to_numeric(series, downcast="unsigned")
+    return pd.to_numeric(series, downcast="integer")
+
+
+# -----------------------------
+# Compaction stage
+# -----------------------------
+def compact_dtypes(
+    df: pd.DataFrame,
+    max_unique_ratio: float = 0.5,
+    max_categories: int = 10_000,
+    plan: dict | None = None
+):
+    """
+    Shrinks a cleaned frame before it is written, previewed or kept in memory,
+    without changing how any value is written to CSV.
+
+    - numeric text ('37', '1.5', with one fill label such as 'Unknown' as
+      missing) → nullable numeric, unless it would not print back the same
+      or the column is an identifier (*_id, *code, zip...)
+    - low-cardinality text (status/issue codes, industry, country...) → category
+    - integers → smallest integer dtype
+
+    plan is the "plan" of an earlier report (the first batch of a chunked
+    job): every later batch then gets the same decision per column.
+
+    Write, preview or split the frame through with_placeholders(df,
+    report["placeholders"]) so the labels are back in the output.
+
+    Returns:
+    (compacted DataFrame, report dict with memory before/after in bytes)
+    """
+    before = df.memory_usage(deep=True)
+    df = df.copy()
+
+    converted = {"numeric": [], "category": [], "downcast": []}
+    decided = {}
+    placeholders = {}
+
+    for col in df.columns:
+        series = df[col]
+        planned = plan.get(col, "text") if plan is not None else None
+
+        if _is_text(series):
+            if planned in (None, "numeric") and not _is_identifier(col):
+                numeric, label = _restore_numeric(series)
+                if numeric is not None:
+                    df[col] = numeric
+                    converted["numeric"].append(col)
+                    decided[col] = "numeric"
+                    if label is not None:
+                        placeholders[col] = label
+                    continue
+
+            n_unique = series.nunique(dropna=True)
+            if planned == "category" or (
+                planned is None and 0 < n_unique <= max_categories and n_unique <= max_unique_ratio * len(series)
+            ):
+                df[col] = series.astype("category")
+                converted["category"].append(col)
+                decided[col] = "category"
+
+        elif pd.api.types.is_numeric_dtype(series.dtype) and planned in (None, "downcast"):
+            downcast = _downcast_numeric(series)
+            if downcast.dtype != series.dtype:
+                df[col] = downcast
+                converted["downcast"].append(col)
+                decided[col] = "downcast"
+
+    after = df.memory_usage(deep=True)
+    report = {
+        "memory_before_bytes": int(before.sum()),
+        "memory_after_bytes": int(after.sum()),
+        "reduction_pct": round(float(1 - after.sum() / max(1, before.sum())) * 100, 1),
+        "numeric_restored": converted["numeric"],
+        "categorical_columns": converted["category"],
+        "downcast_columns": converted["downcast"],
+        "placeholders": placeholders,
+        "plan": decided if plan is None else plan,
+    }
+    return df, report
+
+
+def with_placeholders(df: pd.DataFrame, placeholders: dict) -> pd.DataFrame:
+    """
+    The frame as it is written: missing cells of restored numeric columns
+    get their placeholder label back ('Unknown'). Only those columns are
+    copied, as object.
+    """
+    restored = {
+        col: df[col].astype(object).where(df[col].notna(), label)
+        for col, label in placeholders.items() if col in df.columns
+    }
+    return df.assign(**restored) if restored else df
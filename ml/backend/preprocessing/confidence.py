@@ -0,0 +1,158 @@
+# backend/preprocessing/confidence.py
+import pandas as pd
+import numpy as np
+
+# How much each signal counts towards lead_confidence
+DEFAULT_WEIGHTS = {
+    "validation": 0.5,    # <col>_status == VALID
+    "imputation": 0.3,    # <col>_confidence from the imputers (1.0 = original value)
+    "completeness": 0.2,  # share of fields holding a real value
+}
+
+# Labels the fillers write in place of a missing value
+FILL_LABELS = {
+    "", "unknown", "unknown domain", "not provided", "not available",
+    "not specified", "n/a", "na", "-", "nan", "none"
+}
+
+# Columns the pipeline adds next to a field; they are not fields themselves
+METADATA_SUFFIXES = ("_status", "_issue", "_source", "_confidence", "_e164", "_suggested", "_iso")
+
+SCORE_COLUMN = "lead_confidence"
+
+
+# -----------------------------
+# Signals
+# -----------------------------
+def _field_columns(columns) -> list:
+    return [c for c in columns if not str(c).endswith(METADATA_SUFFIXES) and c != SCORE_COLUMN]
+
+
+def _filled(series: pd.Series) -> np.ndarray:
+    """
+    True where the cell holds a real value: not null and not a fill label.
+    Text is lower-cased once per distinct value.
+    """
+    if not (series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+            or isinstance(series.dtype, pd.CategoricalDtype)):
+        return series.notna().to_numpy()
+
+    codes, uniques = pd.factorize(series)
+    real = ~pd.Series(uniques, dtype=object).astype(str).str.strip().str.lower().isin(FILL_LABELS).to_numpy()
+    return np.append(real, False)[codes]
+
+
+def confidence_signals(df: pd.DataFrame, weights: dict | None = None, column_weights: dict | None = None):
+    """
+    Lays out every signal as one column of a float matrix, with a weight each.
+
+    - one column per <col>_status (1.0 VALID, 0.0 otherwise)
+    - one column per <col>_confidence (NaN counts as 0)
+    - one completeness column (filled fields / fields)
+
+    A group's weight is shared equally among its columns; column_weights
+    overrides the weight of single columns (e.g. {'email_status': 1.0}).
+
+    Returns:
+    (matrix: ndarray [rows x signals], weights: ndarray [signals], names: list)
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    column_weights = column_weights or {}
+
+    status_cols = [c for c in df.columns if str(c).endswith("_status")]
+    confidence_cols = [c for c in df.columns if str(c).endswith("_confidence") and c != SCORE_COLUMN]
+    field_cols = _field_columns(df.columns)
+
+    n = len(df)
+    columns, column_w, names = [], [], []
+
+    for col in status_cols:
+        columns.append((df[col].astype(str).to_numpy() == "VALID").astype(np.float64))
+        column_w.append(column_weights.get(col, weights["validation"] / len(status_cols)))
+        names.append(col)
+
+    for col in confidence_cols:
+        values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        columns.append(np.nan_to_num(values, nan=0.0))
+        column_w.append(column_weights.get(col, weights["imputation"] / len(confidence_cols)))
+        names.append(col)
+
+    if field_cols:
+        filled = np.zeros(n, dtype=np.float64)
+        for col in field_cols:
+            filled += _filled(df[col])
+        columns.append(filled / len(field_cols))
+        column_w.append(weights["completeness"])
+        names.append("completeness")
+
+    matrix = np.column_stack(columns) if columns else np.empty((n, 0))
+    return matrix, np.asarray(column_w, dtype=np.float64), names
+
+
+def lead_confidence(df: pd.DataFrame, weights: dict | None = None, column_weights: dict | None = None) -> pd.Series:
+    """
+    Row-level lead confidence in [0, 1]: the weighted mean of every signal,
+    computed as one matrix-vector product.
+    Groups with no columns in df drop out and the rest are renormalized.
+    """
+    matrix, w, _ = confidence_signals(df, weights, column_weights)
+    if w.sum() <= 0:
+        return pd.Series(np.nan, index=df.index, name=SCORE_COLUMN)
+    scores = matrix @ (w / w.sum())
+    return pd.Series(np.round(scores, 3), index=df.index, name=SCORE_COLUMN)
+
+
+def add_lead_confidence(df: pd.DataFrame, weights: dict | None = None, column_weights: dict | None = None) -> pd.DataFrame:
+    df = df.copy()
+    df[SCORE_COLUMN] = lead_confidence(df, weights, column_weights)
+    return df
+
+
+# -----------------------------
+# Top-N selection
+# -----------------------------
+def top_n_positions(scores, n: int) -> np.ndarray:
+    """
+    Positions of the n highest scores, best first.
+    argpartition finds them in linear time; only those n are sorted.
+    NaN scores rank last.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+    if n <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.intp)
+    if n < len(scores):
+        candidates = np.argpartition(-scores, n - 1)[:n]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def top_n_leads(df: pd.DataFrame, n: int, score_col: str = SCORE_COLUMN) -> pd.DataFrame:
+    """
+    The n rows with the highest score, best first.
+    """
+    return df.iloc[top_n_positions(df[score_col].to_numpy(dtype=np.float64, na_value=np.nan), n)]
+
+
+def top_n_from_batches(batches, n: int, score_func=None, score_col: str = SCORE_COLUMN) -> pd.DataFrame:
+    """
+    Best n rows of a stream of DataFrame batches (see backend.io.readers),
+    holding at most n + one batch of rows in memory.
+
+    score_func(batch) -> batch with score_col, e.g. add_lead_confidence after
+    the cleaning pipeline. Batches that already carry score_col can skip it.
+    """
+    best = None
+    for batch in batches:
+        if score_func is not None:
+            batch = score_func(batch)
+        if len(batch) == 0:
+            continue
+        best = batch if best is None else pd.concat([best, batch], ignore_index=True)
+        if len(best) > n:
+            best = top_n_leads(best, n, score_col).reset_index(drop=True)
+
+    if best is None:
+        return pd.DataFrame()
+    return top_n_leads(best, n, score_col).reset_index(drop=True)
@@ -0,0 +1,289 @@
+# backend/preprocessing/countries.py
+import re
+import unicodedata
+
+import pandas as pd
+import numpy as np
+
+from .email_domains import osa_distance
+
+# Names pycountry does not carry: short forms, home-country spellings, UK nations
+COUNTRY_ALIASES = {
+    "uk": "GB",
+    "u.k.": "GB",
+    "england": "GB",
+    "scotland": "GB",
+    "wales": "GB",
+    "northern ireland": "GB",
+    "great britain": "GB",
+    "britain": "GB",
+    "usa": "US",
+    "u.s.a.": "US",
+    "us": "US",
+    "u.s.": "US",
+    "america": "US",
+    "united states of america": "US",
+    "uae": "AE",
+    "emirates": "AE",
+    "deutschland": "DE",
+    "españa": "ES",
+    "espana": "ES",
+    "italia": "IT",
+    "nederland": "NL",
+    "holland": "NL",
+    "the netherlands": "NL",
+    "schweiz": "CH",
+    "suisse": "CH",
+    "österreich": "AT",
+    "brasil": "BR",
+    "méxico": "MX",
+    "polska": "PL",
+    "sverige": "SE",
+    "norge": "NO",
+    "danmark": "DK",
+    "suomi": "FI",
+    "éire": "IE",
+    "russia": "RU",
+    "korea": "KR",
+    "czech republic": "CZ",
+    "ivory coast": "CI",
+    "hong kong sar": "HK",
+    "prc": "CN",
+    "mainland china": "CN",
+}
+
+MISSING_COUNTRY_VALUES = {"", "-", "nan", "none", "n/a", "na", "not specified", "unknown", "unknown country"}
+
+# Trigram similarity a name needs to be considered for a misspelling
+MIN_CANDIDATE_SIMILARITY = 0.3
+# Without a unique closest spelling, the best name needs this similarity ...
+FUZZY_THRESHOLD = 0.55
+# ... and this lead over the runner-up pointing at another country
+FUZZY_MARGIN = 0.1
+# Shorter keys are codes or abbreviations; they are never fuzzy-matched
+MIN_FUZZY_LENGTH = 4
+
+# Distinct raw values remembered across calls
+CACHE_SIZE = 100_000
+
+
+def normalize_key(value) -> str:
+    """
+    Lookup key for a raw country value: accents and punctuation dropped,
+    lower case, single spaces ('U.S.A.' -> 'usa', 'Côte d'Ivoire' -> 'cote divoire').
+    """
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = re.sub(r"[.'’]", "", text)
+    text = re.sub(r"[^a-z0-9]+", " ", text).strip()
+    if text.startswith("the "):
+        text = text[4:]
+    return text
+
+
+def trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ----------------------------------
+# Index
+# ----------------------------------
+class CountryIndex:
+    """
+    Normalized-key hash map over every name pycountry knows for a country
+    (name, official name, common name, alpha-2, alpha-3) plus the aliases
+    above, with a trigram index over the names for misspellings.
+
+    Lookups are cached per raw value, so a column costs one resolution per
+    distinct value however many rows it has.
+    """
+
+    def __init__(self, countries=None, aliases=None):
+        if countries is None:
+            import pycountry
+            countries = pycountry.countries
+        aliases = COUNTRY_ALIASES if aliases is None else aliases
+
+        self.names = {}
+        self.keys = {}
+        for country in countries:
+            code = country.alpha_2
+            self.names[code] = country.name
+            # Earlier entries win: names before codes, so 'in' stays India
+            for value in (country.name, getattr(country, "common_name", None),
+                          getattr(country, "official_name", None)):
+                if value:
+                    self.keys.setdefault(normalize_key(value), code)
+        for country in countries:
+            self.keys.setdefault(country.alpha_3.lower(), country.alpha_2)
+            self.keys.setdefault(country.alpha_2.lower(), country.alpha_2)
+        for alias, code in aliases.items():
+            self.keys[normalize_key(alias)] = code
+
+        # Fuzzy fallback: trigram -> name keys containing it
+        self.grams = {key: trigrams(key) for key in self.keys if len(key) >= MIN_FUZZY_LENGTH}
+        self.postings = {}
+        for key, grams in self.grams.items():
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(key)
+
+        self._cache = {}
+
+    def fuzzy(self, key: str):
+        """
+        Closest country for a misspelled key.
+
+        1️⃣ Score the names sharing a trigram with the key (Dice similarity)
+        2️⃣ Among plausible names, a unique country within one edit (two for
+           keys over 8 characters) wins: 'Indai' -> India, 'Jpan' -> Japan
+        3️⃣ Otherwise the best name must clear FUZZY_THRESHOLD and beat the
+           best other country by FUZZY_MARGIN
+
+        Returns:
+        alpha-2 code or None
+        """
+        if len(key) < MIN_FUZZY_LENGTH:
+            return None
+        grams = trigrams(key)
+        shared = {}
+        for gram in grams:
+            for candidate in self.postings.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        scores = {
+            candidate: 2 * n / (len(grams) + len(self.grams[candidate]))
+            for candidate, n in shared.items()
+        }
+        plausible = [c for c, score in scores.items() if score >= MIN_CANDIDATE_SIMILARITY]
+        if not plausible:
+            return None
+
+        limit = 1 if len(key) <= 8 else 2
+        distances = {c: osa_distance(key, c, limit) for c in plausible}
+        closest = min(distances.values())
+        if closest <= limit:
+            found = {self.keys[c] for c, d in distances.items() if d == closest}
+            if len(found) == 1:
+                return found.pop()
+
+        best = {}
+        for candidate in plausible:
+            code = self.keys[candidate]
+            best[code] = max(best.get(code, 0), scores[candidate])
+        ranked = sorted(best.values(), reverse=True)
+        code = max(best, key=best.get)
+        runner_up = ranked[1] if len(ranked) > 1 else 0
+        if ranked[0] >= FUZZY_THRESHOLD and ranked[0] - runner_up >= FUZZY_MARGIN:
+            return code
+        return None
+
+    def resolve(self, value, fuzzy: bool = True):
+        """
+        fuzzy=False skips the misspelling search for values not seen before
+        (they come back 'unknown' and are not cached).
+
+        Returns:
+        (alpha-2 code or None, match: 'exact' | 'fuzzy' | 'missing' | 'unknown')
+        """
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            return None, "missing"
+        cached = self._cache.get(value)
+        if cached is not None:
+            return cached
+
+        key = normalize_key(value)
+        if key in MISSING_COUNTRY_VALUES:
+            result = (None, "missing")
+        elif key in self.keys:
+            result = (self.keys[key], "exact")
+        elif not fuzzy:
+            return None, "unknown"
+        else:
+            code = self.fuzzy(key)
+            result = (code, "fuzzy") if code else (None, "unknown")
+
+        if len(self._cache) >= CACHE_SIZE:
+            self._cache.clear()
+        self._cache[value] = result
+        return result
+
+    def resolve_series(self, values: pd.Series, fuzzy: bool = True) -> pd.DataFrame:
+        """
+        Code and match kind per row, one resolve() per distinct value.
+        """
+        codes, uniques = pd.factorize(values)
+        resolved = [self.resolve(value, fuzzy) for value in uniques]
+        # factorize marks missing values with -1, which picks the trailing entry
+        iso = np.array([r[0] for r in resolved] + [None], dtype=object)
+        match = np.array([r[1] for r in resolved] + ["missing"], dtype=object)
+        return pd.DataFrame({"iso": iso[codes], "match": match[codes]}, index=values.index)
+
+    def name(self, code):
+        return self.names.get(code) if isinstance(code, str) else None
+
+
+_INDEX = None
+
+def get_country_index() -> CountryIndex:
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = CountryIndex()
+    return _INDEX
+
+
+# ----------------------------------
+# Batch helpers
+# ----------------------------------
+def iso_dtype() -> pd.CategoricalDtype:
+    """
+    Every alpha-2 code as the categories, so columns from different files
+    or batches share one dtype and concatenate without going back to object.
+    """
+    return pd.CategoricalDtype(sorted(get_country_index().names))
+
+
+def normalize_country_series(values: pd.Series) -> pd.Series:
+    """
+    Canonical ISO alpha-2 code per row as a categorical (NaN when the
+    value is missing or matches no country).
+    """
+    iso = get_country_index().resolve_series(values)["iso"]
+    return iso.astype(iso_dtype())
+
+
+def country_names(codes: pd.Series) -> pd.Series:
+    """
+    pycountry short name per alpha-2 code, resolved once per distinct code.
+    """
+    index = get_country_index()
+    factor, uniques = pd.factorize(codes)
+    names = np.array([index.name(code) for code in uniques] + [None], dtype=object)
+    return pd.Series(names[factor], index=codes.index)
+
+
+def validate_country_series(values: pd.Series, fuzzy: bool = True) -> pd.DataFrame:
+    """
+    Batch country validation.
+
+    - MISSING_COUNTRY: empty or a fill label ('Not Specified')
+    - UNKNOWN_COUNTRY: no name, code, alias or close spelling matches
+    - POSSIBLE_COUNTRY_TYPO: only a misspelling matched; iso holds the country
+    - VALID_COUNTRY: exact name, code or alias
+
+    fuzzy=False (latency-budget fast mode) reports misspellings as UNKNOWN_COUNTRY.
+
+    Returns a frame with is_valid, issue and iso (categorical) columns.
+    """
+    resolved = get_country_index().resolve_series(values, fuzzy)
+    issue = resolved["match"].map({
+        "missing": "MISSING_COUNTRY",
+        "unknown": "UNKNOWN_COUNTRY",
+        "fuzzy": "POSSIBLE_COUNTRY_TYPO",
+        "exact": "VALID_COUNTRY",
+    })
+    return pd.DataFrame({
+        "is_valid": (issue == "VALID_COUNTRY").to_numpy(),
+        "issue": issue.to_numpy(dtype=object),
+        "iso": resolved["iso"].astype(iso_dtype()),
+    }, index=values.index)
@@ -1,5 +1,21 @@
+import os
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
 import pandas as pd
 
+# Row hash mixing (64-bit, wraps around)
+_HASH_SEED = np.uint64(0xCBF29CE484222325)
+_HASH_PRIME = np.uint64(0x100000001B3)
+NULL_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+# (hash, row offset) pairs spilled by ExternalDuplicateFinder
+PAIR_DTYPE = np.dtype([("hash", "<u8"), ("row", "<i8")])
+DEDUP_BUFFER_ROWS = 2_000_000
+
+
 def flag_exact_duplicates(df: pd.DataFrame) -> pd.DataFrame:
     """
     Flags exact duplicates where all columns are identical.
@@ -8,6 +24,397 @@ def flag_exact_duplicates(df: pd.DataFrame) -> pd.DataFrame:
     df_clean = df.copy()
 
     # Flag exact duplicates across all columns
-    df_clean['is_duplicate'] = df_clean.duplicated(keep='first')
+    df_clean['is_duplicate'] = duplicate_mask(df_clean)
 
     return df_clean
+
+
+def _number_hashes(values: np.ndarray) -> np.ndarray:
+    """
+    Hashes of an int or float array: whole floats (including -0.0) are
+    hashed as the int64 they equal, so 3 and 3.0 hash alike whether a chunk
+    parsed ints or floats, while large ints keep every bit.
+    """
+    if values.dtype.kind in "iu":
+        return pd.util.hash_array(values.astype(np.int64, copy=False))
+    values = values.astype(np.float64, copy=False)
+    hashes = np.full(len(values), NULL_HASH, dtype=np.uint64)
+    known = ~np.isnan(values)
+    whole = known & (np.floor(values) == values) & (np.abs(values) < 2.0 ** 63)
+    hashes[whole] = pd.util.hash_array(values[whole].astype(np.int64))
+    other = known & ~whole
+    hashes[other] = pd.util.hash_array(values[other])
+    return hashes
+
+
+def _object_hashes(uniques: np.ndarray) -> np.ndarray:
+    """
+    Hashes of distinct object values by kind: text as text, numbers (and
+    bools) as numbers, anything else by its string form. 1 and '1' differ,
+    1, 1.0 and True match, as they do in DataFrame.duplicated.
+    """
+    hashes = np.empty(len(uniques), dtype=np.uint64)
+    is_text = np.fromiter((isinstance(v, str) for v in uniques), dtype=bool, count=len(uniques))
+    is_number = np.fromiter(
+        (isinstance(v, (float, np.number, np.bool_)) or (isinstance(v, int) and -2 ** 63 <= v < 2 ** 63)
+         for v in uniques),
+        dtype=bool, count=len(uniques)
+    )
+    other = ~(is_text | is_number)
+    if is_text.any():
+        hashes[is_text] = pd.util.hash_array(uniques[is_text], categorize=False)
+    if is_number.any():
+        numbers = uniques[is_number]
+        floats = np.fromiter((isinstance(v, (float, np.floating)) for v in numbers), dtype=bool, count=len(numbers))
+        part = np.empty(len(numbers), dtype=np.uint64)
+        part[floats] = _number_hashes(numbers[floats].astype(np.float64))
+        part[~floats] = _number_hashes(numbers[~floats].astype(np.int64))
+        hashes[is_number] = part
+    if other.any():
+        # Salted so "x" and an object printing as x do not collide
+        hashes[other] = pd.util.hash_array(
+            np.array([str(v) for v in uniques[other]], dtype=object), categorize=False, hash_key="dedup-other-0000"
+        )
+    return hashes
+
+
+def _column_hash(series: pd.Series) -> np.ndarray:
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        kind = series.dtype.kind
+        if kind in "iu":
+            # Nullable ints too, without going through float
+            hashes = _number_hashes(series.to_numpy(dtype="int64" if kind == "i" else "uint64", na_value=0))
+            hashes[series.isna().to_numpy()] = NULL_HASH
+            return hashes
+        return _number_hashes(series.to_numpy(dtype="float64", na_value=np.nan))
+    # Everything else: hash each distinct value once; factorize marks nulls
+    # with -1, which picks the trailing NULL_HASH
+    codes, uniques = pd.factorize(series)
+    hashes = _object_hashes(np.asarray(uniques, dtype=object))
+    return np.append(hashes, NULL_HASH)[codes]
+
+
+def hash_rows(df: pd.DataFrame) -> np.ndarray:
+    """
+    64-bit hash per row, stable across chunks of the same file.
+    Chunks of one column can be parsed as int, float, text or all-null, so
+    whole numbers hash alike as int or float and every null as NULL_HASH
+    whatever the dtype. Equal rows (as DataFrame.duplicated compares them)
+    always get equal hashes; unequal rows rarely do, so callers that need
+    exact duplicates compare the rows of each hash match (duplicate_mask,
+    ExternalDuplicateFinder). Each column is hashed as one array (numbers
+    without boxing them into Python objects) and the columns are mixed in
+    order.
+    """
+    hashes = np.full(len(df), _HASH_SEED, dtype=np.uint64)
+    for i in range(df.shape[1]):
+        hashes ^= _column_hash(df.iloc[:, i])
+        hashes *= _HASH_PRIME
+    # Final avalanche so the top bits (used for partitioning) depend on every column
+    hashes ^= hashes >> np.uint64(33)
+    hashes *= np.uint64(0xFF51AFD7ED558CCD)
+    hashes ^= hashes >> np.uint64(33)
+    return hashes
+
+
+def duplicate_mask(df: pd.DataFrame) -> np.ndarray:
+    """
+    DataFrame.duplicated(keep='first'), exactly: row hashes pick the rows
+    that may repeat one another, and only those are compared as rows.
+    """
+    candidates = pd.Series(hash_rows(df)).duplicated(keep=False).to_numpy()
+    mask = np.zeros(len(df), dtype=bool)
+    if candidates.any():
+        mask[candidates] = df[candidates].duplicated(keep='first').to_numpy()
+    return mask
+
+
+class RowHashSet:
+    """
+    Set of distinct row hashes that can be merged across partitions.
+
+    Hashes are kept in memory until max_in_memory of them are buffered, then
+    spilled into n_partitions files under spill_dir, split on the top bits
+    of the hash. Counting then loads one partition at a time.
+    """
+
+    def __init__(self, max_in_memory: int = 10_000_000, spill_dir: str | None = None, n_partitions: int = 64):
+        self.max_in_memory = max_in_memory
+        self.spill_dir = spill_dir
+        self.n_partitions = n_partitions
+        self._chunks = []
+        self._buffered = 0
+        self._spilled = False
+
+    def add(self, hashes: np.ndarray):
+        self._chunks.append(np.asarray(hashes, dtype=np.uint64))
+        self._buffered += len(hashes)
+        if self._buffered > self.max_in_memory:
+            self._compact()
+            if self._buffered > self.max_in_memory:
+                self._spill()
+        return self
+
+    def _compact(self):
+        # Also for a single chunk: one partition's hashes still hold its duplicates
+        if self._chunks:
+            self._chunks = [np.unique(np.concatenate(self._chunks))]
+            self._buffered = len(self._chunks[0])
+
+    def _partition_path(self, i: int) -> str:
+        return os.path.join(self.spill_dir, f"hashes_{i:03d}.bin")
+
+    def _spill(self):
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="rowhash_")
+        os.makedirs(self.spill_dir, exist_ok=True)
+
+        hashes = np.concatenate(self._chunks)
+        shift = np.uint64(64 - int(np.log2(self.n_partitions)))
+        partition = (hashes >> shift).astype(np.int64)
+        order = np.argsort(partition, kind="stable")
+        bounds = np.searchsorted(partition[order], np.arange(self.n_partitions + 1))
+        for i in range(self.n_partitions):
+            part = hashes[order[bounds[i]:bounds[i + 1]]]
+            if len(part):
+                with open(self._partition_path(i), "ab") as f:
+                    part.tofile(f)
+
+        self._chunks, self._buffered, self._spilled = [], 0, True
+
+    def merge(self, other: "RowHashSet") -> "RowHashSet":
+        """
+        Adds every hash of other into this set.
+        """
+        for chunk in other._chunks:
+            self.add(chunk)
+        if other._spilled:
+            if not self._spilled:
+                self._spill()
+            for i in range(other.n_partitions):
+                path = other._partition_path(i)
+                if os.path.exists(path):
+                    self.add(np.fromfile(path, dtype=np.uint64))
+        return self
+
+    def __len__(self) -> int:
+        if not self._spilled:
+            self._compact()
+            return len(self._chunks[0]) if self._chunks else 0
+        if self._chunks:
+            self._spill()
+        total = 0
+        for i in range(self.n_partitions):
+            path = self._partition_path(i)
+            if os.path.exists(path):
+                total += len(np.unique(np.fromfile(path, dtype=np.uint64)))
+        return total
+
+    def cleanup(self):
+        if self._spilled and self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+        self._chunks, self._buffered, self._spilled = [], 0, False
+
+
+class ExternalDuplicateFinder:
+    """
+    Exact keep-first duplicate detection for streams larger than memory.
+
+    1️⃣ add() takes each batch's row hashes; (hash, row offset) pairs are
+       buffered, then appended to n_partitions files split on the top bits
+       of the hash, so equal rows always land in the same partition. The
+       batch's rows are appended to the same partitions right away.
+    2️⃣ duplicate_rows() loads one partition at a time, sorts it by
+       (hash, row) and takes the pairs whose hash repeats; the rows behind
+       them are read back and compared (DataFrame.duplicated over the rows
+       and their hash), so a hash collision is never counted. The first
+       occurrence (lowest offset) is kept, as in duplicated().
+    3️⃣ iter_masks() streams the result back as one bool mask per batch.
+
+    Memory is one partition's pairs, the rows of its hash matches and the
+    offsets of the duplicate rows. Batches added as bare hashes (add()
+    without rows) are compared by hash only.
+    """
+
+    def __init__(self, n_partitions: int = 64, spill_dir: str | None = None, buffer_rows: int = DEDUP_BUFFER_ROWS):
+        self.n_partitions = n_partitions
+        self.spill_dir = spill_dir
+        self.buffer_rows = buffer_rows
+        self.rows = 0
+        self._buffer = []
+        self._buffered = 0
+        self._hash_only = False
+        self._owns_dir = spill_dir is None
+        self._duplicates = None
+
+    def add(self, hashes: np.ndarray, rows: pd.DataFrame | None = None):
+        """
+        Adds the next batch; its rows get the next offsets in the stream.
+        Pass the batch as rows to have hash matches confirmed row by row.
+        """
+        pairs = np.empty(len(hashes), dtype=PAIR_DTYPE)
+        pairs["hash"] = hashes
+        pairs["row"] = np.arange(self.rows, self.rows + len(hashes))
+        self.rows += len(hashes)
+        if rows is None:
+            self._hash_only = True
+        elif len(pairs):
+            self._spill_rows(pairs, rows)
+        self._buffer.append(pairs)
+        self._buffered += len(pairs)
+        self._duplicates = None
+        if self._buffered >= self.buffer_rows:
+            self._flush()
+        return self
+
+    def add_frame(self, df: pd.DataFrame):
+        return self.add(hash_rows(df), df)
+
+    def _partition_path(self, i: int) -> str:
+        return os.path.join(self.spill_dir, f"pairs_{i:03d}.bin")
+
+    def _rows_path(self, i: int) -> str:
+        return os.path.join(self.spill_dir, f"rows_{i:03d}.pkl")
+
+    def _partitions(self, hashes: np.ndarray):
+        """
+        Yields (partition, positions) for every non-empty partition of hashes.
+        """
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="dedup_")
+        os.makedirs(self.spill_dir, exist_ok=True)
+        shift = np.uint64(64 - int(np.log2(self.n_partitions)))
+        partition = (hashes >> shift).astype(np.int64)
+        order = np.argsort(partition, kind="stable")
+        bounds = np.searchsorted(partition[order], np.arange(self.n_partitions + 1))
+        for i in range(self.n_partitions):
+            if bounds[i + 1] > bounds[i]:
+                yield i, order[bounds[i]:bounds[i + 1]]
+
+    def _spill_rows(self, pairs: np.ndarray, rows: pd.DataFrame):
+        # Indexed by stream offset, so the partition can be matched to its pairs
+        rows = rows.set_axis(pairs["row"], axis=0)
+        for i, positions in self._partitions(pairs["hash"]):
+            with open(self._rows_path(i), "ab") as f:
+                pickle.dump(rows.iloc[positions], f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _load_rows(self, i: int, offsets: np.ndarray) -> pd.DataFrame:
+        """
+        The spilled rows of partition i at the given (sorted) offsets.
+        """
+        parts = []
+        with open(self._rows_path(i), "rb") as f:
+            while True:
+                try:
+                    part = pickle.load(f)
+                except EOFError:
+                    break
+                parts.append(part[part.index.isin(offsets)])
+        return pd.concat(parts).loc[offsets]
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        pairs = np.concatenate(self._buffer)
+        for i, positions in self._partitions(pairs["hash"]):
+            with open(self._partition_path(i), "ab") as f:
+                pairs[positions].tofile(f)
+        self._buffer, self._buffered = [], 0
+
+    def _partition_duplicates(self, pairs: np.ndarray, i: int | None = None) -> np.ndarray:
+        pairs = pairs[np.lexsort((pairs["row"], pairs["hash"]))]
+        hashes = pairs["hash"]
+        repeat = np.zeros(len(hashes), dtype=bool)
+        repeat[1:] = hashes[1:] == hashes[:-1]
+        if i is None or self._hash_only or not repeat.any():
+            return pairs["row"][repeat]
+
+        # Every pair of a repeated hash, in stream order
+        matched = repeat.copy()
+        matched[:-1] |= repeat[1:]
+        candidates = np.sort(pairs[matched], order="row")
+        rows = self._load_rows(i, candidates["row"])
+        # The hash joins the comparison: two chunks can parse a column as
+        # int and float, and the float cast must not merge distinct ints
+        rows = rows.set_axis(range(rows.shape[1]), axis=1)
+        rows[rows.shape[1]] = candidates["hash"]
+        return candidates["row"][rows.duplicated(keep='first').to_numpy()]
+
+    def duplicate_rows(self) -> np.ndarray:
+        """
+        Sorted offsets of the rows that repeat an earlier row.
+        """
+        if self._duplicates is not None:
+            return self._duplicates
+        if self.spill_dir is None:
+            # Bare hashes that still fit in the buffer
+            pairs = np.concatenate(self._buffer) if self._buffer else np.empty(0, dtype=PAIR_DTYPE)
+            found = [self._partition_duplicates(pairs)]
+        else:
+            self._flush()
+            found = []
+            for i in range(self.n_partitions):
+                path = self._partition_path(i)
+                if os.path.exists(path):
+                    found.append(self._partition_duplicates(np.fromfile(path, dtype=PAIR_DTYPE), i))
+        self._duplicates = np.sort(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+        return self._duplicates
+
+    @property
+    def duplicates(self) -> int:
+        return int(len(self.duplicate_rows()))
+
+    def mask_range(self, start: int, size: int) -> np.ndarray:
+        """
+        Duplicate mask of rows [start, start + size) of the stream.
+        """
+        duplicates = self.duplicate_rows()
+        lo, hi = np.searchsorted(duplicates, [start, start + size])
+        mask = np.zeros(size, dtype=bool)
+        mask[duplicates[lo:hi] - start] = True
+        return mask
+
+    def iter_masks(self, batch_sizes):
+        """
+        Yields the duplicate mask of each batch, for the batch sizes given
+        to add() in the same order.
+        """
+        start = 0
+        for size in batch_sizes:
+            yield self.mask_range(start, size)
+            start += size
+
+    def cleanup(self):
+        if self.spill_dir is not None:
+            if self._owns_dir:
+                shutil.rmtree(self.spill_dir, ignore_errors=True)
+            else:
+                for i in range(self.n_partitions):
+                    for path in (self._partition_path(i), self._rows_path(i)):
+                        if os.path.exists(path):
+                            os.remove(path)
+        self._buffer, self._buffered = [], 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
+        return False
+
+
+def file_duplicate_masks(batches, **kwargs):
+    """
+    Duplicate mask per batch of a file, for an iterable of batches that can
+    be read twice (e.g. a list, or a callable returning a fresh iterator).
+
+    Returns:
+        (masks: list of bool ndarrays, duplicates: int)
+    """
+    read = batches if callable(batches) else (lambda: batches)
+    with ExternalDuplicateFinder(**kwargs) as finder:
+        sizes = []
+        for batch in read():
+            finder.add_frame(batch)
+            sizes.append(len(batch))
+        return list(finder.iter_masks(sizes)), finder.duplicates
@@ -0,0 +1,261 @@
+# backend/preprocessing/email_domains.py
+import re
+
+import pandas as pd
+import numpy as np
+
+# Mail providers and large corporate domains: never flagged themselves, and
+# typo targets when their name is long enough (see MIN_LABEL_LENGTH)
+COMMON_EMAIL_DOMAINS = {
+    # Global providers
+    "gmail.com", "googlemail.com", "yahoo.com", "ymail.com", "rocketmail.com",
+    "hotmail.com", "outlook.com", "live.com", "msn.com", "icloud.com", "me.com",
+    "mac.com", "aol.com", "protonmail.com", "proton.me", "zoho.com", "mail.com",
+    "gmx.com", "yandex.com", "fastmail.com", "hey.com", "tutanota.com",
+    # Regional providers
+    "yahoo.co.uk", "yahoo.co.in", "yahoo.fr", "yahoo.de", "yahoo.es", "yahoo.it",
+    "hotmail.co.uk", "hotmail.fr", "hotmail.de", "hotmail.it", "hotmail.es",
+    "outlook.fr", "outlook.de", "live.co.uk", "btinternet.com", "sky.com",
+    "virginmedia.com", "talktalk.net", "ntlworld.com", "gmx.de", "gmx.net",
+    "web.de", "t-online.de", "orange.fr", "free.fr", "wanadoo.fr", "sfr.fr",
+    "libero.it", "virgilio.it", "yandex.ru", "mail.ru", "rediffmail.com",
+    "qq.com", "163.com", "126.com", "naver.com", "comcast.net", "verizon.net",
+    "att.net", "sbcglobal.net", "bellsouth.net", "cox.net", "shaw.ca",
+    "rogers.com", "bigpond.com", "optusnet.com.au",
+    # Corporate
+    "microsoft.com", "google.com", "apple.com", "amazon.com", "ibm.com",
+    "oracle.com", "salesforce.com", "accenture.com", "deloitte.com", "pwc.com",
+    "ey.com", "kpmg.com", "infosys.com", "tcs.com", "wipro.com", "sap.com",
+}
+
+# Same check validate_email has always made (prefix match)
+EMAIL_PATTERN = r"[^@]+@[^@]+\.[^@]+"
+MISSING_EMAIL_VALUES = {"", "not provided"}
+
+# A seen domain becomes a correction target once it is this common ...
+MIN_SUPPORT = 3
+# ... and at least this many times more common than the domain it replaces
+SUPPORT_RATIO = 5
+
+# Names (the label before the first dot) shorter than this are never used
+# as targets: gap / snap / sas are all one edit from sap. A name one letter
+# shorter may still be corrected to a bundled target (gmai -> gmail)
+MIN_LABEL_LENGTH = 5
+
+
+# ----------------------------------
+# Edit distance
+# ----------------------------------
+def osa_distance(a: str, b: str, max_distance: int | None = None) -> int:
+    """
+    Optimal string alignment distance: Levenshtein plus adjacent
+    transpositions, so 'gmial' is one edit from 'gmail'.
+
+    With max_distance, only the diagonal band that can stay within it is
+    filled and the scan stops once a row exceeds it; the result is then
+    max_distance + 1 for anything further away.
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+
+    limit = len(a) if max_distance is None else max_distance
+    if len(a) - len(b) > limit:
+        return limit + 1
+    if not b:
+        return len(a)
+
+    big = limit + 1
+    previous2 = None
+    previous = [j if j <= limit else big for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        current = [big] * (len(b) + 1)
+        current[0] = i if i <= limit else big
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        for j in range(low, high + 1):
+            cb = b[j - 1]
+            cost = 0 if ca == cb else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        if min(current[max(0, low - 1):high + 1]) > limit:
+            return big
+        previous2, previous = previous, current
+    return min(previous[-1], big)
+
+
+def deletions(word: str, max_distance: int) -> set:
+    """
+    Every string reachable from word by deleting up to max_distance characters
+    (word itself included).
+    """
+    found, frontier = {word}, {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+class DeletionIndex:
+    """
+    SymSpell-style lookup: words are indexed under their deletions, so a
+    query only generates its own deletions and looks them up in a dict.
+    Two strings within edit distance d share a deletion of at most d
+    characters each; shared keys are then checked with osa_distance.
+    Query cost depends on the query length, not on the number of words.
+    """
+
+    def __init__(self, words=(), max_distance: int = 2):
+        self.max_distance = max_distance
+        self.index = {}
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str):
+        for key in deletions(word, self.max_distance):
+            self.index.setdefault(key, set()).add(word)
+
+    def search(self, word: str, max_distance: int | None = None, skip=None) -> list:
+        """
+        Returns [(distance, word)] within max_distance, closest first.
+        skip(word, candidate) -> True drops a candidate before its distance is computed.
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        candidates = set()
+        for key in deletions(word, min(max_distance, self.max_distance)):
+            candidates |= self.index.get(key, set())
+
+        found = []
+        for candidate in candidates:
+            if abs(len(candidate) - len(word)) > max_distance:
+                continue
+            if skip is not None and skip(word, candidate):
+                continue
+            d = osa_distance(word, candidate, max_distance)
+            if d <= max_distance:
+                found.append((d, candidate))
+        return sorted(found)
+
+
+# ----------------------------------
+# Domain suggestions
+# ----------------------------------
+def split_domain(domain: str) -> tuple:
+    """
+    ('gmial', 'com') for 'gmial.com', ('yahoo', 'co.uk') for 'yahoo.co.uk'.
+    """
+    label, _, suffix = domain.partition(".")
+    return label, suffix
+
+
+def max_edits(domain: str) -> int:
+    # Short names have many one-edit neighbours; allow one typo only
+    return 1 if len(split_domain(domain)[0]) <= 8 else 2
+
+
+def _not_a_typo(domain: str, target: str) -> bool:
+    """
+    Pairs never treated as a typo: a different suffix (only the name is
+    corrected, never the TLD), a target name under MIN_LABEL_LENGTH, or
+    digits only (company206.com vs company207.com are siblings).
+    """
+    label, suffix = split_domain(domain)
+    target_label, target_suffix = split_domain(target)
+    if suffix != target_suffix or len(target_label) < MIN_LABEL_LENGTH:
+        return True
+    return re.sub(r"\d", "", domain) == re.sub(r"\d", "", target)
+
+
+def suggest_domains(domain_counts: pd.Series, known_domains=None, min_support: int = MIN_SUPPORT,
+                    support_ratio: float = SUPPORT_RATIO) -> dict:
+    """
+    Correction per distinct domain, e.g. {'gmial.com': 'gmail.com'}.
+    domain_counts maps each domain of the column to its number of rows.
+
+    Targets are the bundled domains plus domains seen at least min_support
+    times in the column, looked up in a deletion index. A seen domain only replaces one that is
+    support_ratio times rarer, so two real company domains one letter
+    apart are left alone. Only the name before the first dot is corrected,
+    targets need a name of at least MIN_LABEL_LENGTH, and the rest of the
+    domain must match. A name one letter shorter is only matched one edit
+    from a bundled domain (gmai.com -> gmail.com). Each distinct domain is
+    queried once.
+    """
+    known = COMMON_EMAIL_DOMAINS if known_domains is None else set(known_domains)
+    counts = domain_counts[domain_counts > 0]
+    support = {d: int(c) for d, c in counts.items() if c >= min_support}
+
+    def long_enough(domain):
+        return len(split_domain(domain)[0]) >= MIN_LABEL_LENGTH
+
+    known_index = DeletionIndex(filter(long_enough, known), max_distance=2)
+    # Seen domains can be many, so they are indexed one deletion deep:
+    # enough for the usual one-letter typo of a company domain
+    seen_index = DeletionIndex((d for d in support if d not in known and long_enough(d)), max_distance=1)
+
+    suggestions = {}
+    for domain, count in counts.items():
+        if domain in known:
+            continue
+        length = len(split_domain(domain)[0])
+        if length < MIN_LABEL_LENGTH - 1:
+            continue
+        if length < MIN_LABEL_LENGTH:
+            # Short name: a single edit from a bundled domain only
+            matches = known_index.search(domain, 1, skip=_not_a_typo)
+        else:
+            limit = max_edits(domain)
+            matches = sorted(
+                known_index.search(domain, limit, skip=_not_a_typo)
+                + seen_index.search(domain, min(limit, 1), skip=_not_a_typo)
+            )
+        for distance, candidate in matches:
+            if candidate in known or support.get(candidate, 0) >= support_ratio * count:
+                suggestions[domain] = candidate
+                break
+    return suggestions
+
+
+def validate_email_series(emails: pd.Series, known_domains=None) -> pd.DataFrame:
+    """
+    Batch email validation with domain typo suggestions.
+
+    1️⃣ Check the format once per distinct value
+    2️⃣ Look up each distinct domain in the deletion index once
+    3️⃣ Rows with a correctable domain get POSSIBLE_DOMAIN_TYPO and a suggestion;
+       they stay valid, since the domain may be real
+
+    Returns a frame with is_valid, issue and suggested columns.
+    """
+    codes, uniques = pd.factorize(emails)
+    text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+
+    missing = text.str.lower().isin(MISSING_EMAIL_VALUES).to_numpy()
+    well_formed = text.str.match(EMAIL_PATTERN).to_numpy() & ~missing
+    local = text.str.rsplit("@", n=1).str[0]
+    domain = text.str.rsplit("@", n=1).str[-1].str.lower()
+
+    # Rows per distinct domain, from the rows per distinct email
+    rows = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    domain_counts = pd.Series(rows[well_formed], index=domain[well_formed].to_numpy()).groupby(level=0).sum()
+
+    corrections = suggest_domains(domain_counts, known_domains)
+    suggested_domain = domain.map(corrections).where(well_formed)
+    typo = suggested_domain.notna().to_numpy()
+
+    issue = np.where(missing, "MISSING_EMAIL",
+             np.where(~well_formed, "INVALID_EMAIL_FORMAT",
+              np.where(typo, "POSSIBLE_DOMAIN_TYPO", "VALID_EMAIL")))
+    suggested = (local + "@" + suggested_domain).where(typo, None).to_numpy(dtype=object)
+
+    # factorize marks missing values with -1, which picks the trailing entry
+    issue = np.append(issue, "MISSING_EMAIL")
+    suggested = np.append(suggested, None)
+    return pd.DataFrame({
+        "is_valid": np.isin(issue, ["VALID_EMAIL", "POSSIBLE_DOMAIN_TYPO"])[codes],
+        "issue": issue[codes],
+        "suggested": suggested[codes],
+    }, index=emails.index)
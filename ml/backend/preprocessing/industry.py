@@ -0,0 +1,217 @@
+# backend/preprocessing/industry.py
+import re
+import time
+
+import pandas as pd
+import numpy as np
+
+# Canonical industry -> spellings, abbreviations and sub-sectors that fold into it
+INDUSTRY_TAXONOMY = {
+    "Information Technology": [
+        "IT", "IT Services", "IT Service", "Information Tech", "Information Technology Services",
+        "Tech", "Technology", "Tech Services", "Software", "Software Development",
+        "IT Consultancy Services", "IT Consulting", "Computer Services", "Computer Networking",
+    ],
+    "Artificial Intelligence": [
+        "AI", "AI & ML", "AI/ML", "Machine Learning", "Artificial Intelligence and Machine Learning",
+    ],
+    "Cloud Computing": ["Cloud", "Cloud Services", "SaaS"],
+    "Cybersecurity": ["Cyber Security", "Computer and Network Security", "Information Security"],
+    "Telecommunications": ["Telecom", "Telecoms", "Telecommunication Services", "Telecommunication", "Mobile Phones"],
+    "Marketing & Advertising": [
+        "Marketing", "Mktg", "Digital Marketing", "Advertising", "Marketing Services", "Marketing Agency",
+    ],
+    "Manufacturing": ["Mfg", "Manufacture", "Manufacturer", "Manufacturers", "Production"],
+    "Retail": ["Retailing", "Retail Trade", "Retail Store", "Shops", "Fashion Retail"],
+    "E-Commerce": ["Ecommerce", "E Commerce", "Online Retail", "Online Shopping"],
+    "Wholesale": ["Wholesale Trade", "Wholesalers", "Food Wholesale", "Import & Export"],
+    "Construction": [
+        "Builders", "Building", "Builders/Construction Firm", "Construction Firm", "Contractors",
+    ],
+    "Healthcare": [
+        "Health Care", "Healthcare Services", "Health Services", "Medical", "Hospital",
+        "Home Health Care Services",
+    ],
+    "Medical Technology": ["Medtech", "Medical Tech", "Medical Devices", "Health Tech", "HealthTech"],
+    "Pharmaceuticals": ["Pharma", "Pharmaceutical", "Drug Stores/Pharmacies", "Pharmacies", "Biotech"],
+    "Automotive": [
+        "Auto", "Automobile", "Car Dealers", "Motor Vehicles", "Vehicle Repairs", "Auto Parts & Supplies",
+    ],
+    "Hospitality": [
+        "Hotels", "Hotel", "Restaurant", "Restaurants", "Food Service", "Bed & Breakfast",
+        "Tourism", "Travel", "Tour Operators", "Leisure",
+    ],
+    "Food & Beverage": ["Food", "Beverages", "Food and Drink", "F&B"],
+    "Education": [
+        "Educational Services", "Training Services", "Training", "Schools", "Higher Education", "Education Services",
+    ],
+    "Education Technology": ["EdTech", "Education Tech", "E-Learning", "eLearning"],
+    "Transportation": ["Transport", "Freight", "Shipping", "Trucking"],
+    "Logistics & Supply Chain": [
+        "Logistics", "Supply Chain", "SCM", "Supply Chain Management", "Warehousing",
+    ],
+    "Financial Services": [
+        "Finance", "Financial", "Banking", "Bank", "Investment", "Investment Banking", "Accounting",
+    ],
+    "Fintech": ["Fin Tech", "Financial Technology"],
+    "Insurance": ["Insurance Services", "Insurers"],
+    "Energy": [
+        "Renewable Energy", "Power Systems", "Utilities", "Oil & Gas", "Oil and Gas", "Solar", "Power", "Fuel", "Fuel Dealers",
+    ],
+    "Agriculture": ["Agricultural Services", "Agriculture Products", "Farming", "Agritech"],
+    "Real Estate": ["Property", "Real Estate Agents", "Estate Agents", "Property Management"],
+    "Professional Services": [
+        "Consulting", "Consultancy", "Business Management Consultants", "Management Consulting", "Legal Services",
+    ],
+    "Media & Entertainment": ["Media", "Entertainment", "Events Management", "Publishing", "Broadcasting"],
+    "Non-Profit": ["Nonprofit", "Charity", "NGO"],
+    "Government": ["Public Sector", "Government Administration"],
+}
+
+# Fill labels and placeholders that stay as they are
+MISSING_INDUSTRY_VALUES = {"", "unknown", "unknown industry", "not provided", "n/a", "na", "none", "nan", "-"}
+
+# Cosine similarity a value needs to take a canonical name
+MIN_SIMILARITY = 0.65
+
+# Distinct values scored per sparse matrix product
+BATCH_SIZE = 4_096
+
+
+def industry_key(value) -> str:
+    """
+    Lookup key: lower case, '&' spelled out, punctuation to single spaces
+    ('IT-Services' -> 'it services', 'AI& ML' -> 'ai and ml').
+    """
+    text = str(value).lower().replace("&", " and ")
+    return re.sub(r"[^a-z0-9]+", " ", text).strip()
+
+
+# ----------------------------------
+# Index
+# ----------------------------------
+class IndustryIndex:
+    """
+    Nearest-neighbour lookup from free-text industries to the taxonomy.
+
+    Every canonical name and variant is a row of a character n-gram TF-IDF
+    matrix (scikit-learn, L2-normalized), built once. A batch of distinct
+    query values is vectorized together, and one sparse product with the
+    transposed index gives all cosine similarities; the row-wise argmax is
+    the top-1 match. Exact keys skip the product through a plain dict.
+    """
+
+    def __init__(self, taxonomy=None, min_similarity: float = MIN_SIMILARITY):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        taxonomy = INDUSTRY_TAXONOMY if taxonomy is None else taxonomy
+        self.min_similarity = min_similarity
+
+        self.exact = {}
+        for canonical, variants in taxonomy.items():
+            for variant in [canonical, *variants]:
+                self.exact.setdefault(industry_key(variant), canonical)
+
+        self.keys = list(self.exact)
+        self.labels = np.array([self.exact[k] for k in self.keys], dtype=object)
+        self.vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), sublinear_tf=True)
+        # Stored transposed (features x variants) so queries multiply directly
+        self.matrix_t = self.vectorizer.fit_transform(self.keys).T.tocsr()
+
+    def nearest(self, keys: list, batch_size: int = BATCH_SIZE):
+        """
+        Top-1 variant per key.
+
+        Returns:
+        (canonical: object ndarray, similarity: float ndarray)
+        """
+        canonical = np.empty(len(keys), dtype=object)
+        similarity = np.zeros(len(keys), dtype=np.float64)
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            scores = self.vectorizer.transform(batch) @ self.matrix_t
+            best = np.asarray(scores.argmax(axis=1)).ravel()
+            canonical[start:start + len(batch)] = self.labels[best]
+            similarity[start:start + len(batch)] = scores.max(axis=1).toarray().ravel()
+        return canonical, similarity
+
+    def lookup(self, values, fuzzy: bool = True) -> tuple:
+        """
+        Canonical industry per distinct value: exact key first, then the
+        nearest variant when it is similar enough (unless fuzzy=False),
+        otherwise None.
+
+        Returns:
+        (canonical: object ndarray, match: object ndarray of 'exact' | 'nearest' | 'missing' | None)
+        """
+        keys = [industry_key(v) for v in values]
+        canonical = np.array([self.exact.get(k) for k in keys], dtype=object)
+        match = np.where(pd.notna(canonical), "exact", None).astype(object)
+
+        missing = np.array([k in MISSING_INDUSTRY_VALUES for k in keys], dtype=bool)
+        match[missing] = "missing"
+
+        pending = np.flatnonzero(pd.isna(canonical) & ~missing)
+        if len(pending) and fuzzy:
+            nearest, similarity = self.nearest([keys[i] for i in pending])
+            close = similarity >= self.min_similarity
+            canonical[pending[close]] = nearest[close]
+            match[pending[close]] = "nearest"
+        return canonical, match
+
+
+_INDEX = None
+
+def get_industry_index() -> IndustryIndex:
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = IndustryIndex()
+    return _INDEX
+
+
+# ----------------------------------
+# Batch normalization
+# ----------------------------------
+def normalize_industry_series(values: pd.Series, index: IndustryIndex | None = None, return_changed: bool = False,
+                              fuzzy: bool = True):
+    """
+    Maps each row to its canonical industry, scoring every distinct raw
+    value once. Values with no close match keep their text (trimmed);
+    missing values and fill labels are left untouched. fuzzy=False only
+    folds exact variants (no TF-IDF product).
+
+    Returns:
+    (normalized: Series, stats: dict), plus a bool ndarray of the rows whose
+    value changed if return_changed
+    """
+    index = get_industry_index() if index is None else index
+    started = time.perf_counter()
+
+    codes, uniques = pd.factorize(values)
+    uniques = np.asarray(uniques, dtype=object)
+    canonical, match = index.lookup(uniques, fuzzy)
+
+    unmatched = pd.isna(canonical)
+    canonical[unmatched] = [str(v).strip() for v in uniques[unmatched]]
+    keep_raw = match == "missing"
+    canonical[keep_raw] = uniques[keep_raw]
+
+    # factorize marks missing values with -1, which picks the trailing entry
+    normalized = pd.Series(np.append(canonical, None)[codes], index=values.index)
+    normalized = normalized.where(codes >= 0, values)
+
+    seconds = time.perf_counter() - started
+    stats = {
+        "rows": int(len(values)),
+        "unique_before": int(len(uniques)),
+        "unique_after": int(pd.unique(canonical).size),
+        "exact": int((match == "exact").sum()),
+        "nearest": int((match == "nearest").sum()),
+        "unmatched": int(pd.isna(match).sum()),
+        "seconds": round(seconds, 4),
+        "rows_per_second": int(len(values) / seconds) if seconds > 0 else None,
+    }
+    if return_changed:
+        moved = np.append(canonical != uniques, False)
+        return normalized, stats, moved[codes]
+    return normalized, stats
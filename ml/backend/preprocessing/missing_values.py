@@ -1,9 +1,5 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.linear_model import LinearRegression
 
 # =========================
 # Revenue column detection
@@ -32,7 +28,19 @@ def get_revenue_column(df: pd.DataFrame) -> str | None:
 # =========================
 # Revenue imputation logic
 # =========================
-def impute_annual_revenue(df: pd.DataFrame) -> pd.DataFrame:
+# Columns of a pooled revenue frame (see impute_annual_revenue)
+REVENUE_POOL_COLUMNS = ["revenue", "company_size", "industry", "country"]
+
+
+def _as_text_keys(frame: pd.DataFrame, cols: list) -> pd.DataFrame:
+    """
+    Feature columns as text (missing stays missing), so files that parsed
+    company_size as numbers and as strings pool into the same groups.
+    """
+    return frame.assign(**{c: frame[c].astype(str).where(frame[c].notna(), np.nan).astype(object) for c in cols})
+
+
+def impute_annual_revenue(df: pd.DataFrame, use_model: bool = True, pool: pd.DataFrame | None = None) -> pd.DataFrame:
     """
     Impute missing revenue using:
     1️⃣ Regression (company_size, industry, country)
@@ -42,6 +50,13 @@ def impute_annual_revenue(df: pd.DataFrame) -> pd.DataFrame:
     Adds:
     - <revenue_col>_source
     - <revenue_col>_confidence
+
+    use_model=False skips step 1 (latency-budget fast mode).
+
+    pool: known revenues from related files (REVENUE_POOL_COLUMNS, revenue
+    already numeric). The model, group medians and global median are then
+    fitted on the pool plus this file's rows, so a small file borrows
+    statistics from its batch; only this file's rows are filled.
     """
 
     df = df.copy()
@@ -62,10 +77,14 @@ def impute_annual_revenue(df: pd.DataFrame) -> pd.DataFrame:
     df[source_col] = "original"
     df[conf_col] = 1.0
 
+    pooled = None
+    if pool is not None and len(pool):
+        pooled = pool.rename(columns={"revenue": target_col})
+
     # =========================
     # 1️⃣ Model-based imputation
     # =========================
-    if len(available_features) == len(feature_cols):
+    if use_model and len(available_features) == len(feature_cols):
         mask_train = (
             df[target_col].notna()
             & df[feature_cols].notna().all(axis=1)
@@ -73,8 +92,19 @@ def impute_annual_revenue(df: pd.DataFrame) -> pd.DataFrame:
 
         X_train = df.loc[mask_train, feature_cols]
         y_train = df.loc[mask_train, target_col]
+        pooled_features = pooled is not None and all(c in pooled.columns for c in feature_cols)
+        if pooled_features:
+            pooled_train = pooled[pooled[feature_cols].notna().all(axis=1)]
+            X_train = _as_text_keys(pd.concat([pooled_train[feature_cols], X_train], ignore_index=True), feature_cols)
+            y_train = pd.concat([pooled_train[target_col], y_train], ignore_index=True)
 
         if len(X_train) >= 5:  # safety threshold
+            # scikit-learn is only imported when a model is actually fitted
+            from sklearn.preprocessing import OneHotEncoder
+            from sklearn.compose import ColumnTransformer
+            from sklearn.pipeline import Pipeline
+            from sklearn.linear_model import LinearRegression
+
             preprocess = ColumnTransformer(
                 transformers=[
                     ("cat", OneHotEncoder(handle_unknown="ignore"), feature_cols)
@@ -94,9 +124,10 @@ def impute_annual_revenue(df: pd.DataFrame) -> pd.DataFrame:
             )
 
             if mask_predict.any():
-                df.loc[mask_predict, target_col] = model.predict(
-                    df.loc[mask_predict, feature_cols]
-                )
+                X_predict = df.loc[mask_predict, feature_cols]
+                if pooled_features:
+                    X_predict = _as_text_keys(X_predict, feature_cols)
+                df.loc[mask_predict, target_col] = model.predict(X_predict)
                 df.loc[mask_predict, conf_col] = 0.6
                 df.loc[mask_predict, source_col] = "model_imputed"
 
@@ -108,7 +139,15 @@ def impute_annual_revenue(df: pd.DataFrame) -> pd.DataFrame:
         if not valid_cols:
             return df
 
-        group_median = df.groupby(valid_cols)[target].transform("median")
+        if pooled is None:
+            group_median = df.groupby(valid_cols)[target].transform("median")
+        else:
+            # Medians over pool + file, read back for the file's rows
+            combined = _as_text_keys(pd.concat(
+                [pooled.reindex(columns=valid_cols + [target]), df[valid_cols + [target]]], ignore_index=True
+            ), valid_cols)
+            group_median = combined.groupby(valid_cols, sort=False)[target].transform("median").iloc[len(pooled):]
+            group_median.index = df.index
         mask = df[target].isna() & group_median.notna()
 
         df.loc[mask, target] = group_median[mask]
@@ -124,7 +163,10 @@ def impute_annual_revenue(df: pd.DataFrame) -> pd.DataFrame:
     # =========================
     # 3️⃣ Global median fallback
     # =========================
-    global_median = df[target_col].median()
+    global_median = (
+        df[target_col].median() if pooled is None
+        else pd.concat([pooled[target_col], df[target_col]]).median()
+    )
     mask_global = df[target_col].isna()
 
     if pd.notna(global_median):
@@ -72,9 +72,16 @@ def normalize_address(df: pd.DataFrame, address_columns: list) -> pd.DataFrame:
         if col in df.columns:
             df[col] = df[col].apply(normalize_text)
 
-    df['full_address'] = df[address_columns].fillna("").agg(", ".join, axis=1)
-    df['full_address'] = df['full_address'].str.strip(", ").replace({"": None})
+    return join_address(df, address_columns)
+
 
+def join_address(df: pd.DataFrame, address_columns: list) -> pd.DataFrame:
+    """
+    full_address from the address parts as they are, empty parts dropped.
+    """
+    parts = df[address_columns].fillna("").astype(str)
+    df['full_address'] = parts.agg(", ".join, axis=1)
+    df['full_address'] = df['full_address'].str.strip(", ").replace({"": None})
     return df
 
 
@@ -0,0 +1,186 @@
+# backend/preprocessing/phone.py
+import pandas as pd
+import numpy as np
+
+from .countries import get_country_index, country_names
+
+MISSING_PHONE_VALUES = {"", "not provided", "nan", "none", "-", "n/a", "na"}
+
+# ----------------------------------
+# Calling-code trie
+# ----------------------------------
+class CallingCodeTrie:
+    """
+    Longest-prefix trie over ITU country calling codes.
+    Built from the phonenumbers metadata, so it ships with the library.
+    """
+
+    def __init__(self, code_to_regions=None):
+        if code_to_regions is None:
+            import phonenumbers
+            code_to_regions = phonenumbers.COUNTRY_CODE_TO_REGION_CODE
+        self.root = {}
+        for code, regions in code_to_regions.items():
+            # "001" marks non-geographic numbers (satellite, UIFN...)
+            regions = [r for r in regions if r != "001"]
+            if not regions:
+                continue
+            node = self.root
+            for digit in str(code):
+                node = node.setdefault(digit, {})
+            # First region is the main one (e.g. US for +1)
+            node[None] = (str(code), regions[0])
+
+    def longest_prefix(self, digits: str):
+        """
+        Returns (calling_code, region) for the longest code that prefixes digits.
+        """
+        node, match = self.root, None
+        for digit in digits:
+            node = node.get(digit)
+            if node is None:
+                break
+            if None in node:
+                match = node[None]
+        return match if match else (None, None)
+
+    def lookup_series(self, digits: pd.Series) -> pd.Series:
+        """
+        Region per digit string, one trie walk per unique value.
+        """
+        codes, uniques = pd.factorize(digits)
+        regions = np.array(
+            [self.longest_prefix(d)[1] for d in uniques] + [None],
+            dtype=object
+        )
+        # factorize marks missing values with -1, which picks the trailing None
+        return pd.Series(regions[codes], index=digits.index)
+
+
+_TRIE = None
+
+def get_calling_code_trie() -> CallingCodeTrie:
+    global _TRIE
+    if _TRIE is None:
+        _TRIE = CallingCodeTrie()
+    return _TRIE
+
+
+# ----------------------------------
+# Normalization
+# ----------------------------------
+def normalize_phone_series(phones: pd.Series) -> pd.DataFrame:
+    """
+    Vectorized cleanup of raw phone values.
+
+    Returns a frame with:
+    - digits: digit string (None when missing)
+    - international: True when the value carried a + or 00 prefix
+    """
+    text = phones.astype("string").str.strip()
+    # Numbers read from CSV as floats come back as '9247717111.0'
+    text = text.str.replace(r"\.0$", "", regex=True)
+
+    missing = text.isna() | text.str.lower().isin(MISSING_PHONE_VALUES)
+    international = text.str.match(r"^\s*(\+|00)").fillna(False)
+    digits = text.str.replace(r"\D", "", regex=True)
+    # Drop the 00 trunk so the calling code starts the string
+    digits = digits.where(~(international & digits.str.startswith("00")), digits.str[2:])
+
+    digits = digits.astype(object).where(~missing, None)
+    return pd.DataFrame({
+        "digits": digits,
+        "international": (international & ~missing).astype(bool)
+    }, index=phones.index)
+
+
+def region_from_country_series(countries: pd.Series) -> pd.Series:
+    """
+    ISO alpha-2 region hint per row from a free-text country column.
+    Resolved once per unique value through the country index.
+    """
+    return get_country_index().resolve_series(countries)["iso"]
+
+
+# ----------------------------------
+# Parsing
+# ----------------------------------
+def parse_phone(digits, international=False, region=None):
+    """
+    Parses one normalized number.
+
+    Returns:
+    (is_valid: bool, issue: str, e164: str | None, region: str | None)
+    """
+    import phonenumbers
+
+    if digits is None:
+        return False, "MISSING_PHONE", None, None
+
+    if len(digits) < 7:
+        return False, "INVALID_PHONE_FORMAT", None, None
+
+    if not international and region is None:
+        # No way to know the numbering plan: length check only
+        return True, "VALID_PHONE", None, None
+
+    try:
+        number = phonenumbers.parse("+" + digits if international else digits, region)
+    except phonenumbers.NumberParseException:
+        return False, "INVALID_PHONE_FORMAT", None, None
+
+    if not phonenumbers.is_possible_number(number):
+        return False, "INVALID_PHONE_FORMAT", None, None
+
+    e164 = phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
+    if not phonenumbers.is_valid_number(number):
+        return False, "INVALID_PHONE_NUMBER", e164, None
+
+    return True, "VALID_PHONE", e164, phonenumbers.region_code_for_number(number)
+
+
+def parse_phone_series(phones: pd.Series, region_hints: pd.Series | None = None) -> pd.DataFrame:
+    """
+    Batch phone parsing.
+
+    1️⃣ Normalize every value to a digit string (vectorized)
+    2️⃣ Parse each unique (digits, international, region) key once
+    3️⃣ Fill regions for international numbers the parser rejected from the calling-code trie
+
+    Returns a frame with is_valid, issue, e164 and region columns.
+    """
+    normalized = normalize_phone_series(phones)
+    if region_hints is None:
+        hints = pd.Series(None, index=phones.index, dtype=object)
+    else:
+        hints = region_hints.reindex(phones.index).astype(object)
+        hints = hints.where(hints.notna(), None)
+
+    keys = pd.DataFrame({
+        "digits": normalized["digits"],
+        "international": normalized["international"],
+        # The hint does not matter for international numbers
+        "region": hints.where(~normalized["international"], None)
+    })
+    codes, uniques = pd.factorize(pd.MultiIndex.from_frame(keys.astype(object)))
+
+    parsed = [
+        parse_phone(
+            None if pd.isna(d) else d,
+            bool(i),
+            None if pd.isna(r) else r
+        )
+        for d, i, r in uniques
+    ]
+    table = pd.DataFrame(parsed, columns=["is_valid", "issue", "e164", "region"])
+    result = table.iloc[codes].set_index(phones.index)
+
+    trie_regions = get_calling_code_trie().lookup_series(
+        normalized["digits"].where(normalized["international"], None)
+    )
+    result["region"] = result["region"].where(result["region"].notna(), trie_regions)
+    return result
+
+
+def get_country_name_from_region(regions: pd.Series) -> pd.Series:
+    return country_names(regions)
\ No newline at end of file
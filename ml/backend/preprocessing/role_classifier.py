@@ -0,0 +1,257 @@
+# backend/preprocessing/role_classifier.py
+"""
+Fallback role classifier for job titles the keyword rules do not match.
+
+Titles are hashed into character n-gram features (HashingVectorizer, so
+there is no vocabulary to ship) and scored by a multinomial logistic
+regression trained offline on titles the rules in role_mapping.py label.
+Only the weights of features seen in training are stored, in a small
+.npz file next to this package; prediction is one sparse product for a
+whole batch of distinct titles.
+
+Retrain after changing the rules:
+    python -m backend.preprocessing.role_classifier [--uploads ../server/uploads]
+"""
+import argparse
+import glob
+import os
+
+import pandas as pd
+import numpy as np
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+MODEL_PATH = os.path.normpath(os.path.join(_HERE, "..", "models", "role_classifier.npz"))
+
+# Rule-labelled training titles come from the sample uploads in the repo
+DEFAULT_UPLOADS = os.path.normpath(os.path.join(_HERE, "..", "..", "..", "server", "uploads"))
+
+# Hashing space and analyzer; stored with the model so prediction matches training
+N_FEATURES = 2 ** 18
+NGRAM_RANGE = (2, 4)
+
+# Typo variants generated per rule-labelled title
+AUGMENT_VARIANTS = 6
+
+# Common titles with the role they stand for, added to the uploaded ones so
+# every role has examples. Labelled here rather than by the rules, which miss
+# some ("chief technology officer") and mislabel others ("supply chain" has "ai")
+SEED_TITLES = {
+    "chief executive officer": "Leadership", "chief technology officer": "Leadership",
+    "chief financial officer": "Leadership", "vice president": "Leadership", "head of people": "Leadership",
+    "team lead": "Leadership",
+    "head of sales": "Sales", "sales representative": "Sales", "sales manager": "Sales", "account executive": "Sales",
+    "sales director": "Sales", "sales consultant": "Sales",
+    "head of marketing": "Marketing", "marketing executive": "Marketing", "digital marketing manager": "Marketing",
+    "seo specialist": "Marketing", "content writer": "Marketing", "brand manager": "Marketing",
+    "head of engineering": "Engineering & Development", "software developer": "Engineering & Development",
+    "senior software engineer": "Engineering & Development", "frontend developer": "Engineering & Development",
+    "backend developer": "Engineering & Development", "full stack developer": "Engineering & Development",
+    "devops engineer": "Engineering & Development", "qa engineer": "Engineering & Development",
+    "mobile developer": "Engineering & Development", "web developer": "Engineering & Development",
+    "data analyst": "Data & Analytics", "data scientist": "Data & Analytics", "bi analyst": "Data & Analytics",
+    "analytics manager": "Data & Analytics", "machine learning engineer": "Data & Analytics",
+    "financial controller": "Finance", "finance manager": "Finance", "accounts assistant": "Finance",
+    "payroll accountant": "Finance", "auditor": "Finance",
+    "hr manager": "Human Resources", "hr business partner": "Human Resources", "recruiter": "Human Resources",
+    "talent acquisition specialist": "Human Resources", "human resources officer": "Human Resources",
+    "operations manager": "Operations", "logistics coordinator": "Operations", "supply chain manager": "Operations",
+    "operations director": "Operations",
+    "customer service advisor": "Customer Support", "customer success manager": "Customer Support",
+    "support specialist": "Customer Support", "helpdesk support": "Customer Support",
+    "office administrator": "Admin", "admin assistant": "Admin", "administrator": "Admin",
+    "receptionist admin": "Admin",
+    "staff nurse": "Medical", "nurse practitioner": "Medical",
+    "school teacher": "Education", "educator": "Education", "learning coach": "Education",
+    "photographer": "Production", "audio visual specialist": "Production", "video producer": "Production",
+}
+
+
+# ----------------------------------
+# Features
+# ----------------------------------
+def make_vectorizer(n_features: int = N_FEATURES, ngram_range=NGRAM_RANGE):
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    return HashingVectorizer(
+        analyzer="char_wb", ngram_range=tuple(ngram_range), n_features=n_features,
+        alternate_sign=False, norm="l2"
+    )
+
+
+# ----------------------------------
+# Model
+# ----------------------------------
+class RoleClassifier:
+    """
+    Linear scorer over hashed features.
+
+    weights holds one row per class for the hashed columns in `features`
+    only; every other column had no training example and weighs 0.
+    """
+
+    def __init__(self, classes, features, weights, intercept, n_features=N_FEATURES, ngram_range=NGRAM_RANGE):
+        self.classes = np.asarray(classes, dtype=object)
+        self.features = np.asarray(features, dtype=np.int64)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.intercept = np.asarray(intercept, dtype=np.float32)
+        self.vectorizer = make_vectorizer(int(n_features), tuple(int(n) for n in ngram_range))
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> "RoleClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["classes"].astype(object), data["features"], data["weights"], data["intercept"],
+                int(data["n_features"]), data["ngram_range"]
+            )
+
+    def save(self, path: str = MODEL_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(
+            path,
+            classes=self.classes.astype(str), features=self.features,
+            weights=self.weights, intercept=self.intercept,
+            n_features=np.int64(self.vectorizer.n_features),
+            ngram_range=np.asarray(self.vectorizer.ngram_range, dtype=np.int64),
+        )
+
+    def predict_proba(self, titles) -> np.ndarray:
+        """
+        Class probabilities [titles x classes] from one sparse product.
+        """
+        if len(titles) == 0:
+            return np.empty((0, len(self.classes)), dtype=np.float32)
+        X = self.vectorizer.transform(titles)[:, self.features]
+        scores = np.asarray(X @ self.weights.T, dtype=np.float32) + self.intercept
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict(self, titles):
+        """
+        Returns:
+        (role: object ndarray, probability: float ndarray)
+        """
+        proba = self.predict_proba(titles)
+        if len(proba) == 0:
+            return np.empty(0, dtype=object), np.empty(0, dtype=np.float32)
+        best = proba.argmax(axis=1)
+        return self.classes[best], proba[np.arange(len(best)), best]
+
+
+_MODEL = None
+_MODEL_ERROR = None
+
+def get_role_classifier() -> RoleClassifier | None:
+    """
+    Shared model, loaded once. None (with a warning printed once) when the
+    model file or scikit-learn is unavailable, so the rules still run.
+    """
+    global _MODEL, _MODEL_ERROR
+    if _MODEL is None and _MODEL_ERROR is None:
+        try:
+            _MODEL = RoleClassifier.load()
+        except (OSError, ImportError, KeyError) as e:
+            _MODEL_ERROR = e
+            print(f"Role classifier unavailable, unmatched titles fall back to Admin: {e}")
+    return _MODEL
+
+
+# ----------------------------------
+# Training (offline)
+# ----------------------------------
+def _typo(title: str, rng) -> str:
+    if len(title) < 4:
+        return title
+    i = int(rng.integers(0, len(title) - 1))
+    kind = rng.integers(0, 3)
+    if kind == 0:
+        return title[:i] + title[i + 1:]
+    if kind == 1:
+        return title[:i] + title[i + 1] + title[i] + title[i + 2:]
+    return title[:i] + "abcdefghijklmnopqrstuvwxyz"[int(rng.integers(0, 26))] + title[i + 1:]
+
+
+def load_upload_titles(uploads_dir: str = DEFAULT_UPLOADS) -> list:
+    titles = []
+    for path in sorted(glob.glob(os.path.join(uploads_dir, "*"))):
+        try:
+            if path.endswith(".csv"):
+                df = pd.read_csv(path, usecols=lambda c: str(c).lower() in ("jobtitle", "job_title"))
+            elif path.endswith(".xlsx"):
+                df = pd.read_excel(path)
+                df = df[[c for c in df.columns if str(c).lower() in ("jobtitle", "job_title")]]
+            else:
+                continue
+        except Exception:
+            continue
+        for col in df.columns:
+            titles.extend(df[col].dropna().astype(str))
+    return titles
+
+
+def rule_labelled_titles(titles) -> pd.DataFrame:
+    """
+    Distinct cleaned titles with the role the exact / keyword rules give
+    them; titles the rules do not match are left out.
+    """
+    from .role_mapping import EXACT_TITLE_MAPPING, ROLE_RULES, clean_job_title, rule_role
+
+    cleaned = {clean_job_title(t) for t in titles}
+    cleaned |= set(EXACT_TITLE_MAPPING) | {kw for _, keywords in ROLE_RULES for kw in keywords}
+    rows = [(t, rule_role(t)) for t in sorted(cleaned) if t]
+    return pd.DataFrame([r for r in rows if r[1] is not None], columns=["title", "role"])
+
+
+def labelled_titles(titles, seeds=None) -> pd.DataFrame:
+    """
+    rule_labelled_titles() plus the seed titles with their own labels,
+    which win over the rules' for the same title.
+    """
+    seeds = SEED_TITLES if seeds is None else seeds
+    labelled = rule_labelled_titles(titles)
+    labelled = labelled[~labelled["title"].isin(seeds.keys())]
+    seeded = pd.DataFrame(list(seeds.items()), columns=["title", "role"])
+    return pd.concat([labelled, seeded], ignore_index=True).sort_values("title", ignore_index=True)
+
+
+def train_role_classifier(titles, seeds=None, variants: int = AUGMENT_VARIANTS,
+                          seed: int = 0) -> RoleClassifier:
+    """
+    Fits the classifier on rule-labelled titles and the seed titles plus
+    typo variants of each, so misspellings such as 'sales managet' land on
+    the same role.
+    """
+    from sklearn.linear_model import LogisticRegression
+
+    labelled = labelled_titles(titles, seeds)
+    rng = np.random.default_rng(seed)
+    texts, labels = list(labelled["title"]), list(labelled["role"])
+    for title, role in zip(labelled["title"], labelled["role"]):
+        for _ in range(variants):
+            texts.append(_typo(title, rng))
+            labels.append(role)
+
+    vectorizer = make_vectorizer()
+    X = vectorizer.transform(texts)
+    features = np.unique(X.indices)
+    model = LogisticRegression(C=10.0, max_iter=2000)
+    model.fit(X[:, features], labels)
+    return RoleClassifier(model.classes_, features, model.coef_, model.intercept_)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the job-title role classifier")
+    parser.add_argument("--uploads", default=DEFAULT_UPLOADS)
+    parser.add_argument("--out", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    classifier = train_role_classifier(load_upload_titles(args.uploads))
+    classifier.save(args.out)
+    print(f"{len(classifier.classes)} roles, {len(classifier.features):,} hashed features -> {args.out} "
+          f"({os.path.getsize(args.out) / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
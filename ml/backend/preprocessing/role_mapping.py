@@ -1,6 +1,9 @@
 import pandas as pd
+import numpy as np
 import re
 
+from .role_classifier import get_role_classifier
+
 # ----------------------------------
 # Clean job title
 # ----------------------------------
@@ -118,14 +121,78 @@ EXACT_TITLE_MAPPING = {
     "band": "Production"
 }
 
+# Role for titles nothing matches
+FALLBACK_ROLE = "Admin"
+
+# Cleaned titles that stand for a missing value
+MISSING_TITLES = {"", "unknown", "not provided", "na", "n a", "none"}
+
+# Classifier predictions below this probability keep the fallback role
+MIN_CLASSIFIER_PROBABILITY = 0.7
+
+
+def rule_role(title):
+    """
+    Role from the exact mapping, then the keyword rules in priority order.
+    None when neither matches.
+    """
+    # 1️⃣ Exact mapping
+    if title in EXACT_TITLE_MAPPING:
+        return EXACT_TITLE_MAPPING[title]
+
+    # 2️⃣ Keyword mapping
+    for role, keywords in ROLE_RULES:
+        for kw in keywords:
+            if kw in title:
+                return role
+    return None
+
+
+def infer_roles(titles: pd.Series, use_classifier: bool = True) -> pd.DataFrame:
+    """
+    Role per job title, computed once per distinct title.
+
+    1️⃣ Exact mapping and keyword rules (confidence 1.0)
+    2️⃣ Titles no rule matches go to the classifier in one batch; its
+       probability becomes the confidence
+    3️⃣ Missing titles, and predictions below MIN_CLASSIFIER_PROBABILITY,
+       get FALLBACK_ROLE with confidence 0.0
+
+    use_classifier=False stops after the rules (latency-budget fast mode).
+
+    Returns a frame with role and confidence columns.
+    """
+    codes, uniques = pd.factorize(titles)
+    cleaned = [clean_job_title(t) for t in uniques]
+
+    roles = np.array([None if t in MISSING_TITLES else rule_role(t) for t in cleaned], dtype=object)
+    confidence = np.where(pd.notna(roles), 1.0, 0.0)
+
+    pending = np.flatnonzero(pd.isna(roles) & np.array([t not in MISSING_TITLES for t in cleaned], dtype=bool))
+    classifier = get_role_classifier() if len(pending) and use_classifier else None
+    if classifier is not None:
+        predicted, probability = classifier.predict([cleaned[i] for i in pending])
+        sure = probability >= MIN_CLASSIFIER_PROBABILITY
+        roles[pending[sure]] = predicted[sure]
+        confidence[pending[sure]] = np.round(probability[sure].astype(np.float64), 3)
+
+    roles[pd.isna(roles)] = FALLBACK_ROLE
+    # factorize marks missing values with -1, which picks the trailing entry
+    roles = np.append(roles, FALLBACK_ROLE)
+    confidence = np.append(confidence, 0.0)
+    return pd.DataFrame({"role": roles[codes], "confidence": confidence[codes]}, index=titles.index)
+
+
 # ----------------------------------
 # MAIN FUNCTION USED BY PIPELINE
 # ----------------------------------
-def map_role_function(df: pd.DataFrame) -> pd.DataFrame:
+def map_role_function(df: pd.DataFrame, use_classifier: bool = True) -> pd.DataFrame:
     """
     Maps 'jobtitle' to normalized 'role_description' column.
     - Uses exact mapping first, then keyword search with priority rules.
-    - Ensures all jobtitles get a valid role.
+    - Titles no rule matches are classified by the fallback model.
+    - Ensures all jobtitles get a valid role; role_description_confidence
+      says how sure the mapping is (1.0 rules, model probability, 0.0 fallback).
     """
     df = df.copy()
 
@@ -133,30 +200,8 @@ def map_role_function(df: pd.DataFrame) -> pd.DataFrame:
         print("jobtitle column missing. Skipping role description mapping.")
         return df
 
-    # Clean job titles
-    df['jobtitle_clean'] = df['jobtitle'].apply(clean_job_title)
-
-    # Map jobtitle → role_description
-    def infer_role(title):
-        if not title:
-            return "Admin"  # fallback to a valid role
-
-        # 1️⃣ Exact mapping
-        if title in EXACT_TITLE_MAPPING:
-            return EXACT_TITLE_MAPPING[title]
-
-        # 2️⃣ Keyword mapping
-        for role, keywords in ROLE_RULES:
-            for kw in keywords:
-                if kw in title:
-                    return role
-
-        # 3️⃣ Fallback
-        return "Admin"  # any unmatched title goes to Admin instead of Unknown
-
-    df['role_description'] = df['jobtitle_clean'].apply(infer_role)
-
-    # Drop helper column
-    df.drop(columns=['jobtitle_clean'], inplace=True)
+    roles = infer_roles(df['jobtitle'], use_classifier)
+    df['role_description'] = roles['role']
+    df['role_description_confidence'] = roles['confidence']
 
     return df
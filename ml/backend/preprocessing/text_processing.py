@@ -1,9 +1,18 @@
 # backend/preprocessing/text_processing.py
 import pandas as pd
 import re
-from spellchecker import SpellChecker
 
-spell = SpellChecker()
+_spell = None
+
+def get_spell_checker():
+    """
+    Builds the SpellChecker dictionary on first use only.
+    """
+    global _spell
+    if _spell is None:
+        from spellchecker import SpellChecker
+        _spell = SpellChecker()
+    return _spell
 
 # Spelling correction
 def is_acronym(word):
@@ -16,12 +25,14 @@ def correct_text_spelling(value):
     if value.lower() in ['na', 'n/a', 'unknown', 'not provided']:
         return value
     words = re.findall(r"[A-Za-z]+|[^A-Za-z\s]", value)
+    spell = get_spell_checker()
     corrected_words = []
     for word in words:
         if not word.isalpha() or is_acronym(word):
             corrected_words.append(word)
         else:
-            corrected_words.append(spell.correction(word))
+            # correction() is None for words with no known candidate
+            corrected_words.append(spell.correction(word) or word)
     return "".join(
         [" " + w if w.isalpha() and i > 0 else w for i, w in enumerate(corrected_words)]
     ).strip()
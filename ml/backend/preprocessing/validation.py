@@ -1,6 +1,10 @@
 import pandas as pd
 import re
 
+from .phone import normalize_phone_series, parse_phone, parse_phone_series
+from .email_domains import validate_email_series as _validate_email_series
+from .countries import get_country_index, validate_country_series as _validate_country_series
+
 MISSING_COMPANY_VALUES = {
     "", " ", "-", "--", "na", "n/a", "null", "none",
     "undefined", "?", "nil"
@@ -72,13 +76,31 @@ def validate_email(value):
         return False, "INVALID_EMAIL_FORMAT"
     return True, "VALID_EMAIL"
 
-def validate_phone(value):
-    if pd.isna(value) or str(value).strip().lower() in ["", "not provided"]:
-        return False, "MISSING_PHONE"
-    clean_phone = re.sub(r"[^\d+]", "", str(value))
-    if len(clean_phone) < 7:
-        return False, "INVALID_PHONE_FORMAT"
-    return True, "VALID_PHONE"
+def validate_email_series(emails: pd.Series, known_domains=None) -> pd.DataFrame:
+    """
+    Batch version of validate_email.
+    Also flags likely domain typos (gmial.com) as POSSIBLE_DOMAIN_TYPO and
+    returns the corrected address in 'suggested'.
+    """
+    return _validate_email_series(emails, known_domains)
+
+def validate_phone(value, region=None):
+    """
+    Returns:
+    (is_valid: bool, issue: str)
+
+    region is an ISO alpha-2 hint for numbers written without a country code.
+    """
+    normalized = normalize_phone_series(pd.Series([value], dtype=object)).iloc[0]
+    is_valid, issue, _, _ = parse_phone(normalized["digits"], normalized["international"], region)
+    return is_valid, issue
+
+def validate_phone_series(phones: pd.Series, region_hints: pd.Series | None = None) -> pd.DataFrame:
+    """
+    Batch version of validate_phone.
+    Each unique number is parsed once; also returns the E.164 form and region.
+    """
+    return parse_phone_series(phones, region_hints)
 
 def validate_industry(value):
     if pd.isna(value) or str(value).strip().lower() in ["", "unknown industry"]:
@@ -86,10 +108,26 @@ def validate_industry(value):
     return True, "VALID_INDUSTRY"
 
 def validate_country(value):
-    if pd.isna(value) or str(value).strip().lower() in ["", "not specified"]:
+    """
+    Resolves the value against the country index (names, ISO codes,
+    aliases, close misspellings). See countries.validate_country_series.
+    """
+    _, match = get_country_index().resolve(value)
+    if match == "missing":
         return False, "MISSING_COUNTRY"
+    if match == "unknown":
+        return False, "UNKNOWN_COUNTRY"
+    if match == "fuzzy":
+        return False, "POSSIBLE_COUNTRY_TYPO"
     return True, "VALID_COUNTRY"
 
+def validate_country_series(values, fuzzy=True):
+    """
+    Batch version of validate_country, one lookup per unique value.
+    Also returns the ISO alpha-2 code as a categorical.
+    """
+    return _validate_country_series(values, fuzzy)
+
 def validate_company_age(value):
     if pd.isna(value) or str(value) == "Unknown":
         return False, "MISSING_AGE"
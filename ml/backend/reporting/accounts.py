@@ -0,0 +1,408 @@
+# backend/reporting/accounts.py
+"""
+Account rollup: one row per company from the cleaned contact rows.
+
+Contacts are keyed by their domain when it is usable (not a fill label,
+not INVALID), otherwise by their normalized company name; rows with
+neither are left out and counted as unassigned. Per account:
+
+- contacts, and valid_contacts (no INVALID status)
+- the best contact: most VALID statuses, then the highest lead_confidence
+  (when the column is there), then the earliest row; its row in the
+  cleaned file and its fields as best_<field>
+- revenue consensus: the revenue most contacts carry (ties: the lower),
+  from reported values, or from imputed ones when none was reported, with
+  the share of those contacts agreeing and the number of distinct values
+- role mix: contacts per role_description (roles inferred from jobtitle
+  when the column is missing), and the top role
+
+There is no groupby: keys and values are factorized (a hash pass, once per
+distinct value for the text normalization) and every figure is a NumPy
+reduction over the integer codes (bincount, minimum.at / maximum.at).
+update() reduces each batch to per-account partials and result() reduces
+the partials with the same code, so chunked jobs get the same table as
+in-memory ones and only ever hold one row per account and batch.
+"""
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from ..preprocessing.confidence import FILL_LABELS, SCORE_COLUMN
+from ..preprocessing.missing_values import get_revenue_column
+
+# Fields of the best contact copied into the account row (when present)
+CONTACT_FIELDS = [
+    "people_id", "person_name", "first_name", "last_name", "email",
+    "phone", "phone_number", "jobtitle", "role_description"
+]
+
+# Trailing legal forms dropped from company names before matching
+LEGAL_SUFFIXES = re.compile(
+    r"(?:\s+(?:ltd|limited|llc|llp|lp|inc|incorporated|plc|corp|corporation|co|company|gmbh|ag|sa|bv|pty))+$"
+)
+
+# Partials kept by AccountRollup before they are reduced into one
+MAX_PARTIALS = 8
+
+# Best-contact sort key: VALID statuses, then lead confidence (per mille), then earliest row
+_ROW_BITS = 40
+_CONFIDENCE_BITS = 10
+
+
+# =========================
+# Keys
+# =========================
+def normalize_domain(values: pd.Series) -> pd.Series:
+    return (
+        values.str.strip().str.lower()
+        .str.replace(r"^(?:https?://)?(?:www\.)?", "", regex=True)
+        .str.rstrip("/")
+    )
+
+
+def normalize_company_name(values: pd.Series) -> pd.Series:
+    """
+    'The ACME Co., Ltd.' -> 'the acme'
+    """
+    values = (
+        values.str.lower()
+        .str.replace("&", " and ", regex=False)
+        .str.replace(r"[^\w\s]", " ", regex=True)
+        .str.split().str.join(" ")
+    )
+    return values.str.replace(LEGAL_SUFFIXES, "", regex=True).str.strip()
+
+
+def _usable(df: pd.DataFrame, col: str, normalize, prefix: str) -> np.ndarray:
+    """
+    prefix + normalized value of col (built once per distinct value), None
+    where the value is missing, a fill label or marked INVALID by validation.
+    """
+    if col not in df.columns:
+        return np.full(len(df), None, dtype=object)
+    codes, uniques = pd.factorize(df[col])
+    values = normalize(pd.Series(uniques, dtype=object).astype(str))
+    values = (prefix + values).where(~values.isin(FILL_LABELS) & values.ne(""), None)
+    out = np.append(values.to_numpy(dtype=object), None)[codes]
+    status = f"{col}_status"
+    if status in df.columns:
+        out[df[status].eq("INVALID").to_numpy(dtype=bool, na_value=False)] = None
+    return out
+
+
+def account_keys(df: pd.DataFrame) -> np.ndarray:
+    """
+    "domain:<domain>" or "name:<normalized company name>" per row, None when
+    the row has neither.
+    """
+    domains = _usable(df, "domain", normalize_domain, "domain:")
+    names = _usable(df, "company_name", normalize_company_name, "name:")
+    return np.where(pd.notna(domains), domains, names)
+
+
+# =========================
+# Row signals
+# =========================
+def _status_counts(df: pd.DataFrame) -> tuple:
+    """
+    (VALID statuses, INVALID statuses) per row.
+    """
+    valid = np.zeros(len(df), dtype=np.int64)
+    invalid = np.zeros(len(df), dtype=np.int64)
+    for col in df.columns:
+        if str(col).endswith("_status"):
+            codes, uniques = pd.factorize(df[col])
+            labels = np.append(np.asarray(uniques, dtype=object), None)
+            valid += (labels == "VALID")[codes]
+            invalid += (labels == "INVALID")[codes]
+    return valid, invalid
+
+
+def _best_scores(df: pd.DataFrame, valid: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """
+    One int64 per row, higher is better and unique: VALID statuses, then
+    lead confidence, then the earliest row.
+    """
+    confidence = np.zeros(len(df), dtype=np.int64)
+    if SCORE_COLUMN in df.columns:
+        score = pd.to_numeric(df[SCORE_COLUMN], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        confidence = np.round(np.nan_to_num(score, nan=0.0).clip(0, 1) * 1000).astype(np.int64)
+    return (
+        (valid << (_ROW_BITS + _CONFIDENCE_BITS))
+        + (confidence << _ROW_BITS)
+        + ((1 << _ROW_BITS) - 1 - rows)
+    )
+
+
+def _score_parts(scores: np.ndarray) -> tuple:
+    """
+    (valid statuses, row) back from _best_scores() values.
+    """
+    return scores >> (_ROW_BITS + _CONFIDENCE_BITS), (1 << _ROW_BITS) - 1 - (scores & ((1 << _ROW_BITS) - 1))
+
+
+def _roles(df: pd.DataFrame) -> np.ndarray | None:
+    if "role_description" in df.columns:
+        return df["role_description"].to_numpy(dtype=object)
+    if "jobtitle" in df.columns:
+        from ..preprocessing.role_mapping import infer_roles
+
+        return infer_roles(df["jobtitle"])["role"].to_numpy(dtype=object)
+    return None
+
+
+def _revenue(df: pd.DataFrame) -> tuple:
+    """
+    (revenue values, reported mask); values are NaN where unknown.
+    """
+    col = get_revenue_column(df)
+    if col is None:
+        return np.full(len(df), np.nan), np.zeros(len(df), dtype=bool)
+    values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    source = f"{col}_source"
+    if source in df.columns:
+        reported = df[source].eq("original").to_numpy(dtype=bool, na_value=False)
+    else:
+        reported = np.ones(len(df), dtype=bool)
+    return values, reported
+
+
+def _rollup_columns(df: pd.DataFrame) -> list:
+    """
+    The columns update() reads, so unassigned rows are dropped from those only.
+    """
+    revenue = get_revenue_column(df)
+    wanted = set(CONTACT_FIELDS) | {"company_name", SCORE_COLUMN, "jobtitle"}
+    if revenue is not None:
+        wanted |= {revenue, f"{revenue}_source"}
+    return [c for c in df.columns if c in wanted or str(c).endswith("_status")]
+
+
+# =========================
+# Reduction
+# =========================
+def _pairs(account: np.ndarray, values: np.ndarray, counts: np.ndarray) -> tuple:
+    """
+    Sums counts per distinct (account, value) pair, both hashed with
+    factorize. Returns (account, value, count) per pair.
+    """
+    if len(account) == 0:
+        return account, values, counts
+    vcodes, vuniques = pd.factorize(values)
+    pair = account.astype(np.int64) * len(vuniques) + vcodes
+    pcodes, puniques = pd.factorize(pair)
+    summed = np.bincount(pcodes, weights=counts, minlength=len(puniques)).astype(np.int64)
+    return puniques // len(vuniques), np.asarray(vuniques)[puniques % len(vuniques)], summed
+
+
+def _reduce(accounts: dict, revenue: dict, roles: dict) -> tuple:
+    """
+    Reduces entries sharing a key (rows of one batch, or partials of
+    several) to one entry per key. Revenue and role entries point at
+    account entries by position and are re-pointed at the reduced ones.
+    """
+    codes, keys = pd.factorize(accounts["key"])
+    k = len(keys)
+    reduced = {
+        "key": np.asarray(keys, dtype=object),
+        "contacts": np.bincount(codes, weights=accounts["contacts"], minlength=k).astype(np.int64),
+        "valid_contacts": np.bincount(codes, weights=accounts["valid_contacts"], minlength=k).astype(np.int64),
+    }
+
+    first = np.full(k, np.iinfo(np.int64).max)
+    np.minimum.at(first, codes, accounts["first_row"])
+    at_first = accounts["first_row"] == first[codes]
+    reduced["first_row"] = first
+    if "company_name" in accounts:
+        reduced["company_name"] = np.empty(k, dtype=object)
+        reduced["company_name"][codes[at_first]] = accounts["company_name"][at_first]
+
+    best = np.full(k, np.iinfo(np.int64).min)
+    np.maximum.at(best, codes, accounts["best_score"])
+    at_best = accounts["best_score"] == best[codes]
+    reduced["best_score"] = best
+    for field in accounts:
+        if field.startswith("best_") and field != "best_score":
+            reduced[field] = np.empty(k, dtype=object)
+            reduced[field][codes[at_best]] = accounts[field][at_best]
+
+    reduced_revenue = {}
+    for kind in ("reported", "imputed"):
+        account, value, count = _pairs(codes[revenue[kind]["account"]], revenue[kind]["value"], revenue[kind]["count"])
+        reduced_revenue[kind] = {"account": account, "value": value, "count": count}
+    account, role, count = _pairs(codes[roles["account"]], roles["role"], roles["count"])
+    return reduced, reduced_revenue, {"account": account, "role": role, "count": count}
+
+
+def _concat(parts: list) -> dict:
+    return {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+
+def _modes(revenue: dict, k: int) -> tuple:
+    """
+    Per account: (most common value, its count, all counts, distinct values);
+    ties go to the lower value. NaN / 0 where the account has none.
+    """
+    account, value, count = revenue["account"], revenue["value"], revenue["count"]
+    mode = np.full(k, np.nan)
+    mode_count = np.zeros(k, dtype=np.int64)
+    total = np.bincount(account, weights=count, minlength=k).astype(np.int64)
+    distinct = np.bincount(account, minlength=k)
+    if len(account):
+        order = np.argsort(value, kind="stable")
+        rank = np.empty(len(value), dtype=np.int64)
+        rank[order] = np.arange(len(value))
+        n = len(value)
+        best = np.full(k, -1, dtype=np.int64)
+        np.maximum.at(best, account, count * n + (n - 1 - rank))
+        has = best >= 0
+        mode_count[has] = best[has] // n
+        mode[has] = value[order[n - 1 - best[has] % n]]
+    return mode, mode_count, total, distinct
+
+
+# =========================
+# Rollup
+# =========================
+class AccountRollup:
+    """
+    Builds the account table from cleaned batches, in file order:
+
+        rollup = AccountRollup()
+        for batch in batches:
+            rollup.update(batch)
+        accounts = rollup.result()
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.unassigned = 0
+        self._partials = []
+
+    def update(self, df: pd.DataFrame):
+        keys = account_keys(df)
+        assigned = pd.notna(keys)
+        positions = np.flatnonzero(assigned)
+        rows = positions.astype(np.int64) + self.rows
+        self.rows += len(df)
+        self.unassigned += int(len(df) - len(positions))
+        if len(positions) == 0:
+            return
+
+        frame = df[_rollup_columns(df)]
+        if len(positions) < len(df):
+            frame = frame.iloc[positions]
+        ones = np.ones(len(positions), dtype=np.int64)
+        valid, invalid = _status_counts(frame)
+        accounts = {
+            "key": keys[positions],
+            "contacts": ones,
+            "valid_contacts": (invalid == 0).astype(np.int64),
+            "first_row": rows,
+            "best_score": _best_scores(frame, valid, rows),
+        }
+
+        entry = np.arange(len(positions))
+        values, reported = _revenue(frame)
+        known = ~np.isnan(values)
+        revenue = {
+            kind: {"account": entry[mask], "value": values[mask], "count": ones[mask]}
+            for kind, mask in (("reported", known & reported), ("imputed", known & ~reported))
+        }
+        roles = _roles(frame)
+        has_role = pd.notna(roles) if roles is not None else np.zeros(len(positions), dtype=bool)
+        role_entries = {
+            "account": entry[has_role],
+            "role": (roles[has_role] if roles is not None else np.empty(0, dtype=object)).astype(str).astype(object),
+            "count": ones[has_role],
+        }
+
+        partial = _reduce(accounts, revenue, role_entries)
+        # Text fields of the first and the best contact only, not of every row
+        reduced = partial[0]
+        first = np.searchsorted(rows, reduced["first_row"])
+        best = np.searchsorted(rows, _score_parts(reduced["best_score"])[1])
+        reduced["company_name"] = (frame["company_name"].iloc[first].to_numpy(dtype=object)
+                                   if "company_name" in frame.columns else np.full(len(first), None, dtype=object))
+        for field in CONTACT_FIELDS:
+            if field in frame.columns:
+                reduced[f"best_{field}"] = frame[field].iloc[best].to_numpy(dtype=object)
+
+        self._partials.append(partial)
+        if len(self._partials) >= MAX_PARTIALS:
+            self._partials = [self._merge()]
+
+    def _merge(self) -> tuple:
+        if len(self._partials) == 1:
+            return self._partials[0]
+        offsets = np.cumsum([0] + [len(p[0]["key"]) for p in self._partials[:-1]])
+        accounts = _concat([p[0] for p in self._partials])
+        revenue = {
+            kind: _concat([dict(p[1][kind], account=p[1][kind]["account"] + o) for p, o in zip(self._partials, offsets)])
+            for kind in ("reported", "imputed")
+        }
+        roles = _concat([dict(p[2], account=p[2]["account"] + o) for p, o in zip(self._partials, offsets)])
+        return _reduce(accounts, revenue, roles)
+
+    def result(self) -> pd.DataFrame:
+        """
+        The account table, most contacts first.
+        """
+        if not self._partials:
+            return pd.DataFrame(columns=["account_key", "key_type", "company_name", "contacts", "valid_contacts"])
+        accounts, revenue, roles = self._merge()
+        k = len(accounts["key"])
+        key_type, _, key = (
+            pd.Series(accounts["key"], dtype=object).str.partition(":").to_numpy().T
+        )
+        valid_fields, best_row = _score_parts(accounts["best_score"])
+
+        table = {
+            "account_key": key,
+            "key_type": np.where(key_type == "domain", "domain", "company_name"),
+            "company_name": accounts["company_name"],
+            "contacts": accounts["contacts"],
+            "valid_contacts": accounts["valid_contacts"],
+            "best_contact_row": best_row,
+            "best_contact_valid_fields": valid_fields,
+        }
+        for field in CONTACT_FIELDS:
+            if f"best_{field}" in accounts:
+                table[f"best_{field}"] = accounts[f"best_{field}"]
+
+        reported, reported_count, reported_total, reported_distinct = _modes(revenue["reported"], k)
+        imputed, imputed_count, imputed_total, imputed_distinct = _modes(revenue["imputed"], k)
+        has_reported = reported_total > 0
+        has_revenue = has_reported | (imputed_total > 0)
+        count = np.where(has_reported, reported_count, imputed_count)
+        total = np.where(has_reported, reported_total, imputed_total)
+        table["revenue_consensus"] = np.where(has_reported, reported, imputed)
+        table["revenue_source"] = np.where(has_reported, "reported", np.where(has_revenue, "imputed", None))
+        table["revenue_agreement"] = np.round(np.divide(count, total, out=np.full(k, np.nan), where=total > 0), 3)
+        table["revenue_values"] = np.where(has_reported, reported_distinct, imputed_distinct)
+
+        if len(roles["account"]):
+            role_codes, role_names = pd.factorize(roles["role"], sort=True)
+            mix = np.zeros((k, len(role_names)), dtype=np.int64)
+            np.add.at(mix, (roles["account"], role_codes), roles["count"])
+            table["top_role"] = np.where(mix.sum(axis=1) > 0, np.asarray(role_names, dtype=object)[mix.argmax(axis=1)], None)
+            for i, role in enumerate(role_names):
+                table[f"role_{re.sub(r'[^a-z0-9]+', '_', str(role).lower()).strip('_')}"] = mix[:, i]
+
+        order = np.lexsort((accounts["first_row"], -accounts["contacts"]))
+        return pd.DataFrame(table).iloc[order].reset_index(drop=True)
+
+
+def account_rollup(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Account table of one cleaned frame.
+    """
+    rollup = AccountRollup()
+    rollup.update(df)
+    return rollup.result()
+
+
+def accounts_path_for(cleaned_path: str) -> str:
+    return os.path.splitext(cleaned_path)[0] + ".accounts.csv"
@@ -0,0 +1,360 @@
+# backend/reporting/qa_report.py
+"""
+Compact QA summary per dataset, and a per-user rollup the dashboard reads
+without loading every dataset.
+
+The rollup is kept in SQLite (stdlib, safe across gunicorn workers). Each
+processed dataset adds its counts to one row per user and one row per
+user and day. Reprocessing a dataset first subtracts its previous counts,
+so record() is idempotent. Reading a rollup is a primary-key lookup plus
+one row per trend day, whatever the number of datasets.
+"""
+import datetime
+import json
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+DEFAULT_DB_PATH = os.environ.get(
+    "ML_QA_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "qa_rollup.sqlite3")
+)
+
+# Issue totals kept per user (same keys the dashboard adds up)
+ROLLUP_COUNTERS = ("missing", "duplicates", "anomalies", "inconsistencies")
+
+TREND_DAYS = 7
+
+
+# =========================
+# Per-dataset summary
+# =========================
+def issue_histograms(cleaned_df: pd.DataFrame) -> dict:
+    """
+    {column: {issue_code: rows}} from every <col>_issue column the
+    validation stages wrote.
+    """
+    histograms = {}
+    for col in cleaned_df.columns:
+        if not str(col).endswith("_issue"):
+            continue
+        counts = cleaned_df[col].value_counts(dropna=True)
+        # Categorical columns also list codes with no rows
+        histograms[str(col)[:-len("_issue")]] = {str(k): int(v) for k, v in counts.items() if v > 0}
+    return histograms
+
+
+def merge_histograms(total: dict, histograms: dict) -> dict:
+    """
+    Adds one batch's issue_histograms() into a running total (in place).
+    """
+    for col, counts in histograms.items():
+        column_total = total.setdefault(col, {})
+        for code, n in counts.items():
+            column_total[code] = column_total.get(code, 0) + n
+    return total
+
+
+def build_qa_summary(report: dict, cleaned_df: pd.DataFrame | None, rows_uploaded: int, plan=None,
+                     issues_by_column: dict | None = None, rows_cleaned: int | None = None) -> dict:
+    """
+    Small JSON-ready summary of one processed dataset.
+
+    Args:
+        report: DataAnalyzer.analyze() output for the raw rows
+        cleaned_df: Pipeline output (None when cleaned in batches)
+        rows_uploaded: Rows read from the file, before empty rows were dropped
+        plan: PipelinePlan returned by run_data_quality_pipeline(return_plan=True)
+        issues_by_column / rows_cleaned: totals over the batches, instead of cleaned_df
+    """
+    timings, stage_stats, degraded = {}, {}, {}
+    if plan is not None:
+        timings = {name: round(seconds * 1000, 1) for name, seconds in plan.timings.items()}
+        stage_stats = plan.stats
+        degraded = plan.degraded
+
+    return {
+        "quality_score": report.get("quality_score"),
+        "rows": {
+            "uploaded": int(rows_uploaded),
+            "analyzed": int(report.get("initial_rows", 0)),
+            "cleaned": int(len(cleaned_df) if rows_cleaned is None else rows_cleaned),
+        },
+        "totals": summary_counts(report),
+        "missing_by_column": _int_values(report.get("missing_values")),
+        "formatting_by_column": _int_values(report.get("formatting_issues")),
+        "anomalies_by_column": _int_values(report.get("anomaly_columns")),
+        "issues_by_column": issue_histograms(cleaned_df) if issues_by_column is None else issues_by_column,
+        "stage_timings_ms": timings,
+        "stage_stats": stage_stats,
+        # Stages a latency budget ran fast or skipped
+        "degraded_stages": degraded,
+    }
+
+
+def combine_qa_summaries(summaries: list) -> dict:
+    """
+    One summary for a batch of datasets: row counts, totals, per-column
+    counts and issue histograms summed, stage timings summed, and the
+    quality score averaged weighted by analyzed rows.
+    """
+    combined = {
+        "datasets": len(summaries),
+        "quality_score": None,
+        "rows": {"uploaded": 0, "analyzed": 0, "cleaned": 0},
+        "totals": {},
+        "missing_by_column": {},
+        "formatting_by_column": {},
+        "anomalies_by_column": {},
+        "issues_by_column": {},
+        "stage_timings_ms": {},
+    }
+    weighted = weight = 0
+    for summary in summaries:
+        for key in ("rows", "totals", "missing_by_column", "formatting_by_column",
+                    "anomalies_by_column", "stage_timings_ms"):
+            merged = combined[key]
+            for name, n in (summary.get(key) or {}).items():
+                merged[name] = merged.get(name, 0) + n
+        merge_histograms(combined["issues_by_column"], summary.get("issues_by_column") or {})
+        analyzed = summary["rows"]["analyzed"]
+        if summary.get("quality_score") is not None and analyzed:
+            weighted += summary["quality_score"] * analyzed
+            weight += analyzed
+
+    combined["stage_timings_ms"] = {k: round(v, 1) for k, v in combined["stage_timings_ms"].items()}
+    if weight:
+        combined["quality_score"] = round(weighted / weight, 1)
+    return combined
+
+
+def _int_values(counts) -> dict:
+    return {str(k): int(v) for k, v in (counts or {}).items()}
+
+
+def summary_counts(report: dict) -> dict:
+    missing = report.get("missing_values") or {}
+    if isinstance(missing, dict):
+        missing = sum(missing.values())
+    return {
+        "missing": int(missing or 0),
+        "duplicates": int(report.get("duplicates") or 0),
+        "anomalies": int(report.get("anomalies") or 0),
+        "inconsistencies": int(report.get("inconsistencies") or 0),
+    }
+
+
+# =========================
+# Per-user rollup
+# =========================
+class QARollupStore:
+    """
+    Incrementally maintained per-user dashboard aggregates.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS dataset_summary (
+                dataset_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                quality_score REAL,
+                missing INTEGER NOT NULL DEFAULT 0,
+                duplicates INTEGER NOT NULL DEFAULT 0,
+                anomalies INTEGER NOT NULL DEFAULT 0,
+                inconsistencies INTEGER NOT NULL DEFAULT 0,
+                summary TEXT
+            );
+            CREATE TABLE IF NOT EXISTS user_rollup (
+                user_id TEXT PRIMARY KEY,
+                datasets INTEGER NOT NULL DEFAULT 0,
+                scored INTEGER NOT NULL DEFAULT 0,
+                score_sum REAL NOT NULL DEFAULT 0,
+                missing INTEGER NOT NULL DEFAULT 0,
+                duplicates INTEGER NOT NULL DEFAULT 0,
+                anomalies INTEGER NOT NULL DEFAULT 0,
+                inconsistencies INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS user_daily (
+                user_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                scored INTEGER NOT NULL DEFAULT 0,
+                score_sum REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, day)
+            );
+        """)
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        One connection per thread (sqlite3 connections are not shared),
+        reopened in a forked worker.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _connect(self) -> "_Transaction":
+        return _Transaction(self._connection())
+
+    def _apply(self, conn, user_id, day, score, counts, sign):
+        """
+        Adds (sign=1) or subtracts (sign=-1) one dataset's contribution.
+        Datasets without a score are counted but left out of the averages,
+        as the dashboard does.
+        """
+        scored = 1 if score else 0
+        conn.execute(
+            "INSERT OR IGNORE INTO user_rollup (user_id) VALUES (?)", (user_id,)
+        )
+        conn.execute(
+            f"""UPDATE user_rollup SET
+                    datasets = datasets + ?,
+                    scored = scored + ?,
+                    score_sum = score_sum + ?,
+                    {", ".join(f"{c} = {c} + ?" for c in ROLLUP_COUNTERS)}
+                WHERE user_id = ?""",
+            (sign, sign * scored, sign * (score or 0.0), *(sign * counts[c] for c in ROLLUP_COUNTERS), user_id)
+        )
+        if scored:
+            conn.execute(
+                "INSERT OR IGNORE INTO user_daily (user_id, day) VALUES (?, ?)", (user_id, day)
+            )
+            conn.execute(
+                "UPDATE user_daily SET scored = scored + ?, score_sum = score_sum + ? WHERE user_id = ? AND day = ?",
+                (sign, sign * score, user_id, day)
+            )
+
+    def _remove_existing(self, conn, dataset_id):
+        row = conn.execute(
+            "SELECT * FROM dataset_summary WHERE dataset_id = ?", (dataset_id,)
+        ).fetchone()
+        if row is None:
+            return False
+        self._apply(conn, row["user_id"], row["day"], row["quality_score"],
+                    {c: row[c] for c in ROLLUP_COUNTERS}, -1)
+        conn.execute("DELETE FROM dataset_summary WHERE dataset_id = ?", (dataset_id,))
+        return True
+
+    def record(self, user_id: str, dataset_id: str, summary: dict, uploaded_at=None):
+        """
+        Adds a processed dataset to its user's rollup (replacing an earlier
+        record of the same dataset).
+        """
+        day = _utc_day(uploaded_at)
+        score = summary.get("quality_score")
+        counts = summary["totals"]
+
+        with self._connect() as conn:
+            self._remove_existing(conn, dataset_id)
+            conn.execute(
+                f"""INSERT INTO dataset_summary
+                    (dataset_id, user_id, day, quality_score, {", ".join(ROLLUP_COUNTERS)}, summary)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (dataset_id, user_id, day, score, *(counts[c] for c in ROLLUP_COUNTERS),
+                 json.dumps(summary, default=str))
+            )
+            self._apply(conn, user_id, day, score, counts, 1)
+
+    def remove(self, dataset_id: str) -> bool:
+        """
+        Takes a deleted dataset out of its user's rollup.
+        """
+        with self._connect() as conn:
+            return self._remove_existing(conn, dataset_id)
+
+    def summary(self, dataset_id: str) -> dict | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT summary FROM dataset_summary WHERE dataset_id = ?", (dataset_id,)
+            ).fetchone()
+        return json.loads(row["summary"]) if row else None
+
+    def rollup(self, user_id: str, days: int = TREND_DAYS, today=None) -> dict:
+        """
+        Dashboard aggregates for one user: totals, average score and a
+        per-day score trend for the last `days` days (UTC, oldest first).
+        """
+        today = _utc_date(today)
+        trend_days = [(today - datetime.timedelta(days=days - 1 - i)).isoformat() for i in range(days)]
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM user_rollup WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            daily = {
+                r["day"]: r for r in conn.execute(
+                    "SELECT day, scored, score_sum FROM user_daily WHERE user_id = ? AND day >= ? AND day <= ?",
+                    (user_id, trend_days[0], trend_days[-1])
+                )
+            }
+
+        totals = {c: (row[c] if row else 0) for c in ROLLUP_COUNTERS}
+        scored = row["scored"] if row else 0
+        return {
+            "user_id": user_id,
+            "datasets": row["datasets"] if row else 0,
+            "scored_datasets": scored,
+            "score_sum": row["score_sum"] if row else 0.0,
+            "avg_score": round(row["score_sum"] / scored, 1) if scored else 0,
+            "totals": totals,
+            "total_issues": sum(totals.values()),
+            "trend": [
+                {
+                    "date": day,
+                    "count": daily[day]["scored"] if day in daily else 0,
+                    "score_sum": daily[day]["score_sum"] if day in daily else 0.0
+                }
+                for day in trend_days
+            ]
+        }
+
+
+class _Transaction:
+    """
+    BEGIN IMMEDIATE ... COMMIT around a block, so concurrent workers never
+    interleave the subtract / add steps of one update.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def _utc_date(value=None) -> datetime.date:
+    if value is None:
+        return datetime.datetime.now(datetime.timezone.utc).date()
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return value
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("UTC")
+    return timestamp.date()
+
+
+def _utc_day(value=None) -> str:
+    return _utc_date(value).isoformat()
+
+
+_store = None
+
+def get_rollup_store() -> QARollupStore:
+    global _store
+    if _store is None:
+        _store = QARollupStore()
+    return _store
@@ -0,0 +1,7 @@
+import os
+
+UPLOADS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "server", "uploads")
+
+SAMPLE_10K = os.path.join(UPLOADS_DIR, "1766003815970-b2b_dirty_dataset_10000_realistic.csv")
+SAMPLE_1K = os.path.join(UPLOADS_DIR, "1766071230582-sentinel_ai_b2b_1000_rows_dirty.csv")
+SAMPLE_XLSX = os.path.join(UPLOADS_DIR, "1766033508965-People_Issues(People_Issues).xlsx")
@@ -0,0 +1,115 @@
+"""
+Account rollup (backend/reporting/accounts.py) vs the same table from
+ad-hoc pandas groupbys on the cleaned frame.
+
+Cleans a sample upload once, then resamples it to --rows contacts spread
+over about rows / --contacts-per-account companies (domains and names are
+replaced by the company's). Both versions get the same account keys and roles, so
+only the aggregation is compared. Also times the rollup fed in batches
+(as chunked jobs do).
+
+Run from ml/:
+    python -m benchmarks.bench_accounts [--rows 100000 1000000 3000000 --source ../server/uploads/<file>.csv]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.pipeline.data_quality_pipeline import run_data_quality_pipeline
+from backend.preprocessing.role_mapping import infer_roles
+from backend.reporting.accounts import AccountRollup, account_keys, account_rollup
+
+UPLOADS = sorted(
+    path for path in glob.glob(os.path.join("..", "server", "uploads", "*.csv"))
+    if not os.path.basename(path).startswith("clean_")
+)
+
+# Columns every figure of the rollup needs
+NEEDED = {"domain", "company_name", "jobtitle", "annual_revenue", "people_id"}
+
+
+def default_source() -> str | None:
+    return next((path for path in UPLOADS if NEEDED <= set(pd.read_csv(path, nrows=0).columns)), None)
+
+
+def groupby_rollup(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The ad-hoc version: one groupby per figure.
+    """
+    status = [c for c in df.columns if str(c).endswith("_status")]
+    df = df.assign(
+        _key=account_keys(df),
+        _valid=(df[status] == "VALID").sum(axis=1),
+        _clean=(df[status] == "INVALID").sum(axis=1) == 0,
+        _role=infer_roles(df["jobtitle"])["role"].to_numpy(),
+        _row=np.arange(len(df)),
+    ).dropna(subset=["_key"])
+    groups = df.groupby("_key", sort=False)
+    table = groups.agg(contacts=("_row", "size"), valid_contacts=("_clean", "sum"), company_name=("company_name", "first"))
+
+    best = df.sort_values(["_valid", "_row"], ascending=[False, True]).drop_duplicates("_key")
+    table = table.join(best.set_index("_key")[["_row", "people_id", "jobtitle"]].add_prefix("best_"))
+
+    reported = df[df["annual_revenue_source"] == "original"]
+    counts = reported.groupby(["_key", "annual_revenue"]).size().rename("n").reset_index()
+    mode = counts.sort_values(["n", "annual_revenue"], ascending=[False, True]).drop_duplicates("_key")
+    table = table.join(mode.set_index("_key")["annual_revenue"].rename("revenue_consensus"))
+
+    return table.join(pd.crosstab(df["_key"], df["_role"]).add_prefix("role_"))
+
+
+def scaled(cleaned: pd.DataFrame, rows: int, per_account: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = cleaned.sample(rows, replace=True, random_state=0).reset_index(drop=True)
+    group = pd.Series(rng.integers(0, max(1, rows // per_account), rows).astype(str))
+    df["domain"] = ("acct" + group + ".example.com").where(df["domain"] != "Unknown Domain", df["domain"])
+    df["company_name"] = "Company " + group + " Ltd"
+    return df
+
+
+def timed(func, *args) -> tuple:
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def in_batches(df: pd.DataFrame, batch_size: int) -> pd.DataFrame:
+    rollup = AccountRollup()
+    for start in range(0, len(df), batch_size):
+        rollup.update(df.iloc[start:start + batch_size])
+    return rollup.result()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 3_000_000])
+    parser.add_argument("--contacts-per-account", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--source", default=None, help="sample upload (default: the first in server/uploads with the columns needed)")
+    args = parser.parse_args()
+
+    args.source = args.source or default_source()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        cleaned = run_data_quality_pipeline(pd.read_csv(args.source).dropna(how="all").reset_index(drop=True))
+    # Warm-up: role classifier load
+    account_rollup(cleaned)
+
+    print(f"{'rows':>10} {'accounts':>9} {'rollup s':>9} {'batched s':>10} {'groupby s':>10} {'speedup':>8}")
+    for rows in args.rows:
+        df = scaled(cleaned, rows, args.contacts_per_account)
+        rollup_s, table = timed(account_rollup, df)
+        batched_s, _ = timed(in_batches, df, args.batch_size)
+        groupby_s, _ = timed(groupby_rollup, df)
+        print(f"{rows:>10,} {len(table):>9,} {rollup_s:>9.2f} {batched_s:>10.2f} {groupby_s:>10.2f} "
+              f"{groupby_s / rollup_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Peak memory of clean_frame per input cell, for the admission estimate.
+
+Resamples the rows of a sample upload into CSVs of increasing size and
+cleans each one in a fresh child process (after preload and one warm-up
+run, so shared indexes are not counted). The peak RSS growth, from
+/proc/self/status VmHWM after resetting it, is compared with what
+plan_job() reserves for the file. tracemalloc is not used: it misses the
+Arrow string buffers that hold most of the text.
+
+Linux only. Run from ml/:
+    python -m benchmarks.bench_admission [--rows 20000 100000 --source ../server/uploads/<file>.csv]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+from backend.admission import BYTES_PER_CELL, MB, plan_job
+
+DEFAULT_SOURCE = sorted(glob.glob(os.path.join("..", "server", "uploads", "*.csv")))
+
+
+def status_bytes(key: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(key):
+                return int(line.split()[1]) * 1024
+    raise KeyError(key)
+
+
+def child(path: str, warmup: str):
+    """
+    Runs in the child process; prints "<cells> <peak bytes>".
+    """
+    import app
+    from backend.io.readers import read_file
+    from backend.preload import preload
+
+    out = os.path.join(os.path.dirname(path), "clean_bench.csv")
+    with contextlib.redirect_stdout(io.StringIO()):
+        preload()
+        app.clean_frame(read_file(warmup), out)
+
+    baseline = status_bytes("VmRSS")
+    # Resets VmHWM to the current RSS
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = read_file(path)
+        cells = df.size
+        app.clean_frame(df, out)
+    print(cells, status_bytes("VmHWM") - baseline)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[20_000, 100_000])
+    parser.add_argument("--source", default=DEFAULT_SOURCE[0] if DEFAULT_SOURCE else None)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    source = pd.read_csv(args.source)
+    with tempfile.TemporaryDirectory() as tmp:
+        warmup = os.path.join(tmp, "warmup.csv")
+        source.head(1_000).to_csv(warmup, index=False)
+
+        print(f"{'rows':>9} {'cols':>5} {'file MB':>8} {'peak MB':>8} {'B/cell':>7} {'plan MB':>8}")
+        for rows in args.rows:
+            path = os.path.join(tmp, f"rows_{rows}.csv")
+            source.sample(rows, replace=True, random_state=0).to_csv(path, index=False)
+
+            result = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_admission", "--child", path, warmup],
+                capture_output=True, text=True, check=True
+            )
+            cells, peak = map(int, result.stdout.split()[-2:])
+            job = plan_job(path, budget=1 << 62)
+            print(f"{rows:>9,} {source.shape[1]:>5} {os.path.getsize(path) / MB:>8.1f} {peak / MB:>8.0f} "
+                  f"{peak / cells:>7.0f} {job['estimate'] / MB:>8.0f}")
+
+    print(f"ML_BYTES_PER_CELL in use: {BYTES_PER_CELL}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Anomaly engine scaling on the 1k-row sample (revenue, company_age, founded_date).
+
+Tiles the sample to growing sizes and prints rows/s for each; a linear
+engine keeps rows/s roughly flat as the row count grows.
+
+Run from ml/:  python -m benchmarks.bench_anomalies [--sizes 10000 100000 1000000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.preprocessing.anomalies import detect_anomalies
+from benchmarks import SAMPLE_1K
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    sample = pd.read_csv(SAMPLE_1K)
+    rng = np.random.default_rng(0)
+
+    for rows in args.sizes:
+        df = sample.iloc[rng.integers(0, len(sample), rows)].reset_index(drop=True)
+        # Jitter revenue so the groups are not just copies of the sample
+        if "annual_revenue" in df.columns:
+            revenue = pd.to_numeric(df["annual_revenue"], errors="coerce")
+            df["annual_revenue"] = revenue * rng.lognormal(0, 0.1, rows)
+
+        started = time.perf_counter()
+        flags, counts, _ = detect_anomalies(df)
+        seconds = time.perf_counter() - started
+        print(f"{rows:>12,} rows {seconds:8.3f}s  {rows / seconds:12,.0f} rows/s  {int(flags.sum()):>10,} flagged")
+
+
+if __name__ == "__main__":
+    main()
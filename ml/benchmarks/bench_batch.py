@@ -0,0 +1,96 @@
+"""
+Seconds per file: separate /process calls vs one /process_batch call.
+
+Resamples a sample upload into --files CSVs and cleans them:
+- cold: one fresh process per file (imports, indexes and caches rebuilt)
+- warm: one /process call per file in a single preloaded process
+- batch: one /process_batch call (thread pool, shared warm state)
+- batch pooled: the same with pool_imputation
+
+Run from ml/:
+    python -m benchmarks.bench_batch [--files 8 --rows 1500 --workers 4 --source ../server/uploads/<file>.csv]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+DEFAULT_SOURCE = sorted(glob.glob(os.path.join("..", "server", "uploads", "*integrated dataset*.csv")))
+
+
+def child(path: str):
+    """
+    Runs in the child process: one cold /process call.
+    """
+    import app
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = app.app.test_client().post('/process', json={"filepath": path})
+    assert response.status_code == 200, response.get_json()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=1_500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--source", default=DEFAULT_SOURCE[0] if DEFAULT_SOURCE else None)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    source = pd.read_csv(args.source)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault("ML_ADMISSION_DB", os.path.join(tmp, "admission.sqlite3"))
+        os.environ.setdefault("ML_QA_DB", os.path.join(tmp, "qa.sqlite3"))
+        paths = []
+        for i in range(args.files):
+            path = os.path.join(tmp, f"file_{i}.csv")
+            source.sample(args.rows, replace=True, random_state=i).to_csv(path, index=False)
+            paths.append(path)
+
+        timings = {}
+        started = time.perf_counter()
+        for path in paths:
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_batch", "--child", path],
+                           capture_output=True, check=True, env=os.environ)
+        timings["cold"] = time.perf_counter() - started
+
+        import app
+        from backend.preload import preload
+
+        client = app.app.test_client()
+        with contextlib.redirect_stdout(io.StringIO()):
+            preload()
+            started = time.perf_counter()
+            for path in paths:
+                client.post('/process', json={"filepath": path})
+            timings["warm"] = time.perf_counter() - started
+
+            for name, pooled in (("batch", False), ("batch pooled", True)):
+                started = time.perf_counter()
+                response = client.post('/process_batch', json={
+                    "filepaths": paths, "max_workers": args.workers, "pool_imputation": pooled
+                })
+                timings[name] = time.perf_counter() - started
+                assert response.status_code == 200, response.get_json()
+
+    rows = args.files * args.rows
+    print(f"{args.files} files x {args.rows:,} rows, {args.workers} batch workers")
+    print(f"{'mode':<14} {'s/file':>7} {'rows/s':>8} {'vs cold':>8}")
+    for name, seconds in timings.items():
+        print(f"{name:<14} {seconds / args.files:>7.3f} {rows / seconds:>8.0f} {timings['cold'] / seconds:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Exact duplicate detection: DataFrame.duplicated vs row hashes vs the
+external (spilling) finder.
+
+Resamples the rows of a sample upload (so duplicates are common), checks
+that all three give the same keep-first mask, and times
+- df.duplicated(keep='first') on the whole frame
+- duplicate_mask (vectorized 64-bit row hashes)
+- ExternalDuplicateFinder over batches, with a buffer small enough that
+  every (hash, row) pair goes through the partition files on disk
+
+Run from ml/:  python -m benchmarks.bench_dedup [--rows 1000000 --batch 50000]
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.preprocessing.deduplication import ExternalDuplicateFinder, duplicate_mask
+
+DEFAULT_SOURCE = sorted(glob.glob(os.path.join("..", "server", "uploads", "*.csv")))
+
+
+def timed(label, func):
+    started = time.perf_counter()
+    result = func()
+    print(f"{label:<28} {time.perf_counter() - started:8.3f}s")
+    return result
+
+
+def external(df, batch_size, buffer_rows):
+    with ExternalDuplicateFinder(buffer_rows=buffer_rows) as finder:
+        sizes = []
+        for start in range(0, len(df), batch_size):
+            batch = df.iloc[start:start + batch_size]
+            finder.add_frame(batch)
+            sizes.append(len(batch))
+        return np.concatenate(list(finder.iter_masks(sizes)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--source", default=DEFAULT_SOURCE[0] if DEFAULT_SOURCE else None)
+    args = parser.parse_args()
+
+    source = pd.read_csv(args.source)
+    df = source.sample(args.rows, replace=True, random_state=0).reset_index(drop=True)
+    print(f"{len(df):,} rows x {df.shape[1]} columns from {os.path.basename(args.source)}")
+
+    expected = timed("df.duplicated", lambda: df.duplicated(keep="first").to_numpy())
+    hashed = timed("duplicate_mask", lambda: duplicate_mask(df))
+    spilled = timed("ExternalDuplicateFinder", lambda: external(df, args.batch, args.batch))
+
+    assert (hashed == expected).all() and (spilled == expected).all()
+    print(f"duplicates {int(expected.sum()):,} (all three agree)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Email domain typo correction at scale.
+
+Builds a synthetic column from the bundled provider list plus many company
+domains, injects one-edit typos into a share of the rows, and times
+validate_email_series. Work grows with rows (factorize) plus distinct
+domains (one deletion-index query each).
+
+Run from ml/:  python -m benchmarks.bench_email_domains [--rows 1000000 --companies 20000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.preprocessing.email_domains import COMMON_EMAIL_DOMAINS, validate_email_series
+
+
+def typo(domain, rng):
+    name, dot, tld = domain.partition(".")
+    if len(name) < 3:
+        return domain
+    i = int(rng.integers(0, len(name) - 1))
+    # Swap two adjacent letters
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:] + dot + tld
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--companies", type=int, default=20_000)
+    parser.add_argument("--typo-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    words = ["acme", "globex", "initech", "umbrella", "hooli", "stark", "wayne", "wonka", "cyberdyne", "soylent"]
+    companies = [f"{words[i % len(words)]}{words[(i // len(words)) % len(words)]}{i}.com" for i in range(args.companies)]
+    domains = np.array(sorted(COMMON_EMAIL_DOMAINS) + companies, dtype=object)
+
+    picked = domains[rng.integers(0, len(domains), args.rows)]
+    typos = rng.random(args.rows) < args.typo_rate
+    picked[typos] = [typo(d, rng) for d in picked[typos]]
+    emails = pd.Series([f"user{i % 5000}@{d}" for i, d in enumerate(picked)])
+
+    print(f"{args.rows:,} rows, {len(set(picked)):,} distinct domains, {int(typos.sum()):,} typos injected")
+    started = time.perf_counter()
+    result = validate_email_series(emails)
+    seconds = time.perf_counter() - started
+    flagged = result["issue"].eq("POSSIBLE_DOMAIN_TYPO")
+    print(f"validate_email_series {seconds:8.3f}s  {args.rows / seconds:12,.0f} rows/s")
+    print(f"flagged {int(flagged.sum()):,} rows ({int((flagged & pd.Series(typos)).sum()):,} of them injected)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Industry taxonomy normalization at scale.
+
+Builds a synthetic industry column from the taxonomy variants plus
+misspellings and unrelated free text, and times normalize_industry_series.
+Work grows with rows (factorize) plus distinct values (one row each in the
+batched TF-IDF product).
+
+Run from ml/:  python -m benchmarks.bench_industry [--rows 1000000 --distinct 20000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.preprocessing.industry import INDUSTRY_TAXONOMY, get_industry_index, normalize_industry_series
+
+
+def misspell(text, rng):
+    if len(text) < 4:
+        return text
+    i = int(rng.integers(1, len(text) - 1))
+    return text[:i] + text[i + 1:] if rng.random() < 0.5 else text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    variants = [v for canonical, names in INDUSTRY_TAXONOMY.items() for v in [canonical, *names]]
+    pool = set(variants)
+    while len(pool) < args.distinct:
+        base = variants[int(rng.integers(0, len(variants)))]
+        pool.add(misspell(base, rng) if rng.random() < 0.7 else f"{base} {int(rng.integers(0, 10_000))}")
+    pool = np.array(sorted(pool), dtype=object)
+    values = pd.Series(pool[rng.integers(0, len(pool), args.rows)])
+
+    started = time.perf_counter()
+    get_industry_index()
+    print(f"index build {time.perf_counter() - started:8.3f}s")
+
+    normalized, stats = normalize_industry_series(values)
+    print(f"{stats['rows']:,} rows, {stats['unique_before']:,} distinct -> {stats['unique_after']:,}")
+    print(f"exact {stats['exact']:,}  nearest {stats['nearest']:,}  unmatched {stats['unmatched']:,}")
+    print(f"normalize_industry_series {stats['seconds']:8.3f}s  {stats['rows_per_second']:12,} rows/s")
+
+
+if __name__ == "__main__":
+    main()
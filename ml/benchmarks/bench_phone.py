@@ -0,0 +1,68 @@
+"""
+Phone engine throughput on the 10k-row sample.
+
+Compares the old digit-count check, one phonenumbers.parse per row, and the
+batch engine (vectorized normalization + one parse per unique number).
+
+Run from ml/:  python -m benchmarks.bench_phone [--repeat 10]
+"""
+import argparse
+import re
+import time
+
+import pandas as pd
+import phonenumbers
+
+from backend.preprocessing.phone import parse_phone_series, region_from_country_series
+from benchmarks import SAMPLE_10K
+
+
+def legacy_validate(value):
+    if pd.isna(value) or str(value).strip().lower() in ["", "not provided"]:
+        return False, "MISSING_PHONE"
+    clean_phone = re.sub(r"[^\d+]", "", str(value))
+    if len(clean_phone) < 7:
+        return False, "INVALID_PHONE_FORMAT"
+    return True, "VALID_PHONE"
+
+
+def per_row_parse(phones, regions):
+    results = []
+    for value, region in zip(phones, regions):
+        try:
+            number = phonenumbers.parse(str(value), region)
+            results.append(phonenumbers.is_valid_number(number))
+        except phonenumbers.NumberParseException:
+            results.append(False)
+    return results
+
+
+def timed(label, func, rows):
+    started = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - started
+    print(f"{label:<28} {seconds:8.3f}s  {rows / seconds:12,.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=1, help="Tile the sample this many times")
+    args = parser.parse_args()
+
+    df = pd.read_csv(SAMPLE_10K)
+    df = pd.concat([df] * args.repeat, ignore_index=True)
+    phones, countries = df["phone"], df["country"]
+    rows = len(df)
+    print(f"{rows:,} rows, {phones.nunique():,} unique phones")
+
+    # Load phonenumbers / pycountry metadata outside the timings
+    parse_phone_series(phones.head(100), region_from_country_series(countries.head(100)))
+
+    timed("legacy digit count", lambda: phones.apply(legacy_validate), rows)
+    regions = region_from_country_series(countries)
+    timed("phonenumbers per row", lambda: per_row_parse(phones, regions), rows)
+    timed("batch engine (with hints)", lambda: parse_phone_series(phones, region_from_country_series(countries)), rows)
+
+
+if __name__ == "__main__":
+    main()
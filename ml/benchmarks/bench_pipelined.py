@@ -0,0 +1,75 @@
+"""
+Serial vs pipelined chunked cleaning (backend/io/pipelined.py).
+
+Resamples a sample upload into a large CSV and cleans it with
+clean_file_chunked twice, each time in a fresh child process (after
+preload): once with ML_PIPELINE_DEPTH=0 (read, clean, write one after
+another) and once pipelined. Prints the busy seconds per stage, the wall
+time and how much of the serial time the overlap hid.
+
+Run from ml/:
+    python -m benchmarks.bench_pipelined [--rows 200000 --batch-size 25000 --depth 2 --source ../server/uploads/<file>.csv]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+DEFAULT_SOURCE = sorted(glob.glob(os.path.join("..", "server", "uploads", "*integrated dataset*.csv")))
+
+
+def child(path: str, batch_size: int):
+    """
+    Runs in the child process; prints the pipelining stats as JSON.
+    """
+    import app
+    from backend.preload import preload
+
+    out = os.path.join(os.path.dirname(path), "clean_bench.csv")
+    with contextlib.redirect_stdout(io.StringIO()):
+        preload()
+        result = app.clean_file_chunked(path, out, batch_size=batch_size)
+    print(json.dumps(result["pipelining"]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[200_000])
+    parser.add_argument("--batch-size", type=int, default=25_000)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--source", default=DEFAULT_SOURCE[0] if DEFAULT_SOURCE else None)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], int(args.child[1]))
+        return
+
+    source = pd.read_csv(args.source)
+    print(f"{'rows':>9} {'depth':>5} {'read s':>7} {'clean s':>8} {'write s':>8} {'serial s':>9} "
+          f"{'wall s':>7} {'hidden s':>9} {'hidden':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"rows_{rows}.csv")
+            source.sample(rows, replace=True, random_state=0).to_csv(path, index=False)
+            for depth in (0, args.depth):
+                result = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_pipelined", "--child", path, str(args.batch_size)],
+                    capture_output=True, text=True, check=True,
+                    env=dict(os.environ, ML_PIPELINE_DEPTH=str(depth))
+                )
+                s = json.loads(result.stdout.strip().splitlines()[-1])
+                print(f"{rows:>9,} {depth:>5} {s['read_seconds']:>7.2f} {s['transform_seconds']:>8.2f} "
+                      f"{s['write_seconds']:>8.2f} {s['serial_seconds']:>9.2f} {s['wall_seconds']:>7.2f} "
+                      f"{s['hidden_seconds']:>9.2f} {s['hidden_pct']:>6.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Role mapping: per-row keyword loop vs batch rules + classifier fallback.
+
+Builds a synthetic jobtitle column from the rule keywords, misspelled
+titles and free text the rules cannot match, then times
+- the keyword loop the pipeline used before (clean + rules on every row,
+  unmatched titles -> Admin)
+- infer_roles (rules once per distinct title, one sparse predict for the
+  unmatched ones)
+and reports peak Python memory of each with tracemalloc.
+
+Run from ml/:  python -m benchmarks.bench_role_mapping [--rows 1000000 --distinct 20000]
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from backend.preprocessing.role_classifier import SEED_TITLES, _typo, get_role_classifier
+from backend.preprocessing.role_mapping import ROLE_RULES, clean_job_title, infer_roles, rule_role
+
+
+def keyword_loop(titles: pd.Series) -> pd.Series:
+    return titles.apply(clean_job_title).apply(lambda t: rule_role(t) or "Admin" if t else "Admin")
+
+
+def measure(label, func, rows):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:32s} {seconds:8.3f}s  {rows / seconds:12,.0f} rows/s  peak {peak / 2**20:8.1f} MiB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = list(SEED_TITLES) + [kw for _, keywords in ROLE_RULES for kw in keywords]
+    pool = set(base)
+    while len(pool) < args.distinct:
+        title = base[int(rng.integers(0, len(base)))]
+        pool.add(_typo(title, rng) if rng.random() < 0.6 else f"{title} {int(rng.integers(0, 10_000))}")
+    pool = np.array(sorted(pool), dtype=object)
+    titles = pd.Series(pool[rng.integers(0, len(pool), args.rows)])
+
+    get_role_classifier()
+    print(f"{args.rows:,} rows, {len(pool):,} distinct titles")
+    loop = measure("keyword loop (per row)", lambda: keyword_loop(titles), args.rows)
+    batch = measure("infer_roles (batch + model)", lambda: infer_roles(titles), args.rows)
+
+    rescued = (loop.eq("Admin") & batch["role"].ne("Admin")).sum()
+    print(f"rows the loop sent to Admin that the classifier placed: {int(rescued):,}")
+
+
+if __name__ == "__main__":
+    main()
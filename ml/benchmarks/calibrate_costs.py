@@ -0,0 +1,137 @@
+"""
+Fits the stage cost model (backend/pipeline/cost_model.py) and writes
+backend/models/stage_costs.json.
+
+Builds frames of several sizes from a sample upload, two per size: rows
+resampled with replacement (few distinct values) and the same rows with
+every text cell made unique (worst case for per-distinct-value stages).
+Each frame runs the whole plan, opt-in stages included, single-threaded,
+once as is and once with every stage on its fast variant and skippable
+stages dropped; writing the cleaned CSV is timed too. Skippable stages
+(spelling is ~10 ms a row) are only timed on frames up to --slow-rows
+and extrapolated by the linear fit. One warm-up run first, so index builds and the
+role classifier load are not counted.
+
+Run from ml/:
+    python -m benchmarks.calibrate_costs [--rows 1000 5000 20000 50000 --source ../server/uploads/<file>.csv]
+"""
+import argparse
+import contextlib
+import datetime
+import glob
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.pipeline.cost_model import COSTS_PATH, WRITE_KEY, CostModel, FrameProfile
+from backend.pipeline.dag import execute_plan
+from backend.pipeline.data_quality_pipeline import PIPELINE_STAGES, plan_data_quality_pipeline
+from backend.preload import preload
+
+UPLOADS = sorted(
+    path for path in glob.glob(os.path.join("..", "server", "uploads", "*.csv"))
+    if not os.path.basename(path).startswith("clean_")
+)
+
+ALL_STAGES = [stage.name for stage in PIPELINE_STAGES]
+
+
+def richest(paths: list) -> str | None:
+    """
+    The upload whose columns plan the most stages, so the most get calibrated.
+    """
+    return max(
+        paths,
+        key=lambda path: len(plan_data_quality_pipeline(pd.read_csv(path, nrows=0), include=ALL_STAGES).stages),
+        default=None
+    )
+
+
+def make_distinct(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Every non-missing text cell suffixed with its row number.
+    """
+    df = df.copy()
+    suffix = pd.Series(np.arange(len(df)).astype(str), index=df.index)
+    for col in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            values = df[col].astype(object)
+            df[col] = values.where(values.isna(), values.astype(str) + " " + suffix)
+    return df
+
+
+def run(df: pd.DataFrame, fast: bool, slow: bool = True) -> list:
+    """
+    Runs every applicable stage; returns (key, rows, uniques, seconds) samples.
+    slow=False leaves the skippable stages out.
+    """
+    profile = FrameProfile(df)
+    plan = plan_data_quality_pipeline(df, include=ALL_STAGES)
+    if fast or not slow:
+        plan.stages = [p for p in plan.stages if not p.stage.skippable]
+    for planned in plan.stages:
+        if fast and planned.stage.fast is not None:
+            planned.mode = "fast"
+    with contextlib.redirect_stdout(io.StringIO()):
+        execute_plan(df.copy(), plan, max_workers=1)
+    return [
+        (planned.key, profile.rows, profile.uniques(planned.reads), plan.timings[planned.stage.name])
+        for planned in plan.stages
+        if not fast or planned.mode == "fast"
+    ]
+
+
+def time_write(df: pd.DataFrame, directory: str) -> tuple:
+    started = time.perf_counter()
+    df.to_csv(os.path.join(directory, "calibrate.csv"), index=False)
+    return WRITE_KEY, df.size, 0.0, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 5_000, 20_000, 50_000])
+    parser.add_argument("--slow-rows", type=int, default=5_000, help="largest frame to time skippable stages on")
+    parser.add_argument("--source", default=None, help="sample upload (default: the upload in server/uploads planning the most stages)")
+    parser.add_argument("--output", default=COSTS_PATH)
+    args = parser.parse_args()
+
+    args.source = args.source or richest(UPLOADS)
+    source = pd.read_csv(args.source)
+    with contextlib.redirect_stdout(io.StringIO()):
+        preload()
+    run(source.head(100), fast=False)
+
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            resampled = source.sample(rows, replace=True, random_state=0).reset_index(drop=True)
+            for variant, df in (("resampled", resampled), ("distinct", make_distinct(resampled))):
+                started = time.perf_counter()
+                samples += run(df, fast=False, slow=rows <= args.slow_rows) + run(df, fast=True)
+                samples.append(time_write(df, tmp))
+                print(f"{rows:>9,} {variant:<10} {time.perf_counter() - started:>7.1f}s")
+
+    model = CostModel.fit(samples, meta={
+        "calibrated": datetime.date.today().isoformat(),
+        "source": os.path.basename(args.source),
+        "rows": args.rows,
+        "slow_rows": args.slow_rows,
+    })
+    model.save(args.output)
+
+    print(f"\n{'stage':<34} {'samples':>7} {'max s':>8} {'max err s':>9}")
+    by_key = {}
+    for key, rows, uniques, seconds in samples:
+        by_key.setdefault(key, []).append(seconds - model.predict(key, rows, uniques))
+    for key, errors in sorted(by_key.items()):
+        measured = [s for k, _, _, s in samples if k == key]
+        print(f"{key:<34} {len(errors):>7} {max(measured):>8.3f} {max(map(abs, errors)):>9.3f}")
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Import-time budget for the ML entry points.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+each entry point and fails (exit code 1) when the cumulative import time is
+over budget. Heavy dependencies (scikit-learn, spellchecker, tldextract,
+phonenumbers, pycountry) must stay lazy for these budgets to hold.
+
+Run from ml/:  python -m benchmarks.import_time [--scale 1.5] [--top 10]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative milliseconds; pandas alone accounts for most of it
+BUDGETS_MS = {
+    "backend.pipeline.data_quality_pipeline": 900,
+    "analyzer": 800,
+    "app": 1300,
+    # app plus FastAPI / pydantic
+    "asgi": 1800,
+}
+
+# Must not be imported just by importing an entry point
+LAZY_MODULES = ["sklearn", "spellchecker", "tldextract", "phonenumbers", "pycountry"]
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str):
+    """
+    Returns (cumulative_ms, [(cumulative_ms, name), ...]) for one import.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ML_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            entries.append((int(match.group(2)) / 1000, match.group(4)))
+
+    total = next(ms for ms, name in reversed(entries) if name == module)
+    return total, entries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget (slow machines)")
+    parser.add_argument("--top", type=int, default=5, help="Show the N slowest imports per entry point")
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget in BUDGETS_MS.items():
+        budget *= args.scale
+        total, entries = measure(module)
+        loaded = {name.split(".")[0] for _, name in entries}
+        eager = [m for m in LAZY_MODULES if m in loaded]
+
+        status = "OK" if total <= budget and not eager else "FAIL"
+        failed |= status == "FAIL"
+        print(f"[{status}] {module}: {total:.0f} ms (budget {budget:.0f} ms)")
+        if eager:
+            print(f"       imported eagerly: {', '.join(eager)}")
+        for ms, name in sorted(entries, reverse=True)[1:args.top + 1]:
+            print(f"       {ms:8.1f} ms  {name}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
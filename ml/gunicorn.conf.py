@@ -0,0 +1,24 @@
+# gunicorn.conf.py
+# Preforking production server for the ML service: gunicorn -c gunicorn.conf.py
+import multiprocessing
+import os
+
+wsgi_app = "wsgi:application"
+bind = os.environ.get("ML_BIND", "0.0.0.0:5000")
+
+# Load the app (and preload heavy modules) once in the master, then fork
+preload_app = True
+
+workers = int(os.environ.get("ML_WORKERS", max(2, multiprocessing.cpu_count())))
+worker_class = "gthread"
+threads = int(os.environ.get("ML_THREADS", 2))
+
+# Large uploads take minutes to clean
+timeout = int(os.environ.get("ML_TIMEOUT", 600))
+graceful_timeout = 30
+
+# Recycle workers now and then to return fragmented memory
+max_requests = int(os.environ.get("ML_MAX_REQUESTS", 200))
+max_requests_jitter = 20
+
+accesslog = "-"
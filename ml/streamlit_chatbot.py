@@ -5,6 +5,7 @@ import time
 from io import BytesIO
 from analyzer import DataAnalyzer
 from backend.pipeline.data_quality_pipeline import run_data_quality_pipeline
+from backend.preprocessing.compaction import compact_dtypes, with_placeholders
 
 st.set_page_config(page_title="Guardian AI - Data Consultant", layout="wide", page_icon="🛡️")
 
@@ -180,6 +181,8 @@ if st.session_state.df is not None:
         if st.button("🚀 Run Quality Pipeline"):
             with st.spinner("Cleaning data..."):
                 clean_df = run_data_quality_pipeline(st.session_state.df)
+                # Keep the cleaned frame small in session state
+                clean_df, compaction = compact_dtypes(clean_df)
                 st.session_state.df = clean_df
                 # Re-analyze
                 analyzer = DataAnalyzer(clean_df)
@@ -187,6 +190,6 @@ if st.session_state.df is not None:
                 st.success("Data Cleaned!")
                 
                 output = BytesIO()
-                clean_df.to_csv(output, index=False)
+                with_placeholders(clean_df, compaction["placeholders"]).to_csv(output, index=False)
                 output.seek(0)
                 st.download_button("Download Cleaned CSV", output, "cleaned_data.csv", "text/csv")
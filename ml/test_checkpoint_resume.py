@@ -0,0 +1,75 @@
+"""
+A job that crashes after some pipeline levels and is resumed from its
+checkpoint must log the same cell changes as a run that never crashed.
+
+Run from ml/:  python -m pytest test_checkpoint_resume.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from backend.pipeline.changelog import ChangeLog
+from backend.pipeline.checkpoint import StageCheckpoint
+from backend.pipeline.data_quality_pipeline import run_data_quality_pipeline
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingCheckpoint(StageCheckpoint):
+    """
+    Dies right after saving level crash_after, like a worker killed mid-job.
+    """
+
+    def __init__(self, job_id, root, crash_after):
+        super().__init__(job_id, root)
+        self.crash_after = crash_after
+
+    def save(self, index, *args, **kwargs):
+        super().save(index, *args, **kwargs)
+        if index == self.crash_after:
+            raise Crash(index)
+
+
+def sample_frame(rows=300):
+    rng = np.random.default_rng(7)
+    founded = pd.Series(rng.integers(1950, 2020, rows)).astype(str) + "-01-15"
+    return pd.DataFrame({
+        "company_name": rng.choice(["Acme Ltd", "Globex", None, "initech"], rows),
+        "industry": rng.choice(["IT Services", "it services", "Retail", None], rows),
+        "country": rng.choice(["UK", "United Kingdom", "usa", None], rows),
+        "head_office_country": rng.choice(["England", None], rows),
+        "phone": pd.Series(rng.choice([442071234567.0, 14155550123.0, np.nan], rows), dtype=object),
+        "founded_date": founded.where(rng.random(rows) < 0.7),
+        "company_age": pd.Series(rng.choice([12.0, 37.0, np.nan], rows)),
+        "company_size": rng.choice(["50", "200", None], rows),
+        "annual_revenue": rng.choice(["1350000", "980k", "2,100,000", None], rows),
+        "address_1": rng.choice(["1 high st", "22 park rd", None], rows),
+    })
+
+
+def logged(change_log):
+    return change_log.to_frame().sort_values(["row", "column", "reason"], kind="stable", ignore_index=True)
+
+
+def test_resumed_run_logs_the_same_changes(tmp_path):
+    df = sample_frame()
+    clean_log = ChangeLog()
+    expected = run_data_quality_pipeline(df.copy(), change_log=clean_log, max_workers=1)
+    levels = len(run_data_quality_pipeline(df.copy(), return_plan=True, max_workers=1)[1].levels)
+
+    for crash_after in sorted({0, levels // 2, levels - 2}):
+        root = str(tmp_path / f"crash_{crash_after}")
+        with pytest.raises(Crash):
+            run_data_quality_pipeline(df.copy(), change_log=ChangeLog(), max_workers=1,
+                                      checkpoint=CrashingCheckpoint("job", root, crash_after))
+
+        resumed_log = ChangeLog()
+        resumed, plan = run_data_quality_pipeline(df.copy(), change_log=resumed_log, max_workers=1,
+                                                  return_plan=True, checkpoint=StageCheckpoint("job", root))
+        assert plan.resumed
+        pd.testing.assert_frame_equal(logged(resumed_log), logged(clean_log))
+        assert resumed.astype(str).equals(expected.astype(str))
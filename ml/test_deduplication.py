@@ -0,0 +1,59 @@
+"""
+Duplicate detection must match DataFrame.duplicated(keep='first') exactly,
+in memory (duplicate_mask) and across batches (ExternalDuplicateFinder).
+
+Run from ml/:  python -m pytest test_deduplication.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.preprocessing.deduplication import ExternalDuplicateFinder, duplicate_mask
+
+CASES = {
+    # float64 hashing merged these
+    "large int ids": pd.DataFrame({"id": [2 ** 60, 2 ** 60 + 1, 2 ** 60]}),
+    # string hashing of objects merged 1 and '1'
+    "int vs text": pd.DataFrame({"a": pd.Series([1, "1", 1.0, True, "1"], dtype=object)}),
+    # pandas treats them as equal, float bits did not
+    "signed zero": pd.DataFrame({"a": [0.0, -0.0, np.nan, np.nan]}),
+    "none vs nan": pd.DataFrame({"a": pd.Series([None, np.nan, None], dtype=object), "b": [1, 1, 1]}),
+    "nullable ints": pd.DataFrame({"a": pd.array([1, None, 1, None, 2 ** 62], dtype="Int64")}),
+    "mixed columns": pd.DataFrame({
+        "x": np.random.default_rng(0).integers(0, 20, 2000),
+        "y": np.random.default_rng(1).choice(["a", "b", None], 2000),
+        "z": np.random.default_rng(2).random(2000).round(1),
+    }),
+}
+
+
+def external_mask(df, batch_size):
+    with ExternalDuplicateFinder(buffer_rows=batch_size) as finder:
+        sizes = []
+        for start in range(0, len(df), batch_size):
+            batch = df.iloc[start:start + batch_size]
+            finder.add_frame(batch)
+            sizes.append(len(batch))
+        return np.concatenate(list(finder.iter_masks(sizes)))
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_duplicate_mask_matches_pandas(name):
+    df = CASES[name]
+    assert (duplicate_mask(df) == df.duplicated(keep="first").to_numpy()).all()
+
+
+@pytest.mark.parametrize("name", CASES)
+@pytest.mark.parametrize("batch_size", [1, 2, 1000])
+def test_external_finder_matches_pandas(name, batch_size):
+    df = CASES[name]
+    assert (external_mask(df, batch_size) == df.duplicated(keep="first").to_numpy()).all()
+
+
+def test_ints_and_floats_across_batches():
+    # A column parsed as int in one chunk and float (with a null) in another
+    batches = [pd.DataFrame({"a": [3, 2 ** 60]}), pd.DataFrame({"a": [3.0, np.nan]}), pd.DataFrame({"a": [2 ** 60 + 1]})]
+    with ExternalDuplicateFinder() as finder:
+        for batch in batches:
+            finder.add_frame(batch)
+        assert finder.duplicate_rows().tolist() == [2]
@@ -0,0 +1,24 @@
+"""
+Production entry point for the ML service.
+
+    gunicorn -c gunicorn.conf.py
+
+gunicorn.conf.py sets preload_app, so this module is imported once in the
+master: heavy modules and reference tables are loaded here and shared by
+every forked worker.
+"""
+import gc
+import os
+
+from app import app
+from backend.preload import preload
+
+skip = {name.strip() for name in os.environ.get("ML_PRELOAD_SKIP", "").split(",") if name.strip()}
+timings = preload(skip=skip)
+print(f"Preloaded: {timings}")
+
+# Keep preloaded objects out of the collector so workers do not touch
+# (and copy) their pages during garbage collection
+gc.freeze()
+
+application = app
@@ -1,56 +1,106 @@
+const axios = require('axios');
 const Dataset = require('../models/Dataset');
 
-exports.getDashboardStats = async (req, res) => {
+// Per-user aggregates kept by the ML service (see ml/backend/reporting/qa_report.py)
+const ROLLUP_URL = 'http://localhost:5000/rollup';
+
+// Sums issue counts and the 7-day trend from full reports.
+// Only used while the ML rollup does not cover every completed dataset yet.
+const aggregateDatasets = (datasets) => {
+    const scoredDatasets = datasets.filter(d => d.report && d.report.quality_score);
+    const totals = { missing: 0, duplicates: 0, anomalies: 0, inconsistencies: 0 };
+    const daily = {};
+
+    datasets.forEach(d => {
+        if (d.report) {
+            // Missing Values
+            if (d.report.missing_values) {
+                // Check if it's an object (col: count) or number
+                if (typeof d.report.missing_values === 'object') {
+                    totals.missing += Object.values(d.report.missing_values).reduce((a, b) => a + b, 0);
+                } else if (typeof d.report.missing_values === 'number') {
+                    totals.missing += d.report.missing_values;
+                }
+            }
+
+            // Duplicates
+            if (d.report.duplicates) totals.duplicates += d.report.duplicates;
+
+            // Anomalies (rows with numeric outliers or impossible values)
+            if (d.report.anomalies) totals.anomalies += d.report.anomalies;
+
+            // Inconsistencies (Invalid Formatting)
+            if (d.report.inconsistencies) totals.inconsistencies += d.report.inconsistencies;
+        }
+    });
+
+    scoredDatasets.forEach(d => {
+        const dateStr = d.uploadDate.toISOString().split('T')[0];
+        if (!daily[dateStr]) daily[dateStr] = { count: 0, totalScore: 0 };
+        daily[dateStr].totalScore += d.report.quality_score;
+        daily[dateStr].count += 1;
+    });
+
+    return {
+        scored: scoredDatasets.length,
+        scoreSum: scoredDatasets.reduce((acc, d) => acc + d.report.quality_score, 0),
+        totals,
+        daily
+    };
+};
+
+// Same shape from the precomputed rollup: constant work per request
+const aggregateRollup = (rollup) => {
+    const daily = {};
+    rollup.trend.forEach(day => {
+        daily[day.date] = { count: day.count, totalScore: day.score_sum };
+    });
+    return {
+        scored: rollup.scored_datasets,
+        scoreSum: rollup.score_sum,
+        totals: rollup.totals,
+        daily
+    };
+};
+
+const fetchRollup = async (userId) => {
     try {
-        const datasets = await Dataset.find({ user: req.user.id }).sort({ uploadDate: -1 });
+        const response = await axios.get(`${ROLLUP_URL}/${userId}`);
+        return response.data;
+    } catch (error) {
+        console.error('QA Rollup Error:', error.message);
+        return null;
+    }
+};
 
-        // 1. Basic Stats
-        const totalDatasets = datasets.length;
+exports.getDashboardStats = async (req, res) => {
+    try {
+        const userId = req.user.id;
+
+        const [totalDatasets, completedDatasets, rollup] = await Promise.all([
+            Dataset.countDocuments({ user: userId }),
+            Dataset.countDocuments({ user: userId, status: 'completed' }),
+            fetchRollup(userId)
+        ]);
+
+        // 1. Aggregates: the rollup when it covers every processed dataset,
+        // otherwise (datasets processed before the rollup existed) the reports alone
+        let aggregates;
+        if (rollup && rollup.datasets === completedDatasets) {
+            aggregates = aggregateRollup(rollup);
+        } else {
+            const datasets = await Dataset.find({ user: userId }).select('report uploadDate');
+            aggregates = aggregateDatasets(datasets);
+        }
 
         // Calculate Average Quality Score
-        const scoredDatasets = datasets.filter(d => d.report && d.report.quality_score);
-        const avgScore = scoredDatasets.length > 0
-            ? (scoredDatasets.reduce((acc, d) => acc + d.report.quality_score, 0) / scoredDatasets.length).toFixed(1)
+        const avgScore = aggregates.scored > 0
+            ? (aggregates.scoreSum / aggregates.scored).toFixed(1)
             : 0;
 
         // Calculate Critical Issues (sum of all issues found)
-        let totalIssues = 0;
-        let missingCount = 0;
-        let duplicateCount = 0;
-        let anomalyCount = 0;
-        let formatCount = 0; // Inconsistencies
-
-        datasets.forEach(d => {
-            if (d.report) {
-                // Missing Values
-                if (d.report.missing_values) {
-                    // Check if it's an object (col: count) or number
-                    if (typeof d.report.missing_values === 'object') {
-                        const mCount = Object.values(d.report.missing_values).reduce((a, b) => a + b, 0);
-                        missingCount += mCount;
-                        totalIssues += mCount;
-                    } else if (typeof d.report.missing_values === 'number') {
-                        missingCount += d.report.missing_values;
-                        totalIssues += d.report.missing_values;
-                    }
-                }
-
-                // Duplicates
-                if (d.report.duplicates) {
-                    duplicateCount += d.report.duplicates;
-                    totalIssues += d.report.duplicates;
-                }
-
-                // Anomalies (Deprecated/Removed, but check for backward compat if needed)
-                // We are ignoring Anomalies as per request to focus on Formatting
-
-                // Inconsistencies (Invalid Formatting)
-                if (d.report.inconsistencies) {
-                    formatCount += d.report.inconsistencies;
-                    totalIssues += d.report.inconsistencies;
-                }
-            }
-        });
+        const { missing, duplicates, anomalies, inconsistencies } = aggregates.totals;
+        const totalIssues = missing + duplicates + anomalies + inconsistencies;
 
         // 2. Trend Data (Last 7 Days)
         // Group by day
@@ -60,19 +110,8 @@ exports.getDashboardStats = async (req, res) => {
             return d.toISOString().split('T')[0];
         });
 
-        const trendMap = {};
-        last7Days.forEach(date => trendMap[date] = { count: 0, totalScore: 0 });
-
-        scoredDatasets.forEach(d => {
-            const dateStr = d.uploadDate.toISOString().split('T')[0];
-            if (trendMap[dateStr]) {
-                trendMap[dateStr].totalScore += d.report.quality_score;
-                trendMap[dateStr].count += 1;
-            }
-        });
-
         const trendData = last7Days.map(date => {
-            const dayData = trendMap[date];
+            const dayData = aggregates.daily[date] || { count: 0, totalScore: 0 };
             return {
                 name: new Date(date).toLocaleDateString('en-US', { weekday: 'short' }),
                 score: dayData.count > 0 ? Math.round(dayData.totalScore / dayData.count) : 0
@@ -81,13 +120,19 @@ exports.getDashboardStats = async (req, res) => {
 
         // 3. Issues Overview
         const issueData = [
-            { name: 'Missing', value: missingCount },
-            { name: 'Duplicate', value: duplicateCount },
-            { name: 'Format', value: formatCount }
+            { name: 'Missing', value: missing },
+            { name: 'Duplicate', value: duplicates },
+            { name: 'Anomaly', value: anomalies },
+            { name: 'Format', value: inconsistencies }
         ];
 
-        // 4. Recent Activity
-        const recentUploads = datasets.slice(0, 5).map(d => {
+        // 4. Recent Activity (only the fields the list shows, no previews)
+        const recentDatasets = await Dataset.find({ user: userId })
+            .sort({ uploadDate: -1 })
+            .limit(5)
+            .select('filename uploadDate report.quality_score');
+
+        const recentUploads = recentDatasets.map(d => {
             let status = 'Clean';
             let score = d.report?.quality_score || 0;
 
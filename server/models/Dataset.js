@@ -16,8 +16,15 @@ const DatasetSchema = new mongoose.Schema({
         anomalies: Number,
         inconsistencies: Number,
         formatting_issues: Object,
+        anomaly_columns: Object,
+        anomaly_rules: Object,
         final_rows: Number
     },
+    qa_summary: { type: Object },
+    // Changed-cell counts per column; the records are paged from the ML service
+    changes: { type: Object },
+    // Account rollup file (one row per company) and its counts
+    accounts: { type: Object },
     preview_original: { type: Array, default: [] },
     preview_cleaned: { type: Array, default: [] },
     duplicates: { type: Array, default: [] }
@@ -23,6 +23,106 @@ const storage = multer.diskStorage({
 
 const upload = multer({ storage });
 
+// Streaming ML service (ml/asgi.py) on a node without access to uploads/
+const ML_STREAM_URL = process.env.ML_STREAM_URL;
+
+// Sends a CSV upload through POST /stream/process and writes the cleaned CSV
+// it streams back next to the upload. Returns the job result in the shape
+// of a /process response.
+// Optional pipeline stage selection from the upload request, passed on as
+// comma-separated names (the ML service checks them and answers 400)
+function stageNames(value) {
+    return Array.isArray(value) ? value.join(',') : value || undefined;
+}
+
+async function streamDataset(dataset, req) {
+    const cleanedPath = path.join(path.dirname(dataset.originalPath), 'clean_' + path.basename(dataset.originalPath));
+    const response = await axios.post(`${ML_STREAM_URL}/stream/process`, fs.createReadStream(dataset.originalPath), {
+        headers: { 'Content-Type': 'text/csv' },
+        params: {
+            user_id: req.user.id, dataset_id: dataset._id.toString(), uploaded_at: dataset.uploadDate,
+            include: stageNames(req.body?.include), outputs: stageNames(req.body?.outputs)
+        },
+        responseType: 'stream',
+        maxBodyLength: Infinity
+    });
+    await new Promise((resolve, reject) => {
+        const out = fs.createWriteStream(cleanedPath);
+        response.data.on('error', reject);
+        out.on('error', reject).on('finish', resolve);
+        response.data.pipe(out);
+    });
+
+    const job = await axios.get(`${ML_STREAM_URL}/stream/reports/${response.headers['x-job-id']}`);
+    return { ...job.data, cleaned_path: cleanedPath, preview_duplicates: [] };
+}
+
+// Runs the ML pipeline on a dataset's file and stores the results.
+// job_id is the dataset id, so a retry of a failed dataset resumes from the
+// pipeline stages the ML service checkpointed before the failure.
+async function processDataset(dataset, req, res) {
+    const FLASK_URL = 'http://localhost:5000/process';
+
+    try {
+        // user / dataset ids let the ML service update the dashboard rollup
+        const flaskResponse = ML_STREAM_URL && dataset.originalPath.endsWith('.csv')
+            ? { data: await streamDataset(dataset, req) }
+            : await axios.post(FLASK_URL, {
+                filepath: dataset.originalPath,
+                user_id: req.user.id,
+                dataset_id: dataset._id.toString(),
+                job_id: dataset._id.toString(),
+                uploaded_at: dataset.uploadDate,
+                // Optional seconds target; the ML service degrades slow stages to meet it
+                latency_budget: req.body?.latency_budget ? Number(req.body.latency_budget) : undefined,
+                // Optional one-row-per-company table next to the cleaned CSV
+                account_rollup: req.body?.account_rollup === true || req.body?.account_rollup === 'true',
+                // Optional opt-in stages to add / only the columns to compute
+                include: stageNames(req.body?.include),
+                outputs: stageNames(req.body?.outputs)
+            });
+
+        // 3. Update MongoDB with results
+        dataset.status = 'completed';
+        dataset.report = flaskResponse.data.report;
+        dataset.cleanedPath = flaskResponse.data.cleaned_path;
+        dataset.qa_summary = flaskResponse.data.qa_summary;
+        dataset.changes = flaskResponse.data.changes;
+        if (flaskResponse.data.accounts) {
+            const { preview, ...accounts } = flaskResponse.data.accounts;
+            dataset.accounts = accounts;
+        }
+
+        // Save Previews
+        dataset.preview_original = flaskResponse.data.preview_original || [];
+        dataset.preview_cleaned = flaskResponse.data.preview_cleaned || [];
+        dataset.duplicates = flaskResponse.data.preview_duplicates || [];
+
+        await dataset.save();
+
+        res.json({
+            message: 'File processed successfully',
+            dataset
+        });
+
+    } catch (flaskError) {
+        console.error('Flask Service Error:', flaskError.message);
+
+        dataset.status = 'failed';
+        await dataset.save();
+
+        const backendError = flaskError.response?.data?.error || 'ML Service failed to process file';
+
+        // ML service is out of memory budget: pass the retry hint on
+        if (flaskError.response?.status === 503) {
+            const retryAfter = flaskError.response.data?.retry_after;
+            if (retryAfter) res.set('Retry-After', String(retryAfter));
+            return res.status(503).json({ error: backendError, retry_after: retryAfter, dataset });
+        }
+        return res.status(500).json({ error: backendError, dataset });
+    }
+}
+
 // POST /api/upload
 router.post('/upload', protect, upload.single('file'), async (req, res) => {
     try {
@@ -40,43 +140,106 @@ router.post('/upload', protect, upload.single('file'), async (req, res) => {
         await newDataset.save();
 
         // 2. Call Flask Microservice
-        const FLASK_URL = 'http://localhost:5000/process';
+        await processDataset(newDataset, req, res);
 
-        try {
-            const flaskResponse = await axios.post(FLASK_URL, {
-                filepath: req.file.path
-            });
-
-            // 3. Update MongoDB with results
-            newDataset.status = 'completed';
-            newDataset.report = flaskResponse.data.report;
-            newDataset.cleanedPath = flaskResponse.data.cleaned_path;
+    } catch (error) {
+        console.error('Upload Error:', error);
+        res.status(500).json({ error: 'Server error during upload' });
+    }
+});
 
-            // Save Previews
-            newDataset.preview_original = flaskResponse.data.preview_original || [];
-            newDataset.preview_cleaned = flaskResponse.data.preview_cleaned || [];
-            newDataset.duplicates = flaskResponse.data.preview_duplicates || [];
+// POST /api/upload/batch - Upload several related files, cleaned in one ML call
+// (shared warm state; pool_imputation=true pools revenue statistics across them)
+router.post('/upload/batch', protect, upload.array('files'), async (req, res) => {
+    try {
+        if (!req.files || req.files.length === 0) {
+            return res.status(400).json({ error: 'No files uploaded' });
+        }
 
-            await newDataset.save();
+        const datasets = await Promise.all(req.files.map(file => new Dataset({
+            filename: file.originalname,
+            originalPath: file.path,
+            status: 'processing',
+            user: req.user.id
+        }).save()));
 
-            res.json({
-                message: 'File processed successfully',
-                dataset: newDataset
+        let flaskResponse;
+        try {
+            flaskResponse = await axios.post('http://localhost:5000/process_batch', {
+                filepaths: datasets.map(d => d.originalPath),
+                dataset_ids: datasets.map(d => d._id.toString()),
+                user_id: req.user.id,
+                pool_imputation: req.body?.pool_imputation === 'true' || req.body?.pool_imputation === true
             });
-
         } catch (flaskError) {
-            console.error('Flask Service Error:', flaskError.message);
+            console.error('Flask Batch Error:', flaskError.message);
+            await Promise.all(datasets.map(d => { d.status = 'failed'; return d.save(); }));
+            const status = flaskError.response?.status === 503 ? 503 : 500;
+            const retryAfter = flaskError.response?.data?.retry_after;
+            if (status === 503 && retryAfter) res.set('Retry-After', String(retryAfter));
+            return res.status(status).json({
+                error: flaskError.response?.data?.error || 'ML Service failed to process files',
+                retry_after: retryAfter,
+                datasets
+            });
+        }
 
-            newDataset.status = 'failed';
-            await newDataset.save();
+        // Each file succeeds or fails on its own
+        const files = flaskResponse.data.files || {};
+        await Promise.all(datasets.map(dataset => {
+            const result = files[dataset.originalPath] || { error: 'No result' };
+            if (result.error) {
+                dataset.status = 'failed';
+            } else {
+                dataset.status = 'completed';
+                dataset.report = result.report;
+                dataset.cleanedPath = result.cleaned_path;
+                dataset.qa_summary = result.qa_summary;
+                dataset.changes = result.changes;
+                dataset.preview_original = result.preview_original || [];
+                dataset.preview_cleaned = result.preview_cleaned || [];
+                dataset.duplicates = result.preview_duplicates || [];
+            }
+            return dataset.save();
+        }));
 
-            const backendError = flaskError.response?.data?.error || 'ML Service failed to process file';
-            return res.status(500).json({ error: backendError, dataset: newDataset });
+        res.json({
+            message: 'Files processed',
+            datasets,
+            combined: flaskResponse.data.combined,
+            throughput: flaskResponse.data.throughput
+        });
+    } catch (error) {
+        console.error('Batch Upload Error:', error);
+        res.status(500).json({ error: 'Server error during batch upload' });
+    }
+});
+
+// POST /api/datasets/:id/retry - Reprocess a failed dataset
+router.post('/datasets/:id/retry', protect, async (req, res) => {
+    try {
+        const dataset = await Dataset.findById(req.params.id);
+        if (!dataset) {
+            return res.status(404).json({ error: 'Dataset not found' });
         }
 
+        // Verify ownership
+        if (dataset.user.toString() !== req.user.id) {
+            return res.status(401).json({ error: 'Not authorized' });
+        }
+        if (dataset.status !== 'failed') {
+            return res.status(400).json({ error: 'Only failed datasets can be retried' });
+        }
+        if (!dataset.originalPath || !fs.existsSync(dataset.originalPath)) {
+            return res.status(404).json({ error: 'File not found on server' });
+        }
+
+        dataset.status = 'processing';
+        await dataset.save();
+        await processDataset(dataset, req, res);
     } catch (error) {
-        console.error('Upload Error:', error);
-        res.status(500).json({ error: 'Server error during upload' });
+        console.error('Retry Error:', error);
+        res.status(500).json({ error: 'Server error during retry' });
     }
 });
 
@@ -111,6 +274,40 @@ router.get('/datasets/:id', protect, async (req, res) => {
     }
 });
 
+// GET /api/datasets/:id/changes - Page through the cells cleaning changed
+// Query: column, reason, row, offset, limit
+router.get('/datasets/:id/changes', protect, async (req, res) => {
+    try {
+        const dataset = await Dataset.findById(req.params.id);
+        if (!dataset) {
+            return res.status(404).json({ error: 'Dataset not found' });
+        }
+
+        // Verify ownership
+        if (dataset.user.toString() !== req.user.id) {
+            return res.status(401).json({ error: 'Not authorized' });
+        }
+        if (!dataset.cleanedPath) {
+            return res.status(404).json({ error: 'Dataset has not been cleaned' });
+        }
+
+        const { column, reason, row, offset, limit } = req.query;
+        const flaskResponse = await axios.post('http://localhost:5000/changes', {
+            cleaned_path: dataset.cleanedPath,
+            column,
+            reason,
+            row,
+            offset: offset ? Number(offset) : 0,
+            limit: limit ? Number(limit) : 100
+        });
+        res.json(flaskResponse.data);
+    } catch (error) {
+        console.error('Fetch Changes Error:', error.message);
+        const status = error.response?.status === 404 ? 404 : 500;
+        res.status(status).json({ error: error.response?.data?.error || 'Failed to fetch changes' });
+    }
+});
+
 // DELETE /api/datasets/:id - Delete a dataset
 router.delete('/datasets/:id', protect, async (req, res) => {
     try {
@@ -131,8 +328,21 @@ router.delete('/datasets/:id', protect, async (req, res) => {
         if (dataset.cleanedPath && fs.existsSync(dataset.cleanedPath)) {
             try { fs.unlinkSync(dataset.cleanedPath); } catch (e) { console.error('Failed to delete cleaned file:', e); }
         }
+        const changeLogPath = dataset.changes?.path;
+        if (changeLogPath && fs.existsSync(changeLogPath)) {
+            try { fs.unlinkSync(changeLogPath); } catch (e) { console.error('Failed to delete change log:', e); }
+        }
+        const accountsPath = dataset.accounts?.path;
+        if (accountsPath && fs.existsSync(accountsPath)) {
+            try { fs.unlinkSync(accountsPath); } catch (e) { console.error('Failed to delete account rollup:', e); }
+        }
 
         await Dataset.findByIdAndDelete(req.params.id);
+
+        // Keep the dashboard rollup in step (best effort)
+        try {
+            await axios.delete(`http://localhost:5000/rollup/datasets/${req.params.id}`);
+        } catch (e) { console.error('Failed to update QA rollup:', e.message); }
         res.json({ message: 'Dataset deleted successfully' });
     } catch (error) {
         console.error('Delete Dataset Error:', error);
@@ -154,18 +364,20 @@ router.get('/datasets/:id/download', protect, async (req, res) => {
         }
 
         // Determine which file to download (prefer cleaned, fallback to original)
-        const type = req.query.type || 'cleaned'; // 'cleaned' or 'original'
-        const filePath = type === 'cleaned' ? dataset.cleanedPath : dataset.originalPath;
+        const type = req.query.type || 'cleaned'; // 'cleaned', 'original' or 'accounts'
+        const filePath = type === 'cleaned' ? dataset.cleanedPath
+            : type === 'accounts' ? dataset.accounts?.path : dataset.originalPath;
 
         if (!filePath || !fs.existsSync(filePath)) {
             return res.status(404).json({ error: 'File not found on server' });
         }
 
         // Set filename for download
-        let downloadName = type === 'cleaned' ? `cleaned-${dataset.filename}` : dataset.filename;
+        let downloadName = type === 'cleaned' ? `cleaned-${dataset.filename}`
+            : type === 'accounts' ? `accounts-${dataset.filename}` : dataset.filename;
 
-        // Force .csv extension for cleaned files
-        if (type === 'cleaned') {
+        // Force .csv extension for cleaned and account files
+        if (type === 'cleaned' || type === 'accounts') {
             const baseName = path.parse(downloadName).name;
             downloadName = `${baseName}.csv`;
         }